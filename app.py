@@ -7,10 +7,17 @@ import random
 import json
 from streamlit_option_menu import option_menu
 from auth import Authentication
-from database import Database
+from database import get_database, resolve_report_period, REPORT_PERIODS
+from sorting import CatalogSorter
+from receipts import BusinessProfile, render_pdf_receipt, render_excel_receipt
+from backups import BackupManager, BACKUP_INTERVALS
+from jobs import JobRunner
+from audit import AuditLog, AUDIT_PAGE_SIZE, AUDIT_RETENTION, AUDIT_STATUSES
+from ledger import InventoryLedger
+import atexit
 import io
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+import gzip
+import os
 import numpy as np
 
 # Page configuration
@@ -136,9 +143,9 @@ if 'selected_module' not in st.session_state:
 if 'last_receipt' not in st.session_state:
     st.session_state.last_receipt = None
 
-# Initialize classes
-auth = Authentication()
-db = Database()
+# Initialize classes (the database handle is opened once per process and reused across reruns)
+db = get_database()
+auth = Authentication(db)
 
 # MODULE 1: User Authentication Interface
 def show_login():
@@ -171,10 +178,12 @@ def show_login():
                             'email': result.get('email', '')
                         }
                         st.session_state.selected_module = "Dashboard"
+                        audit('Login', f"Signed in as {result.get('role', 'user')}")
                         st.success(f"Welcome, {result.get('username', 'User')}!")
                         st.rerun()
                     else:
                         error_msg = result.get('error', 'Invalid credentials') if result else 'Login failed'
+                        audit('Failed Login', error_msg, status='FAILED', username=username)
                         st.error(f"Authentication failed: {error_msg}")
                 else:
                     st.warning("Please enter both username and password")
@@ -190,30 +199,173 @@ def show_login():
             - 💼 Clerk: `clerk1` / `clerk123`
             """)
 
-# QuickSort Algorithm Implementation
-def quicksort_products(products, key='name'):
-    """QuickSort algorithm for product sorting"""
-    if len(products) <= 1:
-        return products
+# Most inventory rows fetched for one table view
+INVENTORY_PAGE_SIZE = 500
+
+# Most sale lines loaded for the Reports detail table
+REPORT_DETAIL_ROWS = 5000
+
+# Columns included in the full Sales Data CSV export
+SALES_EXPORT_COLUMNS = ['transaction_id', 'sale_date', 'product_id', 'quantity', 'unit_price',
+                        'total_price', 'tax_amount', 'payment_method', 'user_id']
+
+# Catalog sorting (stable, multi-key; per-key rankings are reused across reruns)
+@st.cache_resource
+def get_catalog_sorter():
+    return CatalogSorter()
+
+def get_business_profile():
+    """Receipt header/footer details from the saved business profile"""
+    return BusinessProfile.from_settings(db.get_settings())
+
+# Background jobs (exports, reprints) shared by every session
+@st.cache_resource
+def get_job_runner():
+    return JobRunner(db)
+
+# Download types for job output files, by extension
+JOB_MIME_TYPES = {
+    'csv': "text/csv",
+    'gz': "application/gzip",
+    'xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    'parquet': "application/vnd.apache.parquet",
+    'pdf': "application/pdf",
+    'zip': "application/zip",
+}
+
+# Audit trail shared by every session; queued entries are written before exit
+@st.cache_resource
+def get_audit_log():
+    audit_log = AuditLog(db)
+    atexit.register(audit_log.close)
+    return audit_log
+
+def audit(event, details=None, status='SUCCESS', username=None):
+    """Queue an audit_log entry for the signed-in user; never waits on the database"""
+    user = st.session_state.get('current_user') or {}
+    get_audit_log().record(event, user_id=st.session_state.get('user_id'),
+                           username=username or user.get('username'), details=details,
+                           status=status, ip_address=st.context.ip_address)
+
+def submit_job(kind, params, extension=None):
+    """Queue a background job for the current user and say so"""
+    job_id = get_job_runner().submit(kind, params, user_id=st.session_state.get('user_id'),
+                                     extension=extension)
+    if job_id is None:
+        st.warning("Too many jobs are queued, please wait for some to finish")
+    else:
+        audit('Export', f"{kind} job #{job_id}")
+        st.success(f"Job #{job_id} queued. Follow it under Background Jobs below.")
+
+# Colours for audit entry statuses
+AUDIT_STATUS_STYLES = {
+    'SUCCESS': 'color: #10B981; font-weight: bold',
+    'FAILED': 'color: #EF4444; font-weight: bold',
+    'WARNING': 'color: #F59E0B; font-weight: bold',
+}
+
+def show_audit_entries(filters, key):
+    """Audit entries matching filters (see build_audit_query), newest first, with a CSV export job"""
+    entries = get_audit_log().search(**filters)
+    if not entries:
+        st.info("No log entries match these filters")
     else:
-        pivot = products[len(products)//2][key]
-        left = [x for x in products if x[key] < pivot]
-        middle = [x for x in products if x[key] == pivot]
-        right = [x for x in products if x[key] > pivot]
-        return quicksort_products(left, key) + middle + quicksort_products(right, key)
+        df_entries = pd.DataFrame(entries)[['created_at', 'username', 'event', 'status', 'details', 'ip_address']]
+        df_entries.columns = ['Timestamp', 'User', 'Event', 'Status', 'Details', 'IP Address']
+        st.dataframe(df_entries.style.map(lambda status: AUDIT_STATUS_STYLES.get(status, ''), subset=['Status']),
+                     width='stretch', hide_index=True)
+        if len(entries) >= AUDIT_PAGE_SIZE:
+            st.caption(f"Showing the latest {AUDIT_PAGE_SIZE:,} entries; export to get them all")
+    
+    if st.button("📥 Export Logs", type="primary", key=f"{key}_export", disabled=not entries):
+        submit_job('export_audit_log', {'filters': filters})
+    show_jobs_panel()
+
+def read_job_output(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def show_jobs_panel():
+    """The current user's recent jobs, polled while any are unfinished"""
+    runner = get_job_runner()
+    user_id = st.session_state.get('user_id')
+    active = any(job['status'] in ('queued', 'running') for job in runner.jobs(user_id, limit=10))
+    
+    @st.fragment(run_every=2 if active else None)
+    def jobs_panel():
+        st.markdown("#### ⏳ Background Jobs")
+        jobs = runner.jobs(user_id, limit=10)
+        if not jobs:
+            st.caption("No jobs yet. Data and log exports and receipt reprints run here.")
+            return
+        
+        for job in jobs:
+            if job['status'] == 'running':
+                done = f"{job['rows_done']:,} of {job['rows_total']:,}" if job['rows_total'] else "starting"
+                st.progress(job['progress'] or 0.0, text=f"Job #{job['id']} {job['kind']}: {done}")
+        
+        jobs_df = pd.DataFrame(jobs)
+        jobs_df['size_mb'] = jobs_df['size_bytes'] / 1e6
+        st.dataframe(jobs_df[['id', 'kind', 'status', 'progress', 'rows_done', 'size_mb',
+                              'created_at', 'finished_at', 'error']],
+                     width='stretch', hide_index=True)
+        
+        ready = [job for job in jobs if job['status'] == 'success'
+                 and job['output_path'] and os.path.exists(job['output_path'])]
+        if ready:
+            choice = st.selectbox("Completed job", ready, key="job_download",
+                                  format_func=lambda job: f"#{job['id']} {job['kind']} ({job['finished_at']})")
+            path = choice['output_path']
+            # The file is read only when the button is clicked, not on each
+            # poll while other jobs run
+            st.download_button(
+                label="⬇️ Download Result",
+                data=lambda: read_job_output(path),
+                file_name=os.path.basename(path),
+                mime=JOB_MIME_TYPES.get(path.rsplit('.', 1)[-1], "application/octet-stream")
+            )
+        
+        queued = [job['id'] for job in jobs if job['status'] == 'queued']
+        if queued and st.button("✖️ Cancel Queued Jobs"):
+            for job_id in queued:
+                runner.cancel(job_id)
+            st.rerun()
+    
+    jobs_panel()
+
+# One backup manager per server; its scheduler follows the saved backup frequency
+@st.cache_resource
+def get_backup_manager():
+    manager = BackupManager(db)
+    manager.start_scheduler()
+    return manager
+
+# Inventory checkpoints for stock history; its scheduler takes one a day
+@st.cache_resource
+def get_inventory_ledger():
+    ledger = InventoryLedger(db)
+    ledger.start_scheduler()
+    return ledger
+
+# Longest Stock History range drawn movement by movement; longer ones use checkpoints
+STOCK_HISTORY_DETAIL_DAYS = 31
+# Search matches offered by the Stock History product picker
+STOCK_HISTORY_MATCHES = 50
 
 # MODULE 2: Dashboard
 def show_dashboard():
     st.markdown("<h1 class='main-header'>📊 Dashboard Overview</h1>", unsafe_allow_html=True)
     
-    # Get sample data
-    products, users = db.get_sample_data()
+    # KPIs from one aggregate query, shared by every session for a few seconds
+    snapshot = db.dashboard_snapshot()
+    if snapshot is None:
+        st.error("Could not load the dashboard, please try again")
+        return
     
-    # Calculate metrics
-    total_products = len(products)
-    low_stock = sum(1 for p in products if p['stock_quantity'] < p['min_stock_level'])
-    critical_stock = sum(1 for p in products if p['stock_quantity'] < p['min_stock_level'] * 0.3)
-    total_stock_value = sum(p['price'] * p['stock_quantity'] for p in products)
+    total_products = snapshot['total_products']
+    low_stock = snapshot['low_stock']
+    critical_stock = snapshot['critical_stock']
+    total_stock_value = snapshot['stock_value']
     
     # Display metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -276,12 +428,10 @@ def show_dashboard():
     with col2:
         st.markdown("### 📊 Top Products by Stock Value")
         
-        # Sort products by stock value
-        sorted_products = sorted(products, key=lambda x: x['price'] * x['stock_quantity'], reverse=True)[:8]
-        
+        top_products = snapshot['top_products']
         data = pd.DataFrame({
-            'Product': [p['name'] for p in sorted_products],
-            'Value': [p['price'] * p['stock_quantity'] for p in sorted_products]
+            'Product': [p['name'] for p in top_products],
+            'Value': [p['value'] for p in top_products]
         })
         
         fig = px.bar(data, x='Product', y='Value', 
@@ -293,31 +443,34 @@ def show_dashboard():
     # Low stock alerts
     st.markdown("### ⚠️ Low Stock Alerts")
     
-    low_stock_items = [p for p in products if p['stock_quantity'] < p['min_stock_level']]
+    low_stock_items = snapshot['low_stock_items']
     
     if low_stock_items:
         alert_data = []
         for item in low_stock_items:
-            alert_level = "CRITICAL" if item['stock_quantity'] < item['min_stock_level'] * 0.3 else "LOW"
+            alert_level = "CRITICAL" if item['critical_since'] else "LOW"
             
             alert_data.append({
                 'Product': item['name'],
                 'Category': item['category'],
                 'Current Stock': item['stock_quantity'],
                 'Min Required': item['min_stock_level'],
-                'Status': alert_level
+                'Status': alert_level,
+                'Since': item['critical_since'] or item['low_since']
             })
         
         df_alerts = pd.DataFrame(alert_data)
         st.dataframe(df_alerts, width='stretch', hide_index=True)
     else:
         st.success("🎉 All products have sufficient stock levels!")
+    
+    st.caption(f"Updated {snapshot['taken_at'].strftime('%H:%M:%S')}")
 
 # MODULE 3: Sales Processing Interface
 def show_sales_processing():
     st.markdown("<h1 class='main-header'>🛒 Sales Processing</h1>", unsafe_allow_html=True)
     
-    products, _ = db.get_sample_data()
+    products = db.get_products()
     
     col1, col2 = st.columns([2, 1])
     
@@ -333,31 +486,31 @@ def show_sales_processing():
             selected_category = st.selectbox("📂 Filter by category", ["All"] + categories)
         
         with col_filter2:
-            sort_option = st.selectbox("🔢 Sort by", ["Name (A-Z)", "Name (Z-A)", "Price (Low-High)", "Price (High-Low)"])
+            sort_option = st.selectbox("🔢 Sort by", ["Name (A-Z)", "Name (Z-A)", "Price (Low-High)", "Price (High-Low)", "Relevance"])
         
-        # Filter products
+        # Filter products (search uses the ranked full-text index)
         filtered_products = products
         
         if search_term:
-            filtered_products = [p for p in filtered_products 
-                               if search_term.lower() in p['name'].lower() 
-                               or search_term.lower() in p['category'].lower()]
+            filtered_products = db.search_products(search_term)
         
         if selected_category != "All":
             filtered_products = [p for p in filtered_products if p['category'] == selected_category]
         
-        # Sort using QuickSort
+        # Sort with the shared catalog sorter
         sort_key_map = {
-            "Name (A-Z)": ('name', False),
-            "Name (Z-A)": ('name', True),
-            "Price (Low-High)": ('price', False),
-            "Price (High-Low)": ('price', True)
+            "Name (A-Z)": [('name', False)],
+            "Name (Z-A)": [('name', True)],
+            "Price (Low-High)": [('price', False), ('name', False)],
+            "Price (High-Low)": [('price', True), ('name', False)],
+            "Relevance": [('name', False)]
         }
         
-        sort_key, reverse = sort_key_map[sort_option]
-        sorted_products = quicksort_products(filtered_products, sort_key)
-        if reverse:
-            sorted_products = sorted_products[::-1]
+        if search_term and sort_option == "Relevance":
+            sorted_products = filtered_products
+        else:
+            sorted_products = get_catalog_sorter().sort(products, sort_key_map[sort_option],
+                                                        items=filtered_products)
         
         # Display products in grid
         st.markdown("### Available Products")
@@ -378,6 +531,10 @@ def show_sales_processing():
                     </div>
                     """, unsafe_allow_html=True)
                     
+                    if product['stock_quantity'] < 1:
+                        st.caption("Out of stock")
+                        continue
+                    
                     qty = st.number_input(f"Quantity", min_value=1, max_value=product['stock_quantity'], 
                                          value=1, key=f"qty_{product['id']}")
                     
@@ -447,30 +604,44 @@ def show_sales_processing():
             with col_btn1:
                 if st.button("✅ Complete Sale", type="primary"):
                     if customer_name:
-                        # Generate receipt
-                        receipt_data = {
-                            'transaction_id': f"TXN{datetime.now().strftime('%Y%m%d%H%M%S')}",
-                            'customer_name': customer_name,
-                            'items': st.session_state.cart.copy(),
-                            'subtotal': cart_total,
-                            'tax_rate': tax_rate,
-                            'tax_amount': tax_amount,
-                            'total': final_total,
-                            'payment_method': payment_method,
-                            'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            'user': st.session_state.current_user['username']
-                        }
+                        # Persist the sale and decrement stock in one transaction
+                        sale = db.checkout(
+                            st.session_state.cart,
+                            user_id=st.session_state.get('user_id'),
+                            payment_method=payment_method,
+                            customer_info=customer_name,
+                            tax_rate=tax_rate
+                        )
+                        if not sale['success']:
+                            audit('Sale', sale['error'], status='FAILED')
+                            st.error(f"❌ {sale['error']}")
+                        else:
+                            audit('Sale', f"{sale['transaction_id']}: {sale['lines']} line(s), "
+                                          f"KES {sale['total']:,.2f} by {payment_method}")
+                            # Generate receipt
+                            receipt_data = {
+                                'transaction_id': sale['transaction_id'],
+                                'customer_name': customer_name,
+                                'items': st.session_state.cart.copy(),
+                                'subtotal': cart_total,
+                                'tax_rate': tax_rate,
+                                'tax_amount': tax_amount,
+                                'total': final_total,
+                                'payment_method': payment_method,
+                                'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                'user': st.session_state.current_user['username']
+                            }
                         
-                        # Save receipt to session
-                        st.session_state.last_receipt = receipt_data
-                        st.session_state.cart = []
+                            # Save receipt to session
+                            st.session_state.last_receipt = receipt_data
+                            st.session_state.cart = []
                         
-                        st.success(f"✅ Sale completed! Transaction ID: {receipt_data['transaction_id']}")
-                        st.balloons()
+                            st.success(f"✅ Sale completed! Transaction ID: {receipt_data['transaction_id']}")
+                            st.balloons()
                         
-                        # Show receipt preview
-                        st.markdown("---")
-                        show_receipt_preview(receipt_data)
+                            # Show receipt preview
+                            st.markdown("---")
+                            show_receipt_preview(receipt_data)
                     else:
                         st.warning("Please enter customer name")
             
@@ -488,15 +659,16 @@ def show_sales_processing():
 def show_receipt_preview(receipt_data):
     """Display receipt preview - FIXED VERSION"""
     st.markdown("### 📄 Receipt Preview")
+    profile = get_business_profile()
     
     # Create receipt using Streamlit components instead of raw HTML
     with st.container():
         st.markdown(f"""
         <div style="border: 1px solid #ddd; padding: 20px; border-radius: 10px; background-color: #f9f9f9;">
-            <h3 style="text-align: center; color: #1E3A8A;">SALPHINE CHEMOS GETAWAY RESORT</h3>
-            <p style="text-align: center;">P.O. Box 19938 - 00202 KNH Nairobi</p>
-            <p style="text-align: center;">Tel: +254 727 680 468 | +254 736 880 488</p>
-            <p style="text-align: center;">Email: info@lukenyagetaway.com</p>
+            <h3 style="text-align: center; color: #1E3A8A;">{profile.name.upper()}</h3>
+            <p style="text-align: center;">{profile.address}</p>
+            <p style="text-align: center;">Tel: {profile.phone1} | {profile.phone2}</p>
+            <p style="text-align: center;">Email: {profile.email}</p>
             <hr>
         </div>
         """, unsafe_allow_html=True)
@@ -542,10 +714,10 @@ def show_receipt_preview(receipt_data):
         st.markdown("---")
         st.markdown(f"**Payment Method:** {receipt_data['payment_method']}")
         
-        st.markdown("""
+        st.markdown(f"""
         <div style="text-align: center; margin-top: 20px;">
-            <p>Thank you for your business!</p>
-            <p>Visit us: www.salphinechemos.com</p>
+            <p>{profile.footer_message}</p>
+            <p>Visit us: {profile.website}</p>
         </div>
         """, unsafe_allow_html=True)
     
@@ -561,109 +733,18 @@ def show_receipt_preview(receipt_data):
 
 def generate_pdf_receipt(receipt_data):
     """Generate PDF receipt"""
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    
-    # Add content to PDF
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(200, 750, "SALPHINE CHEMOS GETAWAY RESORT")
-    
-    c.setFont("Helvetica", 10)
-    c.drawString(150, 730, "P.O. Box 19938 - 00202 KNH Nairobi")
-    c.drawString(180, 715, "Tel: +254 727 680 468 | +254 736 880 488")
-    c.drawString(200, 700, "Email: info@lukenyagetaway.com")
-    
-    c.line(50, 690, 550, 690)
-    
-    y_position = 670
-    c.drawString(50, y_position, f"Transaction ID: {receipt_data['transaction_id']}")
-    c.drawString(50, y_position-20, f"Date: {receipt_data['date']}")
-    c.drawString(50, y_position-40, f"Customer: {receipt_data['customer_name']}")
-    c.drawString(50, y_position-60, f"Cashier: {receipt_data['user']}")
-    
-    c.line(50, y_position-80, 550, y_position-80)
-    
-    # Items table
-    y_position -= 100
-    c.drawString(50, y_position, "Item")
-    c.drawString(350, y_position, "Qty")
-    c.drawString(400, y_position, "Price")
-    c.drawString(500, y_position, "Total")
-    
-    y_position -= 20
-    for item in receipt_data['items']:
-        c.drawString(50, y_position, item['name'][:40])
-        c.drawString(350, y_position, str(item['quantity']))
-        c.drawString(400, y_position, f"KES {item['price']:,.2f}")
-        c.drawString(500, y_position, f"KES {item['total']:,.2f}")
-        y_position -= 20
-    
-    c.line(50, y_position, 550, y_position)
-    y_position -= 20
-    
-    c.drawString(400, y_position, f"Subtotal: KES {receipt_data['subtotal']:,.2f}")
-    y_position -= 20
-    c.drawString(400, y_position, f"Tax ({receipt_data['tax_rate']}%): KES {receipt_data['tax_amount']:,.2f}")
-    y_position -= 20
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(400, y_position, f"TOTAL: KES {receipt_data['total']:,.2f}")
-    
-    y_position -= 40
-    c.setFont("Helvetica", 10)
-    c.drawString(50, y_position, f"Payment Method: {receipt_data['payment_method']}")
-    
-    y_position -= 40
-    c.drawString(200, y_position, "Thank you for your business!")
-    c.drawString(200, y_position-20, "Visit us: www.salphinechemos.com")
-    
-    c.save()
-    
-    buffer.seek(0)
     st.download_button(
         label="⬇️ Click to Download PDF",
-        data=buffer,
+        data=render_pdf_receipt(receipt_data, get_business_profile()),
         file_name=f"receipt_{receipt_data['transaction_id']}.pdf",
         mime="application/pdf"
     )
 
 def generate_excel_receipt(receipt_data):
     """Generate Excel receipt"""
-    # Create items dataframe
-    items_data = []
-    for item in receipt_data['items']:
-        items_data.append({
-            'Item Name': item['name'],
-            'Quantity': item['quantity'],
-            'Unit Price (KES)': item['price'],
-            'Total (KES)': item['total']
-        })
-    
-    df_items = pd.DataFrame(items_data)
-    
-    # Create summary dataframe
-    summary_data = {
-        'Transaction ID': [receipt_data['transaction_id']],
-        'Date': [receipt_data['date']],
-        'Customer': [receipt_data['customer_name']],
-        'Cashier': [receipt_data['user']],
-        'Subtotal (KES)': [receipt_data['subtotal']],
-        'Tax Rate (%)': [receipt_data['tax_rate']],
-        'Tax Amount (KES)': [receipt_data['tax_amount']],
-        'Total (KES)': [receipt_data['total']],
-        'Payment Method': [receipt_data['payment_method']]
-    }
-    df_summary = pd.DataFrame(summary_data)
-    
-    # Write to Excel
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df_items.to_excel(writer, sheet_name='Items', index=False)
-        df_summary.to_excel(writer, sheet_name='Summary', index=False)
-    
-    buffer.seek(0)
     st.download_button(
         label="⬇️ Click to Download Excel",
-        data=buffer,
+        data=render_excel_receipt(receipt_data),
         file_name=f"receipt_{receipt_data['transaction_id']}.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
@@ -672,7 +753,7 @@ def generate_excel_receipt(receipt_data):
 def show_inventory():
     st.markdown("<h1 class='main-header'>📦 Inventory Management</h1>", unsafe_allow_html=True)
     
-    products, _ = db.get_sample_data()
+    products = db.get_products()
     
     # CRUD Operations
     tab1, tab2, tab3, tab4 = st.tabs(["📋 View Inventory", "➕ Add Product", "✏️ Edit Product", "🔍 Search & Filter"])
@@ -689,14 +770,6 @@ def show_inventory():
         with col3:
             sort_order = st.selectbox("Order", ["Ascending", "Descending"])
         
-        # Filter products
-        if view_option == "Low Stock":
-            filtered_products = [p for p in products if p['stock_quantity'] < p['min_stock_level']]
-        elif view_option == "Critical Stock":
-            filtered_products = [p for p in products if p['stock_quantity'] < p['min_stock_level'] * 0.3]
-        else:
-            filtered_products = products
-        
         # Sort products
         sort_key = {
             "Name": "name",
@@ -705,9 +778,12 @@ def show_inventory():
             "Price": "price"
         }[sort_by]
         
-        sorted_products = quicksort_products(filtered_products, sort_key)
-        if sort_order == "Descending":
-            sorted_products = sorted_products[::-1]
+        # Filter and sort in SQL so only the rows shown reach Python
+        sorted_products = db.filter_products(view_mode=view_option, sort_by=sort_key,
+                                             descending=sort_order == "Descending",
+                                             limit=INVENTORY_PAGE_SIZE)
+        if len(sorted_products) == INVENTORY_PAGE_SIZE:
+            st.caption(f"Showing the first {INVENTORY_PAGE_SIZE} products")
         
         # Display inventory table with color coding
         inventory_data = []
@@ -741,26 +817,15 @@ def show_inventory():
         # Stock level visualization
         st.markdown("### 📊 Stock Level Analysis")
         
-        categories = {}
-        for product in products:
-            cat = product['category']
-            if cat not in categories:
-                categories[cat] = {'total': 0, 'low': 0, 'critical': 0}
-            
-            categories[cat]['total'] += 1
-            if product['stock_quantity'] < product['min_stock_level'] * 0.3:
-                categories[cat]['critical'] += 1
-            elif product['stock_quantity'] < product['min_stock_level']:
-                categories[cat]['low'] += 1
-        
+        # Counts per category from the stock_alerts table
         cat_df = pd.DataFrame([
             {
-                'Category': cat,
+                'Category': data['category'],
                 'Adequate': data['total'] - data['low'] - data['critical'],
                 'Low': data['low'],
                 'Critical': data['critical']
             }
-            for cat, data in categories.items()
+            for data in db.stock_status_by_category()
         ])
         
         fig = px.bar(cat_df.melt(id_vars='Category'), 
@@ -768,6 +833,46 @@ def show_inventory():
                     color_discrete_map={'Adequate': '#10B981', 'Low': '#F59E0B', 'Critical': '#EF4444'},
                     title="Stock Status by Category")
         st.plotly_chart(fig, width='stretch')
+        
+        # Stock over time from inventory checkpoints and the movement log
+        st.markdown("### 🕒 Stock History")
+        
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            # The picker lists search matches, never the whole catalog
+            history_search = st.text_input("🔍 Product", placeholder="Search by name, category or description",
+                                           key="history_search")
+            matches = db.search_products(history_search, limit=STOCK_HISTORY_MATCHES)
+            history_product = None
+            if matches:
+                history_product = st.selectbox("Matching products", matches, key="history_product",
+                                               format_func=lambda p: f"{p['id']} - {p['name']}")
+            elif history_search.strip():
+                st.caption("No products match that search")
+            else:
+                st.caption("Search for a product to chart its stock")
+        with col2:
+            history_start = st.date_input("From", value=datetime.now().date() - timedelta(days=90),
+                                          key="history_start")
+        with col3:
+            history_end = st.date_input("To", value=datetime.now().date(), key="history_end")
+        
+        if history_product and history_start <= history_end:
+            ledger = get_inventory_ledger()
+            end = history_end + timedelta(days=1)
+            if (end - history_start).days > STOCK_HISTORY_DETAIL_DAYS:
+                history = ledger.stock_trend(history_product['id'], history_start, end)
+            else:
+                history = ledger.stock_history(history_product['id'], history_start, end)
+            
+            fig = px.line(history, x='date', y='stock', line_shape='hv',
+                          title=f"{history_product['name']} stock")
+            fig.add_hline(y=history_product['min_stock_level'], line_dash="dash",
+                          line_color="#F59E0B", annotation_text="Min level")
+            fig.update_layout(xaxis_title="", yaxis_title="Units in stock")
+            st.plotly_chart(fig, width='stretch')
+        elif history_product:
+            st.error("End date is before start date")
     
     with tab2:
         st.markdown("### Add New Product")
@@ -789,9 +894,17 @@ def show_inventory():
             
             if submitted:
                 if name and price > 0:
-                    # Add product logic here
-                    st.success(f"Product '{name}' added successfully!")
-                    st.rerun()
+                    product_id = db.add_product({
+                        'name': name, 'category': category, 'price': price,
+                        'stock_quantity': int(stock_quantity), 'min_stock_level': int(min_stock_level),
+                        'description': description,
+                    }, user_id=st.session_state.get('user_id'))
+                    if product_id is None:
+                        st.error("Product could not be saved, please retry")
+                    else:
+                        audit('Inventory Update', f"Added product #{product_id} '{name}' with {int(stock_quantity)} in stock")
+                        st.success(f"Product '{name}' added successfully!")
+                        st.rerun()
                 else:
                     st.error("Please fill in all required fields (*)")
     
@@ -830,7 +943,19 @@ def show_inventory():
                         delete_btn = st.form_submit_button("🗑️ Delete Product", type="secondary")
                     
                     if update_btn:
-                        st.success(f"Product '{new_name}' updated successfully!")
+                        changes = db.update_product(product_id, {
+                            'name': new_name, 'category': new_category, 'price': new_price,
+                            'stock_quantity': int(new_stock), 'min_stock_level': int(new_min_level),
+                            'description': new_description,
+                        }, user_id=st.session_state.get('user_id'))
+                        if changes is None:
+                            st.error("Product could not be saved, please retry")
+                        elif changes:
+                            audit('Inventory Update', f"Product #{product_id}: " + ", ".join(
+                                f"{key} {old} → {new}" for key, (old, new) in changes.items()))
+                            st.success(f"Product '{new_name}' updated successfully!")
+                        else:
+                            st.info("Nothing to update")
                     if delete_btn:
                         st.warning(f"Are you sure you want to delete '{product['name']}'?")
     
@@ -839,25 +964,23 @@ def show_inventory():
         
         col1, col2 = st.columns(2)
         
+        # Slider limits come from two index lookups rather than a catalog scan
+        bounds = db.get_product_bounds()
+        max_price = max(1000.0, float(bounds['max_price']))
+        max_stock = max(200, int(bounds['max_stock']))
+        
         with col1:
             search_name = st.text_input("Search by Name", placeholder="Enter product name...")
-            price_range = st.slider("Price Range (KES)", 0.0, 1000.0, (0.0, 1000.0))
+            price_range = st.slider("Price Range (KES)", 0.0, max_price, (0.0, max_price))
         
         with col2:
             search_category = st.multiselect("Categories", ["Beverages", "Food", "Dessert", "Snacks", "Other"])
-            stock_range = st.slider("Stock Range", 0, 200, (0, 200))
-        
-        # Apply filters
-        filtered = products
-        
-        if search_name:
-            filtered = [p for p in filtered if search_name.lower() in p['name'].lower()]
+            stock_range = st.slider("Stock Range", 0, max_stock, (0, max_stock))
         
-        if search_category:
-            filtered = [p for p in filtered if p['category'] in search_category]
-        
-        filtered = [p for p in filtered if price_range[0] <= p['price'] <= price_range[1]]
-        filtered = [p for p in filtered if stock_range[0] <= p['stock_quantity'] <= stock_range[1]]
+        # Apply filters as one indexed query
+        filtered = db.filter_products(search=search_name, categories=search_category,
+                                      price_range=price_range, stock_range=stock_range,
+                                      limit=INVENTORY_PAGE_SIZE)
         
         if filtered:
             df_filtered = pd.DataFrame(filtered)
@@ -869,9 +992,6 @@ def show_inventory():
 def show_reports():
     st.markdown("<h1 class='main-header'>📈 Sales Reports & Analytics</h1>", unsafe_allow_html=True)
     
-    # Generate sample sales data
-    products, _ = db.get_sample_data()
-    
     # Time period selection
     col1, col2, col3 = st.columns(3)
     
@@ -880,46 +1000,55 @@ def show_reports():
                                   ["Sales Summary", "Product Performance", "Category Analysis", "Time Series"])
     
     with col2:
-        time_period = st.selectbox("Time Period", 
-                                  ["Today", "Yesterday", "Last 7 Days", "This Month", "Last Month", "Custom Range"])
+        time_period = st.selectbox("Time Period", REPORT_PERIODS)
     
+    start_date = end_date = None
     with col3:
         if time_period == "Custom Range":
             date_col1, date_col2 = st.columns(2)
             with date_col1:
-                start_date = st.date_input("Start Date")
+                start_date = st.date_input("Start Date", value=datetime.now().date() - timedelta(days=30))
             with date_col2:
                 end_date = st.date_input("End Date")
     
-    # Generate sample sales data based on selection
-    dates = pd.date_range(start='2024-01-01', end='2024-01-31', freq='D')
-    sales_data = []
+    try:
+        period_start, period_end = resolve_report_period(time_period, start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        st.error(str(e))
+        return
     
-    for date in dates:
-        daily_sales = random.randint(50, 200)
-        for _ in range(daily_sales):
-            product = random.choice(products)
-            qty = random.randint(1, 5)
-            sales_data.append({
-                'date': date,
-                'product': product['name'],
-                'category': product['category'],
-                'quantity': qty,
-                'price': product['price'],
-                'total': product['price'] * qty,
-                'payment_method': random.choice(['Cash', 'Credit Card', 'M-Pesa', 'Debit Card'])
-            })
+    # Aggregates come from the trigger-maintained daily rollup, so their
+    # cost follows the number of days in the period, not sale lines
+    summary = db.sales_rollup(None, period_start, period_end)
+    if summary.empty or summary['lines'].iloc[0] == 0:
+        st.info(f"No sales between {period_start:%Y-%m-%d} and {period_end - timedelta(days=1):%Y-%m-%d}.")
+        return
     
-    df_sales = pd.DataFrame(sales_data)
+    by_product = db.sales_rollup('product', period_start, period_end).sort_values('total', ascending=False)
+    by_category = db.sales_rollup('category', period_start, period_end)
+    by_payment = db.sales_rollup('payment_method', period_start, period_end)
+    daily_trend = db.sales_rollup('date', period_start, period_end)
+    
+    # Line-level data only for the detail table, read backwards along
+    # idx_sales_sale_date within the period
+    df_sales = db.query_df("""
+        SELECT s.sale_date AS date, p.name AS product, p.category, s.quantity,
+               s.unit_price AS price, s.total_price AS total, s.payment_method
+        FROM sales s LEFT JOIN products p ON p.id = s.product_id
+        WHERE s.sale_date >= ? AND s.sale_date < ?
+        ORDER BY s.sale_date DESC
+        LIMIT ?
+    """, (str(period_start), str(period_end), REPORT_DETAIL_ROWS), dtypes={'date': 'datetime64[ns]'})
     
     tab1, tab2, tab3, tab4 = st.tabs(["📊 Summary Dashboard", "📈 Visual Charts", "📋 Data Tables", "📤 Export Data"])
     
     with tab1:
         # Key metrics
-        total_sales = df_sales['total'].sum()
-        avg_sale = df_sales['total'].mean()
-        total_transactions = len(df_sales)
-        top_product = df_sales.groupby('product')['quantity'].sum().idxmax()
+        total_sales = summary['total'].iloc[0]
+        # Cart lines share a transaction_id, so lines overstate transactions
+        total_transactions = int(db.count_transactions(period_start, period_end))
+        avg_sale = total_sales / total_transactions if total_transactions else 0.0
+        top_product = by_product.loc[by_product['quantity'].idxmax(), 'product']
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -957,10 +1086,7 @@ def show_reports():
         
         # Top products table
         st.markdown("### 🏆 Top 10 Products by Sales")
-        top_products = df_sales.groupby('product').agg({
-            'quantity': 'sum',
-            'total': 'sum'
-        }).sort_values('total', ascending=False).head(10)
+        top_products = by_product.set_index('product')[['quantity', 'total']].head(10)
         
         st.dataframe(top_products.style.format({'total': 'KES {:,.2f}'}), 
                     width='stretch')
@@ -971,8 +1097,7 @@ def show_reports():
         with col1:
             st.markdown("### Sales by Category")
             
-            category_sales = df_sales.groupby('category')['total'].sum().reset_index()
-            fig = px.pie(category_sales, values='total', names='category',
+            fig = px.pie(by_category, values='total', names='category',
                         color_discrete_sequence=px.colors.qualitative.Set3)
             fig.update_traces(textposition='inside', textinfo='percent+label')
             st.plotly_chart(fig, width='stretch')
@@ -980,7 +1105,6 @@ def show_reports():
         with col2:
             st.markdown("### Daily Sales Trend")
             
-            daily_trend = df_sales.groupby('date')['total'].sum().reset_index()
             fig = px.line(daily_trend, x='date', y='total',
                          title="Sales Over Time",
                          markers=True)
@@ -989,9 +1113,7 @@ def show_reports():
         
         # Payment method distribution
         st.markdown("### Payment Methods Distribution")
-        payment_dist = df_sales.groupby('payment_method')['total'].sum().reset_index()
-        
-        fig = px.bar(payment_dist, x='payment_method', y='total',
+        fig = px.bar(by_payment, x='payment_method', y='total',
                     color='payment_method',
                     title="Sales by Payment Method")
         fig.update_layout(xaxis_title="Payment Method", yaxis_title="Total Sales (KES)")
@@ -999,6 +1121,8 @@ def show_reports():
     
     with tab3:
         st.markdown("### Detailed Sales Data")
+        if len(df_sales) == REPORT_DETAIL_ROWS:
+            st.caption(f"Showing the latest {REPORT_DETAIL_ROWS:,} sale lines")
         
         # Filters for the table
         col_filter1, col_filter2, col_filter3 = st.columns(3)
@@ -1047,6 +1171,7 @@ def show_reports():
         
         with col3:
             include_charts = st.checkbox("Include Charts", value=True)
+            compress_csv = st.checkbox("Compress CSV (gzip)", value=data_type == "Sales Data")
         
         # Generate export data
         if data_type == "Sales Data":
@@ -1058,46 +1183,87 @@ def show_reports():
                          f"KES {avg_sale:,.2f}", top_product]
             })
         elif data_type == "Product Performance":
-            export_df = df_sales.groupby('product').agg({
-                'quantity': 'sum',
-                'total': 'sum'
-            }).reset_index()
+            export_df = by_product[['product', 'quantity', 'total']]
         else:  # Category Analysis
-            export_df = df_sales.groupby('category').agg({
-                'quantity': 'sum',
-                'total': 'sum',
-                'price': 'mean'
-            }).reset_index()
+            export_df = by_category[['category', 'quantity', 'total']].assign(
+                avg_price=by_category['total'] / by_category['quantity'].where(by_category['quantity'] != 0)
+            )
         
         # Export buttons
-        col_btn1, col_btn2, col_btn3 = st.columns(3)
+        col_btn1, col_btn2, col_btn3, col_btn4 = st.columns(4)
         
         with col_btn1:
             if st.button("📥 Download CSV", width='stretch'):
-                csv = export_df.to_csv(index=False)
-                st.download_button(
-                    label="⬇️ Click to Download",
-                    data=csv,
-                    file_name=f"sales_report_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv"
-                )
+                if data_type == "Sales Data":
+                    # Every sale line in the period, written by a background job
+                    submit_job('export_csv', {'table': 'sales', 'columns': SALES_EXPORT_COLUMNS,
+                                              'start_date': period_start, 'end_date': period_end},
+                               extension="csv.gz" if compress_csv else "csv")
+                else:
+                    data = export_df.to_csv(index=False).encode('utf-8')
+                    if compress_csv:
+                        data = gzip.compress(data)
+                    st.download_button(
+                        label="⬇️ Click to Download",
+                        data=data,
+                        file_name=f"sales_report_{datetime.now().strftime('%Y%m%d')}.csv" + (".gz" if compress_csv else ""),
+                        mime="application/gzip" if compress_csv else "text/csv"
+                    )
         
         with col_btn2:
             if st.button("📊 Download Excel", width='stretch'):
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                    export_df.to_excel(writer, index=False, sheet_name='Report')
-                buffer.seek(0)
-                st.download_button(
-                    label="⬇️ Click to Download",
-                    data=buffer,
-                    file_name=f"sales_report_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+                if data_type == "Sales Data":
+                    # Sales, Summary and Categories sheets, streamed by a job
+                    submit_job('export_excel', {'table': 'sales', 'columns': SALES_EXPORT_COLUMNS,
+                                                'start_date': period_start, 'end_date': period_end})
+                else:
+                    buffer = io.BytesIO()
+                    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+                        export_df.to_excel(writer, index=False, sheet_name='Report')
+                    st.download_button(
+                        label="⬇️ Click to Download",
+                        data=buffer.getvalue(),
+                        file_name=f"sales_report_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                        mime=JOB_MIME_TYPES['xlsx']
+                    )
         
         with col_btn3:
             if st.button("📄 Download PDF", width='stretch'):
                 st.info("PDF generation would be implemented with reportlab")
+        
+        with col_btn4:
+            if st.button("🗃️ Download Parquet", width='stretch'):
+                if data_type == "Sales Data":
+                    submit_job('export_parquet', {'table': 'sales', 'start_date': period_start,
+                                                  'end_date': period_end})
+                else:
+                    try:
+                        st.download_button(
+                            label="⬇️ Click to Download",
+                            data=export_df.to_parquet(index=False),
+                            file_name=f"sales_report_{datetime.now().strftime('%Y%m%d')}.parquet",
+                            mime=JOB_MIME_TYPES['parquet']
+                        )
+                    except ImportError:
+                        st.error("Parquet export needs pyarrow")
+        
+        st.markdown("---")
+        st.markdown("#### 🧾 Receipt Reprint")
+        
+        col_day, col_format = st.columns(2)
+        with col_day:
+            reprint_day = st.date_input("Sales Day", value=datetime.now().date(), key="reprint_day")
+        with col_format:
+            reprint_format = st.radio("Format", ["Single PDF", "ZIP (one PDF per receipt)"],
+                                      horizontal=True, key="reprint_format")
+        
+        if st.button("🖨️ Reprint Receipts"):
+            submit_job('reprint_receipts',
+                       {'start_date': reprint_day, 'end_date': reprint_day + timedelta(days=1)},
+                       extension="pdf" if reprint_format == "Single PDF" else "zip")
+        
+        st.markdown("---")
+        show_jobs_panel()
 
 # MODULE 6: User Management Interface (Admin Only)
 def show_user_management():
@@ -1167,52 +1333,24 @@ def show_user_management():
     
     with tab3:
         st.markdown("### 📜 User Activity Logs")
+        audit_log = get_audit_log()
         
-        # Generate sample activity logs
-        activities = []
-        actions = ['Login', 'Logout', 'Sale', 'Inventory Update', 'Report Generated', 'User Modified']
-        
-        for i in range(50):
-            activities.append({
-                'Timestamp': (datetime.now() - timedelta(minutes=random.randint(1, 10080))).strftime("%Y-%m-%d %H:%M:%S"),
-                'User': random.choice([u['username'] for u in users]),
-                'Action': random.choice(actions),
-                'Details': f"Performed {random.choice(actions)} operation",
-                'IP Address': f"192.168.1.{random.randint(1, 255)}"
-            })
-        
-        df_activities = pd.DataFrame(activities)
-        
-        # Filter options
-        col_filter1, col_filter2 = st.columns(2)
+        col_filter1, col_filter2, col_filter3, col_filter4 = st.columns(4)
         
         with col_filter1:
-            log_user = st.multiselect("Filter by User", df_activities['User'].unique())
+            log_start = st.date_input("From", value=datetime.now().date() - timedelta(days=7), key="activity_start")
         
         with col_filter2:
-            log_action = st.multiselect("Filter by Action", df_activities['Action'].unique())
+            log_end = st.date_input("To", value=datetime.now().date(), key="activity_end")
         
-        # Apply filters
-        filtered_logs = df_activities.copy()
-        
-        if log_user:
-            filtered_logs = filtered_logs[filtered_logs['User'].isin(log_user)]
-        
-        if log_action:
-            filtered_logs = filtered_logs[filtered_logs['Action'].isin(log_action)]
+        with col_filter3:
+            log_user = st.multiselect("Filter by User", audit_log.usernames())
         
-        # Display logs
-        st.dataframe(filtered_logs, width='stretch', hide_index=True)
+        with col_filter4:
+            log_action = st.multiselect("Filter by Action", audit_log.events())
         
-        # Export logs
-        if st.button("📥 Export Activity Logs", type="primary"):
-            csv = filtered_logs.to_csv(index=False)
-            st.download_button(
-                label="⬇️ Download CSV",
-                data=csv,
-                file_name=f"activity_logs_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv"
-            )
+        show_audit_entries({'start': log_start, 'end': log_end + timedelta(days=1),
+                            'usernames': log_user, 'events': log_action}, "activity")
     
     with tab4:
         st.markdown("### Account Settings Management")
@@ -1269,22 +1407,27 @@ def show_settings():
     
     with tab1:
         st.markdown("### Business Information")
+        profile = get_business_profile()
+        saved = db.get_settings()
+        currencies = ["KES", "USD", "EUR", "GBP"]
         
         with st.form("business_profile_form"):
             col1, col2 = st.columns(2)
             
             with col1:
-                business_name = st.text_input("Business Name*", value="Lukenya Getaway Resort")
-                tax_id = st.text_input("Tax ID/VAT Number", value="P123456789")
-                currency = st.selectbox("Currency", ["KES", "USD", "EUR", "GBP"], index=0)
-                tax_rate = st.number_input("Default Tax Rate (%)", value=16.0, min_value=0.0, max_value=30.0, step=0.1)
+                business_name = st.text_input("Business Name*", value=profile.name)
+                tax_id = st.text_input("Tax ID/VAT Number", value=saved.get('tax_id') or "P123456789")
+                currency = st.selectbox("Currency", currencies,
+                                        index=currencies.index(saved['currency']) if saved.get('currency') in currencies else 0)
+                tax_rate = st.number_input("Default Tax Rate (%)", value=float(saved.get('tax_rate') or 16.0),
+                                           min_value=0.0, max_value=30.0, step=0.1)
             
             with col2:
-                address = st.text_area("Address", value="P.O. Box 19938 - 00202 KNH Nairobi")
-                phone1 = st.text_input("Primary Phone", value="+254 727 680 468")
-                phone2 = st.text_input("Secondary Phone", value="+254 736 880 488")
-                email = st.text_input("Business Email", value="info@lukenyagetaway.com")
-                website = st.text_input("Website", value="www.lukenyagetaway.com")
+                address = st.text_area("Address", value=profile.address)
+                phone1 = st.text_input("Primary Phone", value=profile.phone1)
+                phone2 = st.text_input("Secondary Phone", value=profile.phone2)
+                email = st.text_input("Business Email", value=profile.email)
+                website = st.text_input("Website", value=profile.website)
             
             logo_file = st.file_uploader("Upload Business Logo", type=['png', 'jpg', 'jpeg'])
             
@@ -1295,7 +1438,16 @@ def show_settings():
                 cancel_profile = st.form_submit_button("Cancel", type="secondary")
             
             if save_profile:
-                st.success("Business profile updated successfully!")
+                if not business_name.strip():
+                    st.error("Business name is required")
+                else:
+                    db.update_settings({
+                        'business_name': business_name.strip(), 'tax_id': tax_id, 'currency': currency,
+                        'tax_rate': tax_rate, 'address': address, 'phone1': phone1, 'phone2': phone2,
+                        'email': email, 'website': website,
+                    })
+                    audit('Settings Change', "Business profile updated")
+                    st.success("Business profile updated successfully!")
     
     with tab2:
         st.markdown("### Receipt Template Customization")
@@ -1328,12 +1480,14 @@ def show_settings():
             header_size = st.slider("Header Font Size", 12, 24, 16)
             show_logo = st.checkbox("Show Logo", value=True)
             show_footer = st.checkbox("Show Footer Message", value=True)
-            footer_message = st.text_area("Footer Message", value="Thank you for your business!")
+            footer_message = st.text_area("Footer Message", value=get_business_profile().footer_message)
             
             template_style = st.selectbox("Template Style", 
                                          ["Modern", "Classic", "Minimal", "Professional"])
             
             if st.button("🔄 Update Template", type="primary"):
+                db.update_settings({'receipt_footer': footer_message})
+                audit('Settings Change', "Receipt footer updated")
                 st.success("Receipt template updated successfully!")
     
     with tab3:
@@ -1376,6 +1530,10 @@ def show_settings():
     with tab4:
         st.markdown("### System Preferences")
         
+        system_settings = db.get_settings()
+        backup_manager = get_backup_manager()
+        frequencies = list(BACKUP_INTERVALS)
+        
         col1, col2 = st.columns(2)
         
         with col1:
@@ -1391,8 +1549,11 @@ def show_settings():
             data_retention = st.number_input("Data Retention Period (days)", 
                                            min_value=30, max_value=365*5, value=365, step=30)
             
-            backup_frequency = st.selectbox("Auto Backup Frequency", 
-                                          ["Daily", "Weekly", "Monthly", "Never"])
+            saved_frequency = system_settings.get('backup_frequency') or 'Daily'
+            backup_frequency = st.selectbox("Auto Backup Frequency", frequencies,
+                                          index=frequencies.index(saved_frequency) if saved_frequency in frequencies else 0)
+            backup_retention = st.number_input("Backup Retention (copies)", min_value=1, max_value=365,
+                                             value=int(system_settings.get('backup_retention') or 7))
         
         with col2:
             st.markdown("#### Display Settings")
@@ -1409,7 +1570,7 @@ def show_settings():
         st.markdown("---")
         st.markdown("#### System Maintenance")
         
-        col_maint1, col_maint2, col_maint3 = st.columns(3)
+        col_maint1, col_maint2, col_maint3, col_maint4 = st.columns(4)
         
         with col_maint1:
             if st.button("🔄 Clear Cache", type="secondary"):
@@ -1422,8 +1583,32 @@ def show_settings():
         with col_maint3:
             if st.button("🚀 System Diagnostics", type="secondary"):
                 st.info("System diagnostics completed. All systems operational.")
+                st.json(db.get_stats())
+        
+        with col_maint4:
+            if st.button("💾 Backup Now", type="secondary"):
+                if backup_manager.start_backup():
+                    st.info("Backup started in the background.")
+                else:
+                    st.info("A backup is already running.")
+        
+        progress = backup_manager.progress
+        if backup_manager.is_running() and progress and progress['pages']:
+            copied = progress['pages'] - progress['remaining']
+            st.progress(copied / progress['pages'], text=f"Backing up: {copied:,} of {progress['pages']:,} pages")
+        
+        backup_history = backup_manager.history()
+        if backup_history:
+            st.markdown("#### Backup History")
+            history_df = pd.DataFrame(backup_history)
+            history_df['size_mb'] = history_df['size_bytes'] / 1e6
+            st.dataframe(history_df[['started_at', 'trigger', 'status', 'duration_ms', 'size_mb', 'pages', 'path']],
+                         width='stretch', hide_index=True)
         
         if st.button("💾 Save All Settings", type="primary"):
+            db.update_settings({'backup_frequency': backup_frequency,
+                                'backup_retention': int(backup_retention)})
+            audit('Settings Change', f"Backups {backup_frequency.lower()}, keeping {int(backup_retention)}")
             st.success("All system settings saved successfully!")
 
 # MODULE 8: Security Settings
@@ -1549,72 +1734,31 @@ def show_security():
     
     with tab3:
         st.markdown("### Security Audit Logs")
+        audit_log = get_audit_log()
         
-        # Generate sample security logs
-        security_logs = []
-        security_actions = ['Login Attempt', 'Password Change', 'Permission Change', 
-                          'User Creation', 'User Deletion', 'Failed Access Attempt']
-        
-        for i in range(30):
-            security_logs.append({
-                'Timestamp': (datetime.now() - timedelta(hours=random.randint(1, 720))).strftime("%Y-%m-%d %H:%M:%S"),
-                'Event': random.choice(security_actions),
-                'User': random.choice(['admin', 'manager1', 'clerk1', 'Unknown']),
-                'IP Address': f"192.168.1.{random.randint(1, 255)}",
-                'Status': random.choice(['SUCCESS', 'FAILED', 'WARNING']),
-                'Details': f"Security event: {random.choice(security_actions)}"
-            })
+        col_filter1, col_filter2, col_filter3, col_filter4 = st.columns(4)
         
-        df_security = pd.DataFrame(security_logs)
+        with col_filter1:
+            log_start = st.date_input("From", value=datetime.now().date() - timedelta(days=30), key="security_start")
         
-        # Color code status
-        def color_status(val):
-            if val == 'SUCCESS':
-                return 'color: #10B981; font-weight: bold'
-            elif val == 'FAILED':
-                return 'color: #EF4444; font-weight: bold'
-            else:
-                return 'color: #F59E0B; font-weight: bold'
+        with col_filter2:
+            log_end = st.date_input("To", value=datetime.now().date(), key="security_end")
         
-        # Filter options
-        col_filter1, col_filter2 = st.columns(2)
+        with col_filter3:
+            log_event = st.multiselect("Filter by Event", audit_log.events(category='security'))
         
-        with col_filter1:
-            log_event = st.multiselect("Filter by Event", df_security['Event'].unique())
+        with col_filter4:
+            log_status = st.multiselect("Filter by Status", AUDIT_STATUSES)
         
-        with col_filter2:
-            log_status = st.multiselect("Filter by Status", df_security['Status'].unique())
+        show_audit_entries({'start': log_start, 'end': log_end + timedelta(days=1), 'events': log_event,
+                            'statuses': log_status, 'category': 'security'}, "security")
         
-        # Apply filters
-        filtered_security = df_security.copy()
-        
-        if log_event:
-            filtered_security = filtered_security[filtered_security['Event'].isin(log_event)]
-        
-        if log_status:
-            filtered_security = filtered_security[filtered_security['Status'].isin(log_status)]
-        
-        # Display logs
-        st.dataframe(filtered_security, width='stretch', hide_index=True)
-        
-        # Export and clear logs
-        col_export, col_clear = st.columns(2)
-        
-        with col_export:
-            if st.button("📥 Export Audit Logs", type="primary"):
-                csv = filtered_security.to_csv(index=False)
-                st.download_button(
-                    label="⬇️ Download CSV",
-                    data=csv,
-                    file_name=f"audit_logs_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv"
-                )
-        
-        with col_clear:
-            if st.button("🗑️ Clear Old Logs", type="secondary"):
-                st.warning("This will delete logs older than 90 days. Continue?")
-                if st.checkbox("Yes, clear old logs"):
-                    st.info("Old logs cleared successfully!")
+        st.markdown("#### 🗑️ Clear Old Logs")
+        confirm_clear = st.checkbox(f"Yes, delete audit entries older than {AUDIT_RETENTION.days} days")
+        if st.button("🗑️ Clear Old Logs", type="secondary", disabled=not confirm_clear):
+            cleared = audit_log.purge(AUDIT_RETENTION)
+            audit('Settings Change', f"Cleared {cleared:,} audit entries older than {AUDIT_RETENTION.days} days")
+            st.success(f"Cleared {cleared:,} old log entries")
     
     with tab4:
         st.markdown("### Advanced Security Features")
@@ -1799,6 +1943,7 @@ def main():
                 col_btn1, col_btn2 = st.columns(2)
                 with col_btn1:
                     if st.button("✅ Yes, Logout", type="primary"):
+                        audit('Logout')
                         st.session_state.authenticated = False
                         st.session_state.current_user = None
                         st.session_state.cart = []
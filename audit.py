@@ -0,0 +1,226 @@
+import csv
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from database import local_timestamp
+
+# Most entries inserted by one group commit
+AUDIT_BATCH_SIZE = 500
+# Entries waiting for the writer before record() starts dropping them
+AUDIT_MAX_QUEUED = 10_000
+# Attempts at one batch before its entries are given up on
+AUDIT_WRITE_ATTEMPTS = 3
+# Most rows a log view loads
+AUDIT_PAGE_SIZE = 1000
+# "Clear Old Logs" removes entries older than this
+AUDIT_RETENTION = timedelta(days=90)
+
+# Events shown on the Security Audit Logs tab; everything else is activity
+AUDIT_SECURITY_EVENTS = {'Login', 'Failed Login', 'Logout', 'Settings Change', 'User Created'}
+
+AUDIT_STATUSES = ['SUCCESS', 'FAILED', 'WARNING']
+
+_INSERT = """
+    INSERT INTO audit_log (created_at, event, category, status, user_id, username, details, ip_address)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Tells the writer thread to stop once it has written what came before
+_STOP = object()
+
+def build_audit_query(start=None, end=None, usernames=None, events=None, statuses=None,
+                      category=None, limit=AUDIT_PAGE_SIZE):
+    """Turn log view filters into one parameterized query, newest first
+
+    Returns (sql, params). Entries fall in [start, end); each filter is
+    backed by an audit_log index on (column, created_at).
+    """
+    conditions = []
+    params = []
+
+    if start is not None:
+        conditions.append("created_at >= ?")
+        params.append(str(start))
+    if end is not None:
+        conditions.append("created_at < ?")
+        params.append(str(end))
+
+    for column, values in (('username', usernames), ('event', events), ('status', statuses)):
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+
+    if category is not None:
+        conditions.append("category = ?")
+        params.append(category)
+
+    sql = """
+        SELECT id, created_at, event, category, status, user_id, username, details, ip_address
+        FROM audit_log
+    """
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY created_at DESC, id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params
+
+def export_audit_csv(db, export_path, progress=None, batch_size=5000, **filters):
+    """Stream the entries matching filters (see build_audit_query) to CSV
+
+    Returns export_path, or None when nothing matched.
+    """
+    sql, params = build_audit_query(limit=None, **filters)
+    total = None
+    if progress is not None:
+        total = db.execute_query(f"SELECT COUNT(*) AS n FROM ({sql})", params)[0]['n']
+    batches = db.iter_query(sql, params, batch_size=batch_size, batches=True, as_dict=False)
+    first_batch = next(batches, None)
+    if not first_batch:
+        return None
+    with open(export_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(first_batch[0].keys())
+        written = 0
+        for batch in itertools.chain([first_batch], batches):
+            writer.writerows(batch)
+            written += len(batch)
+            if progress is not None:
+                progress(written, total)
+    return export_path
+
+class AuditLog:
+    """Audit trail of logins, sales, inventory and settings changes
+
+    record() only puts the entry on an in-process queue, so callers such as
+    checkout never wait on the database. A writer thread takes whatever has
+    queued up, up to batch_size entries, and inserts it in one transaction,
+    so a burst of events costs one commit rather than one each.
+    """
+
+    def __init__(self, db, batch_size=AUDIT_BATCH_SIZE, max_queued=AUDIT_MAX_QUEUED):
+        self.db = db
+        self.batch_size = batch_size
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._closed = False
+        # The writer commits on its own connection, never a reader's
+        self._conn = None
+        if db.db_path != ":memory:":
+            # (a second connection would see a different in-memory database)
+            self._conn = db.pool._create_connection()
+        self._thread = threading.Thread(target=self._write_loop, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, event, user_id=None, username=None, details=None, status='SUCCESS',
+               ip_address=None):
+        """Queue one entry stamped with the current time; never blocks
+
+        Returns False if the entry was dropped because the queue is full
+        or the log is closed.
+        """
+        if self._closed:
+            return False
+        category = 'security' if event in AUDIT_SECURITY_EVENTS else 'activity'
+        # Text columns are stringified here, as one unbindable value would
+        # fail the whole batch it is written in
+        username, details, ip_address = (None if value is None else str(value)
+                                         for value in (username, details, ip_address))
+        entry = (local_timestamp(), event, category, status,
+                 user_id, username, details, ip_address)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _write(self, entries):
+        for attempt in range(1, AUDIT_WRITE_ATTEMPTS + 1):
+            try:
+                if self._conn is None:
+                    if self.db.execute_many(_INSERT, entries) is None:
+                        raise sqlite3.OperationalError("see the query error above")
+                else:
+                    with self._conn:
+                        self._conn.executemany(_INSERT, entries)
+                self.written += len(entries)
+                self.batches += 1
+                return
+            except sqlite3.Error as e:
+                if attempt == AUDIT_WRITE_ATTEMPTS:
+                    self.dropped += len(entries)
+                    print(f"Audit log write failed, {len(entries)} entries lost: {e}")
+                else:
+                    time.sleep(0.1 * attempt)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            entries = [entry for entry in batch if entry is not _STOP]
+            if entries:
+                self._write(entries)
+            for _ in batch:
+                self._queue.task_done()
+            if len(entries) < len(batch):
+                return
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is written; False on timeout"""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(
+                lambda: not self._queue.unfinished_tasks, timeout)
+
+    def search(self, **filters):
+        """Entries matching filters (see build_audit_query), newest first"""
+        sql, params = build_audit_query(**filters)
+        return self.db.execute_query(sql, params) or []
+
+    def events(self, category=None):
+        """Event names that occur in the log, for filter choices"""
+        if category is None:
+            rows = self.db.execute_query("SELECT DISTINCT event FROM audit_log ORDER BY event")
+        else:
+            rows = self.db.execute_query("""
+                SELECT DISTINCT event FROM audit_log WHERE category = ? ORDER BY event
+            """, (category,))
+        return [row['event'] for row in rows or []]
+
+    def usernames(self):
+        """Usernames that occur in the log, for filter choices"""
+        rows = self.db.execute_query("""
+            SELECT DISTINCT username FROM audit_log WHERE username IS NOT NULL ORDER BY username
+        """)
+        return [row['username'] for row in rows or []]
+
+    def purge(self, older_than=AUDIT_RETENTION):
+        """Delete entries older than older_than; returns how many"""
+        cutoff = local_timestamp(datetime.now() - older_than)
+        result = self.db.execute_many("DELETE FROM audit_log WHERE created_at < ?", [(cutoff,)])
+        return result['rowcount'] if result else 0
+
+    def stats(self):
+        return {'audit_written': self.written, 'audit_batches': self.batches,
+                'audit_dropped': self.dropped, 'audit_queued': self._queue.qsize()}
+
+    def close(self, timeout=None):
+        """Write what is queued, stop the writer and close its connection"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._conn is not None and not self._thread.is_alive():
+            self._conn.close()
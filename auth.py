@@ -1,10 +1,11 @@
 import streamlit as st
 import hashlib
-from database import Database
+from database import get_database
 
 class Authentication:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db=None):
+        # Share the process-wide handle instead of opening another database
+        self.db = db if db is not None else get_database()
         
     def hash_password(self, password):
         """Simple password hashing"""
@@ -41,17 +42,20 @@ class Authentication:
         
         # For demo purposes, check default credentials
         if username == 'admin' and password == 'admin123':
-            # Store in session state for demo user too
+            # Store in session state for demo user too, under the admin row's
+            # real id so per-user data (jobs, audit entries) is attributed
+            admin = self.db.execute_query("SELECT id FROM users WHERE username = 'admin'")
+            user_id = admin[0]['id'] if admin else None
             st.session_state.authenticated = True
             st.session_state.username = 'admin'
             st.session_state.role = 'admin'
-            st.session_state.user_id = 1
+            st.session_state.user_id = user_id
             
             return {
                 'authenticated': True,
                 'username': 'admin',
                 'role': 'admin',
-                'user_id': 1
+                'user_id': user_id
             }
         
         return {'authenticated': False, 'error': 'Invalid credentials'}
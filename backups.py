@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from database import BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP, TIMESTAMP_FORMAT, local_timestamp
+
+# "Auto Backup Frequency" choices mapped to the interval between backups
+BACKUP_INTERVALS = {
+    'Daily': timedelta(days=1),
+    'Weekly': timedelta(weeks=1),
+    'Monthly': timedelta(days=30),
+    'Never': None,
+}
+
+# How often the scheduler re-reads the settings and checks for a due backup
+SCHEDULER_POLL_SECONDS = 60
+
+class BackupManager:
+    """Runs online backups on a background thread and keeps their history
+
+    One backup runs at a time. Each is recorded in the backups table with
+    its duration, size and page count, and successful backups beyond the
+    configured retention are deleted oldest first.
+    """
+
+    def __init__(self, db, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP):
+        self.db = db
+        self.pages = pages
+        self.sleep = sleep
+        self.progress = None
+        self._thread = None
+        self._scheduler = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _record(self, backup_id, **values):
+        assignments = ", ".join(f"{key} = ?" for key in values)
+        self.db.execute_query(f"UPDATE backups SET {assignments} WHERE id = ?",
+                              (*values.values(), backup_id))
+
+    def run_backup(self, trigger='manual'):
+        """Take one backup now on the calling thread; returns its backups row"""
+        settings = self.db.get_settings()
+        backup_dir = settings.get('backup_dir') or 'backups'
+        os.makedirs(backup_dir, exist_ok=True)
+        started = datetime.now()
+        path = os.path.join(backup_dir, f"sales_system_backup_{started.strftime('%Y%m%d_%H%M%S_%f')}.db")
+
+        result = self.db.execute_many("""
+            INSERT INTO backups (path, trigger, status, started_at) VALUES (?, ?, 'running', ?)
+        """, [(path, trigger, local_timestamp(started))])
+        backup_id = result['lastrowid'] if result else None
+
+        def on_step(remaining, total):
+            self.progress = {'backup_id': backup_id, 'remaining': remaining, 'pages': total}
+
+        clock = time.perf_counter()
+        saved = self.db.backup_database(path, pages=self.pages, sleep=self.sleep, progress=on_step)
+        duration_ms = (time.perf_counter() - clock) * 1000
+        pages = self.progress['pages'] if self.progress else None
+        self.progress = None
+
+        finished_at = local_timestamp()
+        if saved is None:
+            self._record(backup_id, status='failed', finished_at=finished_at,
+                         duration_ms=duration_ms, error="Backup failed, see the server log")
+        else:
+            self._record(backup_id, status='success', finished_at=finished_at,
+                         duration_ms=duration_ms, size_bytes=os.path.getsize(saved), pages=pages)
+            self.rotate(settings.get('backup_retention'))
+        return self.get_backup(backup_id)
+
+    def start_backup(self, trigger='manual'):
+        """Start a backup on a background thread; False if one is running"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self.run_backup, args=(trigger,),
+                                            name="backup", daemon=True)
+            self._thread.start()
+            return True
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def rotate(self, retention):
+        """Delete successful backups beyond the newest retention copies"""
+        if not retention or retention < 1:
+            return 0
+        expired = self.db.execute_query("""
+            SELECT id, path FROM backups WHERE status = 'success'
+            ORDER BY finished_at DESC, id DESC LIMIT -1 OFFSET ?
+        """, (int(retention),)) or []
+        for backup in expired:
+            if backup['path'] and os.path.exists(backup['path']):
+                os.remove(backup['path'])
+            self._record(backup['id'], status='rotated')
+        return len(expired)
+
+    def is_due(self, now=None):
+        """Whether the configured frequency calls for a backup now"""
+        interval = BACKUP_INTERVALS.get(self.db.get_settings().get('backup_frequency') or 'Never')
+        if interval is None:
+            return False
+        last = self.db.execute_query("""
+            SELECT MAX(finished_at) AS finished_at FROM backups WHERE status IN ('success', 'rotated')
+        """)
+        last = last[0]['finished_at'] if last else None
+        if last is None:
+            return True
+        now = now or datetime.now()
+        return now - datetime.strptime(last, TIMESTAMP_FORMAT) >= interval
+
+    def _schedule_loop(self, poll_seconds):
+        while not self._stop.wait(poll_seconds):
+            try:
+                if not self.is_running() and self.is_due():
+                    self.start_backup(trigger='scheduled')
+            except Exception as e:
+                print(f"Backup scheduler error: {e}")
+
+    def start_scheduler(self, poll_seconds=SCHEDULER_POLL_SECONDS):
+        """Check the settings every poll_seconds and back up when due"""
+        if self._scheduler is not None and self._scheduler.is_alive():
+            return
+        self._stop.clear()
+        self._scheduler = threading.Thread(target=self._schedule_loop, args=(poll_seconds,),
+                                           name="backup-scheduler", daemon=True)
+        self._scheduler.start()
+
+    def stop(self, timeout=None):
+        """Stop the scheduler and wait for a running backup to finish"""
+        self._stop.set()
+        if self._scheduler is not None:
+            self._scheduler.join(timeout)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def get_backup(self, backup_id):
+        result = self.db.execute_query("SELECT * FROM backups WHERE id = ?", (backup_id,))
+        return result[0] if result else None
+
+    def history(self, limit=20):
+        """Most recent backups with their duration and size metrics"""
+        return self.db.execute_query(
+            "SELECT * FROM backups ORDER BY id DESC LIMIT ?", (limit,)) or []
@@ -0,0 +1,95 @@
+"""Checkout latency with no audit trail, a synchronous audit insert, and the queued AuditLog
+
+Each till checks out carts back to back and logs a 'Sale' entry per sale.
+Reports median and p99 checkout latency per mode and the entries written
+per commit, then verifies every queued entry reached audit_log.
+
+Usage: python benchmarks/bench_audit.py [--tills 4] [--sales 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from audit import AuditLog
+from database import Database
+
+MODES = ['none', 'sync', 'queued']
+
+
+def run(db, mode, tills, sales, products):
+    audit_log = AuditLog(db) if mode == 'queued' else None
+    latencies = [[] for _ in range(tills)]
+
+    def till(slot):
+        rng = random.Random(slot)
+        for _ in range(sales):
+            cart = [{'id': rng.randint(1, products), 'price': 100.0, 'quantity': 1}]
+            started = time.perf_counter()
+            sale = db.checkout(cart, user_id=1, payment_method='Cash', tax_rate=16.0)
+            details = f"{sale['transaction_id']}: KES {sale['total']:,.2f}" if sale['success'] else sale['error']
+            if mode == 'sync':
+                db.execute_many("""
+                    INSERT INTO audit_log (created_at, event, category, status, user_id, username, details)
+                    VALUES (datetime('now'), 'Sale', 'activity', 'SUCCESS', 1, 'bench', ?)
+                """, [(details,)])
+            elif mode == 'queued':
+                audit_log.record('Sale', user_id=1, username='bench', details=details)
+            latencies[slot].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=till, args=(i,)) for i in range(tills)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    batches = None
+    if audit_log is not None:
+        audit_log.close()
+        batches = audit_log.batches
+    samples = sorted(x for per_till in latencies for x in per_till)
+    return statistics.median(samples) * 1000, samples[int(len(samples) * 0.99)] * 1000, batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tills", type=int, default=4)
+    parser.add_argument("--sales", type=int, default=500, help="sales per till per mode")
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--db", default="bench_audit.db")
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    db = Database(args.db, pool_size=args.tills + 1)
+    db.execute_query("DELETE FROM products")
+    db.execute_many(
+        "INSERT INTO products (id, name, category, price, stock_quantity) VALUES (?, ?, 'Food', ?, ?)",
+        [(i, f"Item {i}", 100.0 + i, 1_000_000) for i in range(1, args.products + 1)]
+    )
+
+    print(f"\n{'audit':<8} {'median ms':>10} {'p99 ms':>8} {'entries/commit':>15}")
+    for mode in MODES:
+        before = db.execute_query("SELECT COUNT(*) AS n FROM audit_log")[0]['n']
+        median_ms, p99_ms, batches = run(db, mode, args.tills, args.sales, args.products)
+        logged = db.execute_query("SELECT COUNT(*) AS n FROM audit_log")[0]['n'] - before
+        per_commit = "-" if mode == 'none' else f"{logged / (batches or logged):.1f}"
+        print(f"{mode:<8} {median_ms:>10.2f} {p99_ms:>8.2f} {per_commit:>15}")
+        if mode != 'none' and logged != args.tills * args.sales:
+            print(f"expected {args.tills * args.sales:,} entries, found {logged:,}")
+            sys.exit(1)
+
+    db.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+
+if __name__ == "__main__":
+    main()
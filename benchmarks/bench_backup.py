@@ -0,0 +1,102 @@
+"""Checkout latency while a backup runs: one-step copy versus stepped background backup
+
+Usage: python benchmarks/bench_backup.py [--sales 1000000] [--db bench_backup.db]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from backups import BackupManager
+from bench_indexes import populate_file
+from database import Database, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP
+
+
+def legacy_backup(db, path):
+    """The single-step backup over a pooled connection used before"""
+    with db.connection() as source:
+        backup_conn = sqlite3.connect(path)
+        source.backup(backup_conn)
+        backup_conn.close()
+
+
+def checkout_latencies(db, products, stop, interval):
+    """Ring up one-line sales until stop is set; returns latencies in ms"""
+    latencies = []
+    i = 0
+    while not stop.is_set():
+        product = products[i % len(products)]
+        started = time.perf_counter()
+        db.checkout([dict(product, quantity=1)], user_id=1, payment_method='Cash')
+        latencies.append((time.perf_counter() - started) * 1000)
+        i += 1
+        time.sleep(interval)
+    return latencies
+
+
+def run(db, products, label, backup, interval):
+    stop = threading.Event()
+    result = {}
+    writer = threading.Thread(target=lambda: result.update(
+        latencies=checkout_latencies(db, products, stop, interval)))
+    writer.start()
+    time.sleep(0.5)
+    started = time.perf_counter()
+    backup()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    writer.join()
+    latencies = np.array(result['latencies'])
+    print(f"{label:<28} {elapsed:>9.2f} {len(latencies):>9} {np.percentile(latencies, 50):>9.2f} "
+          f"{np.percentile(latencies, 99):>9.2f} {latencies.max():>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--db", default="bench_backup.db")
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between checkouts")
+    parser.add_argument("--pages", type=int, default=BACKUP_PAGES_PER_STEP, help="pages per backup step")
+    parser.add_argument("--sleep", type=float, default=BACKUP_STEP_SLEEP, help="seconds between steps")
+    args = parser.parse_args()
+
+    populate_file(args.db, args.sales)
+    db = Database(args.db)
+    with db.connection() as conn:
+        conn.execute("UPDATE products SET stock_quantity = 1000000")
+        conn.commit()
+    products = db.get_products()[:50]
+    backup_path = args.db + ".backup"
+    manager = BackupManager(db, pages=args.pages, sleep=args.sleep)
+    db.update_settings({'backup_dir': os.path.dirname(os.path.abspath(args.db)), 'backup_retention': 1})
+
+    print(f"{os.path.getsize(args.db) / 1e6:,.0f} MB database, checkout every {args.interval * 1000:.0f} ms\n")
+    print(f"{'backup':<28} {'seconds':>9} {'sales':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    run(db, products, "none (baseline)", lambda: time.sleep(3), args.interval)
+    run(db, products, "one step, pooled conn", lambda: legacy_backup(db, backup_path), args.interval)
+
+    def stepped():
+        manager.start_backup()
+        manager.stop()
+    run(db, products, "stepped, background", stepped, args.interval)
+    last = manager.history(1)[0]
+    print(f"\nlast backup: {last['status']}, {last['duration_ms']:.0f} ms, "
+          f"{last['size_bytes'] / 1e6:,.0f} MB, {last['pages']:,} pages")
+
+    for row in manager.history():
+        if row['path'] and os.path.exists(row['path']):
+            os.remove(row['path'])
+    db.close()
+    for path in (args.db, backup_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Per-statement execute_query inserts versus batched execute_many / transaction()
+
+Usage: python benchmarks/bench_bulk_insert.py [--rows 100000] [--db bench_bulk.db]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from database import Database
+
+INSERT_LOG = """
+    INSERT INTO inventory_log (product_id, action, quantity_change, new_quantity, user_id, notes)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def make_rows(n):
+    return [(i % 500 + 1, 'restock', 5, 100 + i % 50, 1, f"Import batch row {i}") for i in range(n)]
+
+
+def timed(label, rows, func):
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {elapsed:8.2f}s {len(rows) / elapsed:12,.0f} rows/s  {result}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--db", default="bench_bulk.db")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    db = Database(args.db)
+    rows = make_rows(args.rows)
+
+    def per_statement():
+        for row in rows:
+            db.execute_query(INSERT_LOG, row)
+        return "one commit per row"
+
+    def in_transaction():
+        with db.transaction() as tx:
+            for row in rows:
+                tx.execute(INSERT_LOG, row)
+        return {'rowcount': tx.rowcount, 'lastrowid': tx.lastrowid}
+
+    baseline = timed("execute_query (per row commit)", rows, per_statement)
+    batched = timed("execute_many (single commit)", rows, lambda: db.execute_many(INSERT_LOG, rows))
+    timed("transaction() + execute", rows, in_transaction)
+    print(f"execute_many speedup: {baseline / batched:.0f}x")
+
+    db.close()
+    os.remove(args.db)
+
+
+if __name__ == "__main__":
+    main()
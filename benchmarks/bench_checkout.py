@@ -0,0 +1,87 @@
+"""Concurrent checkout load test: many tills selling from a small, scarce catalog
+
+Verifies that no product is oversold and that every unit of stock removed is
+matched by sales and inventory_log rows, then reports sales per second.
+
+Usage: python benchmarks/bench_checkout.py [--tills 8] [--seconds 5] [--products 20]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from database import Database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tills", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--stock", type=int, default=10000)
+    parser.add_argument("--db", default="bench_checkout.db")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    db = Database(args.db, pool_size=args.tills)
+    db.execute_query("DELETE FROM products")
+    db.execute_many(
+        "INSERT INTO products (id, name, category, price, stock_quantity) VALUES (?, ?, 'Food', ?, ?)",
+        [(i, f"Item {i}", 100.0 + i, args.stock) for i in range(1, args.products + 1)]
+    )
+    initial_stock = args.products * args.stock
+
+    stop = threading.Event()
+    completed = [0] * args.tills
+    out_of_stock = [0] * args.tills
+    failed = [0] * args.tills
+
+    def till(slot):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            cart = [{'id': rng.randint(1, args.products), 'price': 100.0, 'quantity': rng.randint(1, 4)}
+                    for _ in range(rng.randint(1, 3))]
+            result = db.checkout(cart, user_id=1, payment_method='Cash', tax_rate=16.0)
+            if result['success']:
+                completed[slot] += 1
+            elif result['error'].startswith("Insufficient stock"):
+                out_of_stock[slot] += 1
+            else:
+                failed[slot] += 1
+
+    threads = [threading.Thread(target=till, args=(i,)) for i in range(args.tills)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    remaining = db.execute_query("SELECT SUM(stock_quantity) AS s, MIN(stock_quantity) AS m FROM products")[0]
+    sold = db.execute_query("SELECT COALESCE(SUM(quantity), 0) AS q, COUNT(DISTINCT transaction_id) AS t FROM sales")[0]
+    logged = db.execute_query("SELECT COALESCE(-SUM(quantity_change), 0) AS q FROM inventory_log WHERE action = 'sale'")[0]
+
+    print(f"tills={args.tills} seconds={elapsed:.1f}")
+    print(f"completed sales: {sum(completed):,} ({sum(completed) / elapsed:,.0f} sales/s)")
+    print(f"rejected for insufficient stock: {sum(out_of_stock):,}  other failures: {sum(failed):,}")
+    print(f"units sold: {sold['q']:,}  logged: {logged['q']:,}  stock removed: {initial_stock - remaining['s']:,}")
+    print(f"minimum remaining stock: {remaining['m']}")
+
+    consistent = (sold['q'] == logged['q'] == initial_stock - remaining['s']
+                  and sold['t'] == sum(completed) and remaining['m'] >= 0)
+    print("consistency check:", "OK" if consistent else "FAILED")
+
+    db.close()
+    os.remove(args.db)
+    sys.exit(0 if consistent else 1)
+
+
+if __name__ == "__main__":
+    main()
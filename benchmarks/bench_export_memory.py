@@ -0,0 +1,85 @@
+"""Peak RSS of streamed CSV/Excel exports versus execute_query + DataFrame as sales grows
+
+Each measurement runs in a fresh child process so ru_maxrss is per export.
+
+Usage: python benchmarks/bench_export_memory.py [--sizes 100000,300000,1000000]
+       python benchmarks/bench_export_memory.py --modes excel_frame,excel_stream
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def child(db_path, mode):
+    """Run one export and print elapsed seconds and peak RSS in MB"""
+    import pandas as pd
+    from database import Database
+
+    db = Database(db_path)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    out = f"{db_path}.{mode}.csv"
+    if mode == "fetchall":
+        pd.DataFrame(db.execute_query("SELECT * FROM sales")).to_csv(out, index=False)
+    elif mode == "gzip":
+        out += ".gz"
+        db.export_to_csv("sales", out, columns=["transaction_id", "sale_date", "product_id",
+                                               "quantity", "total_price"])
+    elif mode == "excel_frame":
+        # The Reports page's former pd.ExcelWriter path
+        out = f"{db_path}.{mode}.xlsx"
+        with pd.ExcelWriter(out, engine='openpyxl') as writer:
+            pd.DataFrame(db.execute_query("SELECT * FROM sales")).to_excel(writer, index=False, sheet_name='Sales')
+    elif mode == "excel_stream":
+        out = f"{db_path}.{mode}.xlsx"
+        db.export_to_excel("sales", out, summary_sheets={
+            'Summary': db.sales_rollup(), 'Categories': db.sales_rollup('category')})
+    else:
+        db.export_to_csv("sales", out)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    size_mb = os.path.getsize(out) / 1024 / 1024
+    os.remove(out)
+    print(f"{elapsed:.3f} {(peak_kb - baseline_kb) / 1024:.1f} {size_mb:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100000,300000,1000000")
+    parser.add_argument("--db", default="bench_export.db")
+    parser.add_argument("--modes", default="fetchall,stream,gzip",
+                        help="subset of fetchall, stream, gzip, excel_frame, excel_stream")
+    parser.add_argument("--child", nargs=2, metavar=("DB", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    from bench_indexes import populate_file
+
+    modes = args.modes.split(",")
+    print(f"{'rows':>10}" + "".join(f" {mode + ' s':>11} {mode + ' RSS MB':>15} {'file MB':>8}" for mode in modes))
+    for size in [int(n) for n in args.sizes.split(",")]:
+        populate_file(args.db, size)
+
+        row = f"{size:>10}"
+        for mode in modes:
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", args.db, mode],
+                capture_output=True, text=True, check=True
+            ).stdout.split()
+            elapsed, peak, file_size = output[-3:]
+            row += f" {elapsed:>11} {peak:>15} {file_size:>8}"
+        print(row)
+    os.remove(args.db)
+
+
+if __name__ == "__main__":
+    main()
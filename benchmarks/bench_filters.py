@@ -0,0 +1,104 @@
+"""Inventory filter timings: SQL with indexes versus filtering the cached catalog
+
+Usage: python benchmarks/bench_filters.py [--products 100000] [--db bench_filters.db]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from database import Database, build_product_query, CRITICAL_STOCK_RATIO
+
+CATEGORIES = ['Beverages', 'Food', 'Dessert', 'Snacks', 'Other']
+
+CASES = {
+    "low stock": dict(view_mode="Low Stock"),
+    "critical stock by price": dict(view_mode="Critical Stock", sort_by='price', descending=True),
+    "price band": dict(price_range=(100.0, 120.0), sort_by='price'),
+    "category + stock band": dict(categories=['Dessert'], stock_range=(0, 5)),
+    "name search": dict(search="widget 12"),
+}
+
+
+def populate(conn, n_products, seed=42):
+    """Bulk load synthetic products with a small low-stock tail"""
+    rng = np.random.default_rng(seed)
+    stock = rng.integers(10, 500, n_products)
+    stock[rng.random(n_products) < 0.02] = rng.integers(0, 10)
+    conn.executemany(
+        "INSERT INTO products (name, category, price, stock_quantity, min_stock_level) VALUES (?, ?, ?, ?, 10)",
+        ((f"Widget {i}", CATEGORIES[i % len(CATEGORIES)], float(rng.integers(50, 1000)), int(stock[i]))
+         for i in range(n_products))
+    )
+    conn.commit()
+
+
+def python_filter(products, filters):
+    """The list-comprehension filtering the Inventory page used to do"""
+    rows = products
+    view_mode = filters.get('view_mode')
+    if view_mode == "Low Stock":
+        rows = [p for p in rows if p['stock_quantity'] < p['min_stock_level']]
+    elif view_mode == "Critical Stock":
+        rows = [p for p in rows if p['stock_quantity'] < p['min_stock_level'] * CRITICAL_STOCK_RATIO]
+    if filters.get('search'):
+        term = filters['search'].lower()
+        rows = [p for p in rows if term in p['name'].lower()]
+    if filters.get('categories'):
+        rows = [p for p in rows if p['category'] in filters['categories']]
+    if filters.get('price_range'):
+        low, high = filters['price_range']
+        rows = [p for p in rows if low <= p['price'] <= high]
+    if filters.get('stock_range'):
+        low, high = filters['stock_range']
+        rows = [p for p in rows if low <= p['stock_quantity'] <= high]
+    key = filters.get('sort_by', 'name')
+    return sorted(rows, key=lambda p: p[key], reverse=filters.get('descending', False))[:500]
+
+
+def best_of(repeat, func):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--db", default="bench_filters.db")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+
+    db = Database(args.db)
+    with db.connection() as conn:
+        populate(conn, args.products)
+        conn.execute("ANALYZE")
+    products = db.get_products()
+    print(f"{len(products):,} products\n")
+
+    for name, filters in CASES.items():
+        sql, params = build_product_query(**filters)
+        with db.connection() as conn:
+            plan = "; ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        t_sql = best_of(args.repeat, lambda: db.filter_products(**filters))
+        t_python = best_of(args.repeat, lambda: python_filter(products, filters))
+        print(f"{name}")
+        print(f"  python: {t_python * 1000:8.2f} ms")
+        print(f"  sql:    {t_sql * 1000:8.2f} ms  {plan}")
+
+    db.close()
+    os.remove(args.db)
+
+
+if __name__ == "__main__":
+    main()
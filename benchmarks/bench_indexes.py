@@ -0,0 +1,178 @@
+"""Query plans and timings for the hot-path indexes before and after migration
+
+Usage: python benchmarks/bench_indexes.py [--sales 1000000] [--db bench_indexes.db]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from database import Database, SCHEMA_MIGRATIONS
+
+CATEGORIES = ['Beverages', 'Food', 'Dessert', 'Snacks', 'Other']
+PAYMENT_METHODS = ['Cash', 'Credit Card', 'M-Pesa', 'Debit Card', 'Bank Transfer']
+HOT_PATH_MIGRATION = 1
+
+QUERIES = {
+    "sales for one day": (
+        "SELECT SUM(total_price) FROM sales WHERE sale_date >= ? AND sale_date < ?",
+        ('2024-06-01', '2024-06-02'),
+    ),
+    "product sales in a month": (
+        "SELECT SUM(quantity) FROM sales WHERE product_id = ? AND sale_date >= ? AND sale_date < ?",
+        (42, '2024-06-01', '2024-07-01'),
+    ),
+    "sales by cashier": (
+        "SELECT COUNT(*) FROM sales WHERE user_id = ?",
+        (7,),
+    ),
+    "product stock history": (
+        "SELECT * FROM inventory_log WHERE product_id = ? ORDER BY created_at DESC LIMIT 50",
+        (42,),
+    ),
+    "products in category": (
+        "SELECT id, name, price FROM products WHERE category = ?",
+        ('Dessert',),
+    ),
+}
+
+
+def populate(conn, n_sales, n_products=2000, n_users=20, seed=42):
+    """Bulk load synthetic products, sales and inventory_log rows"""
+    rng = np.random.default_rng(seed)
+    conn.executemany(
+        "INSERT INTO products (name, category, price, stock_quantity, min_stock_level) VALUES (?, ?, ?, ?, ?)",
+        [(f"Product {i}", CATEGORIES[i % len(CATEGORIES)], float(rng.integers(50, 1000)),
+          int(rng.integers(0, 200)), 10) for i in range(n_products)]
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, 'clerk')",
+        [(f"clerk{i}", 'x') for i in range(n_users)]
+    )
+
+    start = np.datetime64('2024-01-01T00:00:00')
+    seconds = rng.integers(0, 365 * 86400, n_sales)
+    dates = np.datetime_as_string(start + seconds.astype('timedelta64[s]'), unit='s')
+    product_ids = rng.integers(1, n_products + 1, n_sales)
+    quantities = rng.integers(1, 6, n_sales)
+    prices = rng.integers(50, 1000, n_sales).astype(float)
+    user_ids = rng.integers(1, n_users + 1, n_sales)
+    methods = rng.integers(0, len(PAYMENT_METHODS), n_sales)
+
+    conn.executemany(
+        """INSERT INTO sales (transaction_id, product_id, quantity, unit_price, total_price,
+                              tax_amount, payment_method, user_id, sale_date)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        ((f"TXN{i:09d}", int(product_ids[i]), int(quantities[i]), prices[i],
+          prices[i] * quantities[i], prices[i] * quantities[i] * 0.16,
+          PAYMENT_METHODS[methods[i]], int(user_ids[i]), dates[i].replace('T', ' '))
+         for i in range(n_sales))
+    )
+    conn.executemany(
+        """INSERT INTO inventory_log (product_id, action, quantity_change, new_quantity, user_id, created_at)
+           VALUES (?, 'sale', ?, 0, ?, ?)""",
+        ((int(product_ids[i]), -int(quantities[i]), int(user_ids[i]), dates[i].replace('T', ' '))
+         for i in range(n_sales))
+    )
+    conn.commit()
+
+
+def populate_file(db_path, n_sales):
+    """Create db_path with n_sales rows in a separate process
+    
+    Memory benchmarks call this so the loader's footprint is not inherited
+    by their measuring child processes (ru_maxrss survives fork + exec).
+    """
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    subprocess.run([sys.executable, __file__, "--populate-only", "--db", db_path,
+                    "--sales", str(n_sales)], check=True, capture_output=True)
+
+
+def run_queries(conn, repeat):
+    """Return {name: (plan, best seconds)} for every benchmark query"""
+    results = {}
+    for name, (sql, params) in QUERIES.items():
+        plan = "; ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            best = min(best, time.perf_counter() - started)
+        results[name] = (plan, best)
+    return results
+
+
+def hot_path_indexes():
+    """CREATE INDEX statements of the hot-path migration (version 1)"""
+    statements = next(steps for version, _, steps in SCHEMA_MIGRATIONS if version == HOT_PATH_MIGRATION)
+    return [s for s in statements if isinstance(s, str) and s.startswith("CREATE INDEX IF NOT EXISTS ")]
+
+
+def drop_migration_indexes(conn):
+    """Remove the hot-path indexes, leaving later migrations applied"""
+    for statement in hot_path_indexes():
+        conn.execute(f"DROP INDEX IF EXISTS {statement.split()[5]}")
+    conn.commit()
+
+
+def create_migration_indexes(conn):
+    """Re-create the hot-path indexes dropped by drop_migration_indexes"""
+    for statement in hot_path_indexes():
+        conn.execute(statement)
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--db", default="bench_indexes.db")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--populate-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+
+    db = Database(args.db)
+    if args.populate_only:
+        with db.connection() as conn:
+            populate(conn, args.sales)
+        db.close()
+        return
+
+    print(f"Loading {args.sales:,} sales rows...")
+    started = time.perf_counter()
+    with db.connection() as conn:
+        populate(conn, args.sales)
+        print(f"Loaded in {time.perf_counter() - started:.1f}s")
+
+        drop_migration_indexes(conn)
+        conn.execute("ANALYZE")
+        before = run_queries(conn, args.repeat)
+
+        started = time.perf_counter()
+        create_migration_indexes(conn)
+        print(f"Indexes from migration {HOT_PATH_MIGRATION} created in {time.perf_counter() - started:.1f}s")
+        conn.execute("ANALYZE")
+        after = run_queries(conn, args.repeat)
+
+    for name in QUERIES:
+        plan_before, t_before = before[name]
+        plan_after, t_after = after[name]
+        print(f"\n{name}")
+        print(f"  before: {t_before * 1000:9.2f} ms  {plan_before}")
+        print(f"  after:  {t_after * 1000:9.2f} ms  {plan_after}")
+        print(f"  speedup: {t_before / max(t_after, 1e-9):.0f}x")
+
+    db.close()
+    os.remove(args.db)
+
+
+if __name__ == "__main__":
+    main()
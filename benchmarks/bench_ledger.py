@@ -0,0 +1,80 @@
+"""Point-in-time stock: scanning inventory_log versus checkpoints plus the log tail
+
+Usage: python benchmarks/bench_ledger.py [--sales 1000000] [--products 10000] [--db bench_ledger.db]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from database import Database
+from ledger import InventoryLedger
+from seed_data import seed
+
+POINTS = ['2024-02-01 12:00:00', '2024-07-01 12:00:00', '2024-12-20 12:00:00']
+
+
+def log_scan_stock(db, at):
+    """Every product's latest movement up to at, found by reading the log from the start"""
+    rows = db.execute_query("""
+        SELECT product_id, new_quantity FROM inventory_log WHERE id IN (
+            SELECT MAX(id) FROM inventory_log WHERE created_at <= ? GROUP BY product_id)
+    """, (at,)) or []
+    return {row['product_id']: row['new_quantity'] for row in rows}
+
+
+def best_of(repeat, func):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--db", default="bench_ledger.db")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    db = Database(args.db)
+    seed(db, n_products=args.products, n_sales=args.sales, days=365, start='2024-01-01')
+    ledger = InventoryLedger(db)
+    log_rows = db.execute_query("SELECT COUNT(*) AS n FROM inventory_log")[0]['n']
+
+    started = time.perf_counter()
+    checkpoints = ledger.backfill()
+    print(f"\n{log_rows:,} movements; backfilled {checkpoints} daily checkpoints "
+          f"in {time.perf_counter() - started:.1f}s\n")
+
+    print(f"{'query':<40} {'log scan ms':>12} {'ledger ms':>10}")
+    for at in POINTS:
+        scanned, reconstructed = log_scan_stock(db, at), ledger.stock_at(at)
+        assert all(reconstructed[product_id] == stock for product_id, stock in scanned.items())
+        print(f"{'all products at ' + at:<40} {best_of(args.repeat, lambda: log_scan_stock(db, at)):>12.1f} "
+              f"{best_of(args.repeat, lambda: ledger.stock_at(at)):>10.1f}")
+
+    busiest = db.execute_query("""
+        SELECT product_id, COUNT(*) AS n FROM inventory_log GROUP BY product_id ORDER BY n DESC LIMIT 1
+    """)[0]
+    history_ms = best_of(args.repeat, lambda: ledger.stock_history(
+        busiest['product_id'], '2024-01-01 00:00:00', '2025-01-01 00:00:00'))
+    print(f"\nyear of history for the busiest product ({busiest['n']:,} movements): {history_ms:.1f} ms")
+    print(f"catalog totals at every checkpoint: {best_of(args.repeat, ledger.totals):.1f} ms")
+
+    db.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Reader throughput through the connection pool as reader threads are added
+
+Usage: python benchmarks/bench_pool.py [--sales 200000] [--seconds 3] [--threads 1,2,4,8]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from database import Database
+from bench_indexes import populate
+
+# A report-sized read: long enough that time is spent inside SQLite,
+# which releases the GIL, rather than in Python
+READ_QUERY = """
+    SELECT payment_method, COUNT(*), SUM(total_price) FROM sales
+    WHERE sale_date >= ? AND sale_date < date(?, '+7 days')
+    GROUP BY payment_method
+"""
+
+
+def run_readers(db, n_threads, seconds, with_writer):
+    """Return completed reads per second for n_threads concurrent readers"""
+    stop = threading.Event()
+    counts = [0] * n_threads
+    errors = []
+
+    def reader(slot):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            try:
+                with db.connection() as conn:
+                    day = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 21):02d}"
+                    conn.execute(READ_QUERY, (day, day)).fetchall()
+                counts[slot] += 1
+            except Exception as e:
+                errors.append(e)
+                return
+
+    def writer():
+        while not stop.is_set():
+            with db.connection() as conn:
+                conn.execute("UPDATE products SET stock_quantity = stock_quantity + 1 WHERE id = ?",
+                             (random.randint(1, 2000),))
+                conn.commit()
+            time.sleep(0.005)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(n_threads)]
+    if with_writer:
+        threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=200_000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--threads", default="1,2,4,8")
+    parser.add_argument("--db", default="bench_pool.db")
+    args = parser.parse_args()
+
+    thread_counts = [int(n) for n in args.threads.split(",")]
+    if os.path.exists(args.db):
+        os.remove(args.db)
+
+    db = Database(args.db, pool_size=max(thread_counts) + 1)
+    with db.connection() as conn:
+        populate(conn, args.sales)
+
+    print(f"{'readers':>8} {'reads/s':>10} {'reads/s (+writer)':>18}")
+    for n in thread_counts:
+        plain = run_readers(db, n, args.seconds, with_writer=False)
+        mixed = run_readers(db, n, args.seconds, with_writer=True)
+        print(f"{n:>8} {plain:>10.0f} {mixed:>18.0f}")
+    print(f"Pool: {db.pool.stats()}")
+
+    db.close()
+    os.remove(args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Report DataFrame construction: execute_query + pd.DataFrame versus query_df
+
+Each path runs in a fresh child process so peak RSS is measured per build.
+
+Usage: python benchmarks/bench_query_df.py [--sales 1000000]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+REPORT_QUERY = """
+    SELECT s.sale_date AS date, p.name AS product, p.category, s.quantity,
+           s.unit_price AS price, s.total_price AS total, s.payment_method
+    FROM sales s JOIN products p ON p.id = s.product_id
+"""
+REPORT_DTYPES = {
+    'date': 'datetime64[ns]', 'product': 'category', 'category': 'category',
+    'quantity': 'int64', 'price': 'float64', 'total': 'float64',
+    'payment_method': 'category',
+}
+
+
+def child(db_path, mode):
+    """Build the report frame once and print seconds, peak MB and frame MB"""
+    import pandas as pd
+    from database import Database
+
+    db = Database(db_path)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if mode == "dicts":
+        df = pd.DataFrame(db.execute_query(REPORT_QUERY))
+        df['date'] = pd.to_datetime(df['date'])
+    else:
+        df = db.query_df(REPORT_QUERY, dtypes=REPORT_DTYPES)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    frame_mb = df.memory_usage(deep=True).sum() / 2**20
+    print(f"{elapsed:.2f} {(peak_kb - baseline_kb) / 1024:.0f} {frame_mb:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--db", default="bench_query_df.db")
+    parser.add_argument("--child", nargs=2, metavar=("DB", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    from bench_indexes import populate_file
+
+    populate_file(args.db, args.sales)
+
+    print(f"{args.sales:,} sale rows")
+    print(f"{'path':<34} {'seconds':>8} {'peak MB':>8} {'frame MB':>9}")
+    for mode, label in (("dicts", "execute_query + pd.DataFrame"), ("columnar", "query_df (typed, categorical)")):
+        seconds, peak, frame = subprocess.run(
+            [sys.executable, __file__, "--child", args.db, mode],
+            capture_output=True, text=True, check=True
+        ).stdout.split()[-3:]
+        print(f"{label:<34} {seconds:>8} {peak:>8} {frame:>9}")
+    os.remove(args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Receipt PDF throughput: legacy canvas rebuild versus the cached template, combined and batch modes
+
+Usage: python benchmarks/bench_receipts.py [--receipts 500] [--lines 5] [--workers 1,2,4]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from receipts import (DEFAULT_PROFILE, get_receipt_template, render_pdf_receipt,
+                      render_receipts_batch, render_receipts_pdf)
+
+
+def legacy_pdf_receipt(receipt_data):
+    """The per-click canvas rebuild with fixed coordinates used before ReceiptTemplate"""
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(200, 750, "SALPHINE CHEMOS GETAWAY RESORT")
+    c.setFont("Helvetica", 10)
+    c.drawString(150, 730, "P.O. Box 19938 - 00202 KNH Nairobi")
+    c.drawString(180, 715, "Tel: +254 727 680 468 | +254 736 880 488")
+    c.drawString(200, 700, "Email: info@lukenyagetaway.com")
+    c.line(50, 690, 550, 690)
+    y_position = 670
+    c.drawString(50, y_position, f"Transaction ID: {receipt_data['transaction_id']}")
+    c.drawString(50, y_position-20, f"Date: {receipt_data['date']}")
+    c.drawString(50, y_position-40, f"Customer: {receipt_data['customer_name']}")
+    c.drawString(50, y_position-60, f"Cashier: {receipt_data['user']}")
+    c.line(50, y_position-80, 550, y_position-80)
+    y_position -= 100
+    c.drawString(50, y_position, "Item")
+    c.drawString(350, y_position, "Qty")
+    c.drawString(400, y_position, "Price")
+    c.drawString(500, y_position, "Total")
+    y_position -= 20
+    for item in receipt_data['items']:
+        c.drawString(50, y_position, item['name'][:40])
+        c.drawString(350, y_position, str(item['quantity']))
+        c.drawString(400, y_position, f"KES {item['price']:,.2f}")
+        c.drawString(500, y_position, f"KES {item['total']:,.2f}")
+        y_position -= 20
+    c.line(50, y_position, 550, y_position)
+    y_position -= 20
+    c.drawString(400, y_position, f"Subtotal: KES {receipt_data['subtotal']:,.2f}")
+    y_position -= 20
+    c.drawString(400, y_position, f"Tax ({receipt_data['tax_rate']}%): KES {receipt_data['tax_amount']:,.2f}")
+    y_position -= 20
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(400, y_position, f"TOTAL: KES {receipt_data['total']:,.2f}")
+    y_position -= 40
+    c.setFont("Helvetica", 10)
+    c.drawString(50, y_position, f"Payment Method: {receipt_data['payment_method']}")
+    y_position -= 40
+    c.drawString(200, y_position, "Thank you for your business!")
+    c.drawString(200, y_position-20, "Visit us: www.salphinechemos.com")
+    c.save()
+    return buffer.getvalue()
+
+
+def make_receipts(n, lines, seed=42):
+    rng = random.Random(seed)
+    receipts = []
+    for i in range(n):
+        items = []
+        for _ in range(rng.randint(1, lines * 2 - 1)):
+            price = float(rng.randint(50, 2000))
+            quantity = rng.randint(1, 5)
+            items.append({'name': f"Product {rng.randint(1, 5000):05d}", 'quantity': quantity,
+                          'price': price, 'total': price * quantity})
+        subtotal = sum(item['total'] for item in items)
+        receipts.append({
+            'transaction_id': f"TXN20240101{i:08d}", 'date': '2024-01-01 12:00:00',
+            'customer_name': 'Walk-in Customer', 'user': 'admin', 'items': items,
+            'subtotal': subtotal, 'tax_rate': 16.0, 'tax_amount': subtotal * 0.16,
+            'total': subtotal * 1.16, 'payment_method': rng.choice(['Cash', 'M-Pesa', 'Card']),
+        })
+    return receipts
+
+
+def timed(label, receipts, func):
+    started = time.perf_counter()
+    output = func()
+    elapsed = time.perf_counter() - started
+    size = len(output) if isinstance(output, bytes) else sum(len(pdf) for pdf in output)
+    print(f"{label:<36} {elapsed:>9.3f} {len(receipts) / elapsed:>11,.0f} {size / 1e6:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--receipts", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=5, help="average item lines per receipt")
+    parser.add_argument("--workers", default="1,2,4", help="process pool sizes for batch mode")
+    args = parser.parse_args()
+
+    receipts = make_receipts(args.receipts, args.lines)
+    get_receipt_template(DEFAULT_PROFILE)
+    pages = sum(len(get_receipt_template().paginate(r['items'])) for r in receipts)
+    print(f"{len(receipts):,} receipts, {pages:,} pages, {os.cpu_count()} CPUs\n")
+    print(f"{'mode':<36} {'seconds':>9} {'receipts/s':>11} {'MB':>9}")
+    timed("legacy, one canvas per receipt", receipts,
+          lambda: [legacy_pdf_receipt(r) for r in receipts])
+    timed("template, one PDF per receipt", receipts,
+          lambda: [render_pdf_receipt(r) for r in receipts])
+    timed("template, one combined PDF", receipts, lambda: render_receipts_pdf(receipts))
+    for workers in (int(w) for w in args.workers.split(",")):
+        timed(f"batch, {workers} worker process(es)", receipts,
+              lambda: render_receipts_batch(receipts, workers=workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Product search latency: linear substring scan versus the FTS5 index
+
+Usage: python benchmarks/bench_search.py [--products 100000] [--queries 300]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from database import Database
+
+CATEGORIES = ['Beverages', 'Food', 'Dessert', 'Snacks', 'Other']
+WORDS = ['coffee', 'tea', 'juice', 'soda', 'water', 'burger', 'pizza', 'chicken', 'wings', 'cake',
+         'cream', 'chocolate', 'vanilla', 'mango', 'passion', 'ginger', 'lemon', 'crisps', 'nuts',
+         'samosa', 'chapati', 'mandazi', 'sukuma', 'ugali', 'pilau', 'biryani', 'masala', 'chai']
+
+
+def make_vocabulary(rng, size=3000):
+    """Common product words plus generated brand and variant names"""
+    syllables = ['ka', 'mo', 'ri', 'zu', 'ne', 'ta', 'li', 'po', 'sa', 'vi', 'do', 'me', 'chu', 'ba', 'gi']
+    words = set(WORDS)
+    while len(words) < size:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def linear_search(products, term):
+    """The per-keystroke scan the Sales page did before FTS5"""
+    return [p for p in products
+            if term.lower() in p['name'].lower() or term.lower() in p['category'].lower()]
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return (statistics.median(ordered) * 1000, ordered[int(len(ordered) * 0.95) - 1] * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--db", default="bench_search.db")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    db = Database(args.db)
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    db.execute_many(
+        "INSERT INTO products (name, category, price, stock_quantity, description) VALUES (?, ?, ?, ?, ?)",
+        [(f"{rng.choice(vocabulary).title()} {rng.choice(vocabulary).title()} {i}", rng.choice(CATEGORIES),
+          float(rng.randint(50, 2000)), rng.randint(0, 200), f"{rng.choice(vocabulary)} {rng.choice(WORDS)}")
+         for i in range(args.products)]
+    )
+    products = db.get_products()
+
+    # What a cashier types: 2-5 character prefixes, sometimes two words
+    terms = []
+    for _ in range(args.queries):
+        term = rng.choice(vocabulary)[:rng.randint(2, 5)]
+        if rng.random() < 0.3:
+            term += " " + rng.choice(vocabulary)[:3]
+        terms.append(term)
+
+    linear, fts = [], []
+    for term in terms:
+        started = time.perf_counter()
+        linear_search(products, term)
+        linear.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        db.search_products(term)
+        fts.append(time.perf_counter() - started)
+
+    print(f"{args.products:,} products, {len(terms)} queries")
+    print(f"{'method':<24} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, samples in (("linear scan", linear), ("FTS5 (top 100)", fts)):
+        p50, p95 = percentiles(samples)
+        print(f"{label:<24} {p50:>8.2f} {p95:>8.2f}")
+
+    db.close()
+    os.remove(args.db)
+
+
+if __name__ == "__main__":
+    main()
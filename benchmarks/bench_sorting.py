@@ -0,0 +1,83 @@
+"""Legacy recursive quicksort_products versus CatalogSorter on a large catalog
+
+Usage: python benchmarks/bench_sorting.py [--products 50000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sorting import CatalogSorter
+
+CATEGORIES = ['Beverages', 'Food', 'Dessert', 'Snacks', 'Other']
+
+
+def quicksort_products(products, key='name'):
+    """The recursive three-list quicksort app.py used before CatalogSorter"""
+    if len(products) <= 1:
+        return products
+    else:
+        pivot = products[len(products)//2][key]
+        left = [x for x in products if x[key] < pivot]
+        middle = [x for x in products if x[key] == pivot]
+        right = [x for x in products if x[key] > pivot]
+        return quicksort_products(left, key) + middle + quicksort_products(right, key)
+
+
+def make_catalog(n, seed=42):
+    rng = random.Random(seed)
+    return [{'id': i, 'name': f"Product {rng.randint(0, n * 10):07d}",
+             'category': rng.choice(CATEGORIES), 'price': float(rng.randint(50, 2000)),
+             'stock_quantity': rng.randint(0, 200), 'min_stock_level': 10}
+            for i in range(1, n + 1)]
+
+
+def best_of(repeat, func):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.products)
+    subset = [p for p in catalog if p['category'] in ('Food', 'Dessert')]
+    print(f"{args.products:,} products, {len(subset):,} in the filtered subset\n")
+    print(f"{'case':<40} {'quicksort ms':>13} {'cold ms':>9} {'warm ms':>9}")
+
+    cases = [
+        ("name ascending", 'name', [('name', False)], catalog),
+        ("price descending ([::-1] hack)", 'price', [('price', True)], catalog),
+        ("category (few distinct values)", 'category', [('category', False)], catalog),
+        ("price descending, filtered subset", 'price', [('price', True)], subset),
+    ]
+    for label, legacy_key, keys, items in cases:
+        legacy = best_of(args.repeat, lambda: quicksort_products(items, legacy_key))
+
+        def cold():
+            CatalogSorter().sort(catalog, keys, items=items)
+
+        sorter = CatalogSorter()
+        sorter.sort(catalog, keys, items=items)
+        warm = best_of(args.repeat, lambda: sorter.sort(catalog, keys, items=items))
+        print(f"{label:<40} {legacy:>13.1f} {best_of(args.repeat, cold):>9.1f} {warm:>9.1f}")
+
+    sorter = CatalogSorter()
+    keys = [('category', False), ('price', True), ('name', False)]
+    sorter.sort(catalog, keys)
+    warm = best_of(args.repeat, lambda: sorter.sort(catalog, keys))
+    print(f"{'category, price desc, name (multi-key)':<40} {'n/a':>13} {'':>9} {warm:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
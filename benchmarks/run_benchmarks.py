@@ -0,0 +1,249 @@
+"""Benchmark suite for the data layer, sorting, reports and receipt rendering
+
+Builds fixed-seed datasets with seed_data at each scale (cached between
+runs), times every case, writes the results as JSON and compares their
+medians against a stored baseline. Exits with status 1 on a regression.
+
+Usage: python benchmarks/run_benchmarks.py [--scales 1k,100k,1m] [--output bench_results.json]
+       python benchmarks/run_benchmarks.py --save-baseline   # refresh benchmarks/baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+
+import database
+from bench_sorting import quicksort_products
+from database import Database
+from receipts import render_pdf_receipt, render_excel_receipt, render_receipts_pdf
+from seed_data import seed
+from sorting import CatalogSorter
+
+# Sale lines and catalog size per dataset scale
+SCALES = {
+    '1k': (1_000, 100),
+    '100k': (100_000, 2_000),
+    '1m': (1_000_000, 10_000),
+}
+SEED = 42
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+
+def dataset(scale, data_dir, rebuild=False):
+    """Path of the fixed-seed database for scale, generating it if needed"""
+    n_sales, n_products = SCALES[scale]
+    path = os.path.join(data_dir, f"bench_{scale}_seed{SEED}.db")
+    if rebuild or not os.path.exists(path):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        print(f"Generating {scale} dataset ({n_sales:,} sales)...")
+        db = Database(path)
+        seed(db, n_products=n_products, n_sales=n_sales, days=365, seed=SEED)
+        db.close()
+    return path
+
+
+def sample_receipt(products, lines=5):
+    """Receipt data shaped like the one the Sales page builds"""
+    items = [{'name': p['name'], 'quantity': 2, 'price': p['price'], 'total': p['price'] * 2}
+             for p in products[:lines]]
+    subtotal = sum(item['total'] for item in items)
+    return {
+        'transaction_id': 'TXN20240101120000BENCH',
+        'date': '2024-01-01 12:00:00',
+        'customer_name': 'Walk-in Customer',
+        'user': 'admin',
+        'items': items,
+        'subtotal': subtotal,
+        'tax_rate': 16.0,
+        'tax_amount': subtotal * 0.16,
+        'total': subtotal * 1.16,
+        'payment_method': 'Cash',
+    }
+
+
+def report_page(db, start, end):
+    """The queries the Reports page runs for one period"""
+    for group_by in (None, 'product', 'category', 'payment_method', 'date'):
+        db.sales_rollup(group_by, start, end)
+    db.count_transactions(start, end)
+    db.query_df("""
+        SELECT s.sale_date AS date, p.name AS product, p.category, s.quantity,
+               s.unit_price AS price, s.total_price AS total, s.payment_method
+        FROM sales s LEFT JOIN products p ON p.id = s.product_id
+        WHERE s.sale_date >= ? AND s.sale_date < ?
+        ORDER BY s.sale_date DESC
+        LIMIT 5000
+    """, (start, end))
+
+
+def data_cases(db, scratch):
+    """(name, callable) pairs exercising one dataset"""
+    products = db.get_products()
+    warm_sorter = CatalogSorter()
+    csv_path = os.path.join(scratch, "export.csv")
+    parquet_path = os.path.join(scratch, "export.parquet")
+    backup_path = os.path.join(scratch, "backup.db")
+    cases = [
+        ("execute_query/product_by_id",
+         lambda: db.execute_query("SELECT * FROM products WHERE id = ?", (products[0]['id'],))),
+        ("execute_query/sales_one_day",
+         lambda: db.execute_query("SELECT SUM(total_price) FROM sales WHERE sale_date >= ? AND sale_date < ?",
+                                  ('2024-06-01', '2024-06-02'))),
+        ("execute_query/sales_one_week_rows",
+         lambda: db.execute_query("SELECT * FROM sales WHERE sale_date >= ? AND sale_date < ?",
+                                  ('2024-06-01', '2024-06-08'))),
+        ("export_to_csv/sales", lambda: db.export_to_csv('sales', csv_path)),
+        ("backup_database", lambda: db.backup_database(backup_path)),
+        ("sort/quicksort_products_name", lambda: quicksort_products(products, 'name')),
+        ("sort/catalog_sorter_cold", lambda: CatalogSorter().sort(products, [('price', True), ('name', False)])),
+        ("sort/catalog_sorter_warm", lambda: warm_sorter.sort(products, [('price', True), ('name', False)])),
+        ("dashboard/kpi_queries", lambda: db._load_dashboard()),
+        ("dashboard/snapshot_cached", lambda: db.dashboard_snapshot()),
+        ("inventory/stock_alerts", lambda: db.get_stock_alerts()),
+        ("inventory/stock_status_by_category", lambda: db.stock_status_by_category()),
+        ("reports/summary", lambda: db.sales_rollup()),
+        ("reports/by_product", lambda: db.sales_rollup('product')),
+        ("reports/by_category", lambda: db.sales_rollup('category')),
+        ("reports/by_payment_method", lambda: db.sales_rollup('payment_method')),
+        ("reports/daily_trend", lambda: db.sales_rollup('date')),
+        ("reports/page_one_week", lambda: report_page(db, '2024-06-01 00:00:00', '2024-06-08 00:00:00')),
+        ("reports/page_full_year", lambda: report_page(db, '2024-01-01 00:00:00', '2025-01-01 00:00:00')),
+        ("export_to_csv/sales_one_week",
+         lambda: db.export_to_csv('sales', csv_path, start_date='2024-06-01', end_date='2024-06-08')),
+    ]
+    if database.pa is not None:
+        cases.append(("export_to_parquet/sales", lambda: db.export_to_parquet('sales', parquet_path)))
+    return cases
+
+
+def receipt_cases(products):
+    receipt = sample_receipt(products)
+    long_receipt = sample_receipt(products, lines=80)
+    return [
+        ("receipts/pdf", lambda: render_pdf_receipt(receipt)),
+        ("receipts/pdf_multi_page", lambda: render_pdf_receipt(long_receipt)),
+        ("receipts/reprint_100", lambda: render_receipts_pdf([receipt] * 100)),
+        ("receipts/excel", lambda: render_excel_receipt(receipt)),
+    ]
+
+
+def measure(func, repeat):
+    """Run func repeat times after one warm-up call; returns timings in ms"""
+    timings = []
+    # export_to_csv and backup_database report every call on stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'median_ms': round(statistics.median(timings), 4),
+        'min_ms': round(min(timings), 4),
+        'max_ms': round(max(timings), 4),
+        'runs': repeat,
+    }
+
+
+def run_cases(prefix, cases, repeat, results):
+    for name, func in cases:
+        key = f"{prefix}/{name}"
+        results[key] = measure(func, repeat)
+        print(f"  {key:<48} {results[key]['median_ms']:>11.3f} ms")
+
+
+def compare(results, baseline, threshold, min_ms):
+    """Print current versus baseline medians; return the regressed case names"""
+    regressions = []
+    print(f"\n{'case':<48} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            print(f"{key:<48} {'-':>12} {current['median_ms']:>12.3f} {'new':>8}")
+            continue
+        before, after = previous['median_ms'], current['median_ms']
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        # Tiny cases are all noise, so a regression must also cost min_ms
+        if change > threshold and after - before > min_ms:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<48} {before:>12.3f} {after:>12.3f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1k,100k,1m", help=f"comma-separated subset of {', '.join(SCALES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline too")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before flagging, e.g. 0.25")
+    parser.add_argument("--min-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "sales_bench"))
+    parser.add_argument("--rebuild-data", action="store_true", help="regenerate cached datasets")
+    args = parser.parse_args()
+
+    scales = [scale.strip().lower() for scale in args.scales.split(",") if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        for scale in scales:
+            db = Database(dataset(scale, args.data_dir, args.rebuild_data))
+            print(f"\n{scale}: {SCALES[scale][0]:,} sales, {len(db.get_products()):,} products")
+            run_cases(scale, data_cases(db, scratch), args.repeat, results)
+            if scale == scales[0]:
+                run_cases("fixed", receipt_cases(db.get_products()), args.repeat, results)
+            db.close()
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'seed': SEED,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.threshold, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,1292 @@
 import sqlite3
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from contextlib import closing, contextmanager
+import atexit
+import csv
+import gzip
+import itertools
 import json
 import os
+import queue
+import re
+import secrets
+import threading
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Parquet export/import is optional
+    pa = None
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    # Excel export is optional
+    Workbook = None
+
+def _add_missing_columns(table, columns):
+    """Migration step adding columns that older databases were created without"""
+    def step(conn):
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, definition in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+    return step
+
+def _create_product_search(conn):
+    """Migration step building the FTS5 index over products, if FTS5 exists"""
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name, category, description,
+                content='products', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError as err:
+        # search_products falls back to LIKE on builds without FTS5
+        print(f"Full-text search unavailable: {err}")
+        return
+    conn.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products
+        BEGIN
+            INSERT INTO products_fts (rowid, name, category, description)
+            VALUES (NEW.id, NEW.name, NEW.category, NEW.description);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products
+        BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, category, description)
+            VALUES ('delete', OLD.id, OLD.name, OLD.category, OLD.description);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_update
+        AFTER UPDATE OF name, category, description ON products
+        BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, category, description)
+            VALUES ('delete', OLD.id, OLD.name, OLD.category, OLD.description);
+            INSERT INTO products_fts (rowid, name, category, description)
+            VALUES (NEW.id, NEW.name, NEW.category, NEW.description);
+        END
+    """)
+
+def _create_product_changes(conn):
+    """Migration step numbering every products write for the catalog cache
+    
+    product_changes keeps the latest revision per product id, deletes
+    included; revisions only grow, unlike the wall-clock updated_at.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS product_changes (
+            product_id INTEGER PRIMARY KEY,
+            revision INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_product_changes_revision ON product_changes(revision)")
+    for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS product_changes_{event.lower()} AFTER {event} ON products
+            BEGIN
+                INSERT OR REPLACE INTO product_changes (product_id, revision)
+                VALUES ({row}.id, (SELECT COALESCE(MAX(revision), 0) + 1 FROM product_changes));
+            END
+        """)
+
+# Rollup key of one sales row; {row} is NEW or OLD inside the triggers.
+# Key columns are NOT NULL, so missing values fall back to placeholders.
+_ROLLUP_KEY = """
+    COALESCE(date({row}.sale_date), date('now')),
+    COALESCE({row}.product_id, 0),
+    COALESCE((SELECT category FROM products WHERE id = {row}.product_id), 'Uncategorized'),
+    COALESCE({row}.payment_method, 'Unknown')
+"""
+
+def _rollup_add(row):
+    """Trigger statement adding one sales row to its rollup bucket"""
+    return f"""
+        INSERT INTO sales_daily_rollup (sale_day, product_id, category, payment_method,
+                                        quantity, total_sales, tax_amount, line_count)
+        VALUES ({_ROLLUP_KEY.format(row=row)},
+                COALESCE({row}.quantity, 0), COALESCE({row}.total_price, 0),
+                COALESCE({row}.tax_amount, 0), 1)
+        ON CONFLICT (sale_day, product_id, category, payment_method) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            total_sales = total_sales + excluded.total_sales,
+            tax_amount = tax_amount + excluded.tax_amount,
+            line_count = line_count + 1;
+    """
+
+def _rollup_remove(row):
+    """Trigger statements taking one sales row back out of its bucket"""
+    key = _ROLLUP_KEY.format(row=row)
+    return f"""
+        UPDATE sales_daily_rollup SET
+            quantity = quantity - COALESCE({row}.quantity, 0),
+            total_sales = total_sales - COALESCE({row}.total_price, 0),
+            tax_amount = tax_amount - COALESCE({row}.tax_amount, 0),
+            line_count = line_count - 1
+        WHERE (sale_day, product_id, category, payment_method) = ({key});
+        DELETE FROM sales_daily_rollup
+        WHERE (sale_day, product_id, category, payment_method) = ({key}) AND line_count <= 0;
+    """
+
+def rebuild_sales_rollup(conn):
+    """Recompute sales_daily_rollup from scratch, e.g. after a bulk load"""
+    conn.execute("DELETE FROM sales_daily_rollup")
+    conn.execute("""
+        INSERT INTO sales_daily_rollup (sale_day, product_id, category, payment_method,
+                                        quantity, total_sales, tax_amount, line_count)
+        SELECT COALESCE(date(s.sale_date), date('now')), COALESCE(s.product_id, 0),
+               COALESCE(p.category, 'Uncategorized'), COALESCE(s.payment_method, 'Unknown'),
+               SUM(COALESCE(s.quantity, 0)), SUM(COALESCE(s.total_price, 0)),
+               SUM(COALESCE(s.tax_amount, 0)), COUNT(*)
+        FROM sales s LEFT JOIN products p ON p.id = s.product_id
+        GROUP BY 1, 2, 3, 4
+    """)
+
+def _create_sales_rollup(conn):
+    """Migration step building sales_daily_rollup and the triggers feeding it"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sales_daily_rollup (
+            sale_day TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            payment_method TEXT NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            total_sales REAL NOT NULL DEFAULT 0,
+            tax_amount REAL NOT NULL DEFAULT 0,
+            line_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (sale_day, product_id, category, payment_method)
+        ) WITHOUT ROWID
+    """)
+    rebuild_sales_rollup(conn)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS sales_rollup_insert AFTER INSERT ON sales
+        BEGIN
+            {_rollup_add('NEW')}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS sales_rollup_delete AFTER DELETE ON sales
+        BEGIN
+            {_rollup_remove('OLD')}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS sales_rollup_update
+        AFTER UPDATE OF sale_date, product_id, quantity, total_price, tax_amount, payment_method ON sales
+        BEGIN
+            {_rollup_remove('OLD')}
+            {_rollup_add('NEW')}
+        END
+    """)
+    # Buckets follow the product's current category, so every bucket of a
+    # product shares one category and the delete trigger can find it again
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS sales_rollup_recategorize
+        AFTER UPDATE OF category ON products
+        WHEN OLD.category IS NOT NEW.category
+        BEGIN
+            UPDATE sales_daily_rollup SET category = COALESCE(NEW.category, 'Uncategorized')
+            WHERE product_id = NEW.id;
+        END
+    """)
+
+# Day one sales row counts toward in sales_daily_transactions
+_TRANSACTION_DAY = "COALESCE(date({row}.sale_date), date('now'))"
+
+def _transactions_add(row):
+    """Trigger statement counting a row's transaction on its day, unless
+    another line of that transaction already counts it there"""
+    day = _TRANSACTION_DAY.format(row=row)
+    return f"""
+        INSERT INTO sales_daily_transactions (sale_day, transactions)
+        SELECT {day}, 1
+        WHERE {row}.transaction_id IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM sales WHERE transaction_id = {row}.transaction_id
+              AND id <> {row}.id AND date(sale_date) IS date({row}.sale_date))
+        ON CONFLICT (sale_day) DO UPDATE SET transactions = transactions + 1;
+    """
+
+def _transactions_remove(row):
+    """Trigger statements uncounting a row's transaction once its last line
+    on that day is gone"""
+    day = _TRANSACTION_DAY.format(row=row)
+    return f"""
+        UPDATE sales_daily_transactions SET transactions = transactions - 1
+        WHERE sale_day = {day} AND {row}.transaction_id IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM sales WHERE transaction_id = {row}.transaction_id
+              AND date(sale_date) IS date({row}.sale_date));
+        DELETE FROM sales_daily_transactions WHERE sale_day = {day} AND transactions <= 0;
+    """
+
+def rebuild_sales_transactions(conn):
+    """Recompute sales_daily_transactions from scratch"""
+    conn.execute("DELETE FROM sales_daily_transactions")
+    conn.execute(f"""
+        INSERT INTO sales_daily_transactions (sale_day, transactions)
+        SELECT sale_day, COUNT(*) FROM (
+            SELECT DISTINCT {_TRANSACTION_DAY.format(row='sales')} AS sale_day, transaction_id
+            FROM sales WHERE transaction_id IS NOT NULL
+        ) GROUP BY sale_day
+    """)
+
+def rebuild_sales_aggregates(conn):
+    """Recompute every table the sales triggers maintain, e.g. after a bulk load"""
+    rebuild_sales_rollup(conn)
+    rebuild_sales_transactions(conn)
+
+def _create_sales_transactions(conn):
+    """Migration step counting distinct transactions per day
+    
+    checkout writes one sales row per cart line, so line_count in the
+    rollup overstates transactions. Lines of one transaction share a
+    sale_date, so each transaction counts once, on its day.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sales_daily_transactions (
+            sale_day TEXT PRIMARY KEY,
+            transactions INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    rebuild_sales_transactions(conn)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS sales_transactions_insert AFTER INSERT ON sales
+        BEGIN
+            {_transactions_add('NEW')}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS sales_transactions_delete AFTER DELETE ON sales
+        BEGIN
+            {_transactions_remove('OLD')}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS sales_transactions_update
+        AFTER UPDATE OF sale_date, transaction_id ON sales
+        BEGIN
+            {_transactions_remove('OLD')}
+            {_transactions_add('NEW')}
+        END
+    """)
+
+# SQL for the local wall-clock time, for triggers that stamp rows (see
+# local_timestamp)
+LOCAL_NOW = "datetime('now', 'localtime')"
+
+# Stock below this fraction of min_stock_level is critical. The stock_alerts
+# triggers embed it, so changing it needs those triggers recreated.
+CRITICAL_STOCK_RATIO = 0.3
+
+def _stock_state(row):
+    """SQL for (is low, is critical) of one products row; {row} is NEW or OLD.
+    A NULL stock or minimum counts as neither, as in idx_products_low_stock."""
+    low = f"COALESCE({row}.stock_quantity < {row}.min_stock_level, 0)"
+    critical = f"COALESCE({row}.stock_quantity < {row}.min_stock_level * {CRITICAL_STOCK_RATIO}, 0)"
+    return low, critical
+
+def rebuild_stock_alerts(conn):
+    """Recompute stock_alerts from products, keeping known crossing times"""
+    conn.execute("""
+        DELETE FROM stock_alerts WHERE product_id NOT IN (
+            SELECT id FROM products WHERE stock_quantity < min_stock_level)
+    """)
+    # A product's crossing time is unknown here; its last update is the
+    # latest it can have been. updated_at is UTC, alerts are local time.
+    since = f"COALESCE(datetime(updated_at, 'localtime'), {LOCAL_NOW})"
+    conn.execute(f"""
+        INSERT INTO stock_alerts (product_id, low_since, critical_since)
+        SELECT id, {since},
+               CASE WHEN stock_quantity < min_stock_level * {CRITICAL_STOCK_RATIO} THEN {since} END
+        FROM products WHERE stock_quantity < min_stock_level
+        ON CONFLICT (product_id) DO UPDATE SET critical_since = CASE
+            WHEN excluded.critical_since IS NULL THEN NULL
+            ELSE COALESCE(critical_since, excluded.critical_since) END
+    """)
+
+def _create_stock_alert_triggers(conn):
+    """Triggers stamping stock_alerts with the local time of each crossing"""
+    new_low, new_critical = _stock_state('NEW')
+    old_low, old_critical = _stock_state('OLD')
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS stock_alerts_insert AFTER INSERT ON products
+        WHEN {new_low}
+        BEGIN
+            INSERT OR REPLACE INTO stock_alerts (product_id, low_since, critical_since)
+            VALUES (NEW.id, {LOCAL_NOW},
+                    CASE WHEN {new_critical} THEN {LOCAL_NOW} END);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS stock_alerts_delete AFTER DELETE ON products
+        BEGIN
+            DELETE FROM stock_alerts WHERE product_id = OLD.id;
+        END
+    """)
+    # Only crossings touch stock_alerts; ordinary sales leave it alone
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS stock_alerts_update
+        AFTER UPDATE OF stock_quantity, min_stock_level ON products
+        WHEN {old_low} != {new_low} OR {old_critical} != {new_critical}
+        BEGIN
+            DELETE FROM stock_alerts WHERE product_id = NEW.id AND NOT {new_low};
+            INSERT INTO stock_alerts (product_id, low_since, critical_since)
+            SELECT NEW.id, {LOCAL_NOW}, CASE WHEN {new_critical} THEN {LOCAL_NOW} END
+            WHERE {new_low}
+            ON CONFLICT (product_id) DO UPDATE SET critical_since = CASE
+                WHEN {new_critical} THEN COALESCE(critical_since, {LOCAL_NOW}) END;
+        END
+    """)
+
+def _create_stock_alerts(conn):
+    """Migration step building stock_alerts and the triggers feeding it"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stock_alerts (
+            product_id INTEGER PRIMARY KEY REFERENCES products(id),
+            low_since TIMESTAMP NOT NULL,
+            critical_since TIMESTAMP
+        )
+    """)
+    rebuild_stock_alerts(conn)
+    _create_stock_alert_triggers(conn)
+
+def _localize_stock_alerts(conn):
+    """Migration step moving stock_alerts stamped in UTC to local time
+    
+    Databases that applied migration 11 before its triggers used the local
+    clock still carry the CURRENT_TIMESTAMP triggers; those are replaced
+    and their rows converted. Anything else is already local.
+    """
+    utc = conn.execute("""
+        SELECT 1 FROM sqlite_master
+        WHERE type = 'trigger' AND tbl_name = 'products' AND name LIKE 'stock_alerts_%'
+          AND sql LIKE '%CURRENT_TIMESTAMP%'
+    """).fetchone()
+    if utc is None:
+        return
+    for name in ('stock_alerts_insert', 'stock_alerts_delete', 'stock_alerts_update'):
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.execute("""
+        UPDATE stock_alerts SET low_since = datetime(low_since, 'localtime'),
+                                critical_since = datetime(critical_since, 'localtime')
+    """)
+    _create_stock_alert_triggers(conn)
+
+# Tables whose triggers only maintain derived data, mapped to the function
+# that rebuilds it; bulk reloads drop the triggers and rebuild once instead
+REBUILDABLE_TRIGGERS = {
+    'sales': rebuild_sales_aggregates,
+}
+
+# Derived data keyed on another table's rows, rebuilt when that table is
+# replaced wholesale: rollup buckets carry each product's category, which
+# sales_rollup_recategorize only follows through UPDATEs
+DEPENDENT_REBUILDS = {
+    'products': rebuild_sales_rollup,
+}
+
+# Ordered schema migrations: (version, description, statements).
+# Each step runs once, inside a transaction, and bumps PRAGMA user_version.
+# A statement is either SQL text or a callable taking the connection.
+SCHEMA_MIGRATIONS = [
+    (1, "Hot-path indexes for sales, inventory_log and products", [
+        "CREATE INDEX IF NOT EXISTS idx_sales_sale_date ON sales(sale_date)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_product_date ON sales(product_id, sale_date)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_user ON sales(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_inventory_log_product_created ON inventory_log(product_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_products_category ON products(category)",
+    ]),
+    (2, "Bring products created by older releases up to the current columns", [
+        # ADD COLUMN cannot default to CURRENT_TIMESTAMP, so backfill and
+        # stamp new rows with a trigger instead
+        _add_missing_columns('products', [
+            ('max_stock_level', 'INTEGER DEFAULT 100'),
+            ('updated_at', 'TIMESTAMP'),
+        ]),
+        "UPDATE products SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL",
+        """
+        CREATE TRIGGER IF NOT EXISTS insert_products_timestamp
+        AFTER INSERT ON products
+        WHEN NEW.updated_at IS NULL
+        BEGIN
+            UPDATE products SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+        END
+        """,
+    ]),
+    (3, "Allow several sale lines per transaction_id", [
+        # SQLite cannot drop a UNIQUE constraint in place, so rebuild the table
+        """
+        CREATE TABLE sales_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_id TEXT,
+            product_id INTEGER,
+            quantity INTEGER,
+            unit_price REAL,
+            total_price REAL,
+            tax_amount REAL,
+            payment_method TEXT,
+            customer_info TEXT,
+            user_id INTEGER,
+            sale_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (product_id) REFERENCES products(id),
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        INSERT INTO sales_new (id, transaction_id, product_id, quantity, unit_price, total_price,
+                               tax_amount, payment_method, customer_info, user_id, sale_date)
+        SELECT id, transaction_id, product_id, quantity, unit_price, total_price,
+               tax_amount, payment_method, customer_info, user_id, sale_date
+        FROM sales
+        """,
+        "DROP TABLE sales",
+        "ALTER TABLE sales_new RENAME TO sales",
+        "CREATE INDEX IF NOT EXISTS idx_sales_sale_date ON sales(sale_date)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_product_date ON sales(product_id, sale_date)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_user ON sales(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_transaction ON sales(transaction_id)",
+    ]),
+    (4, "Index products.updated_at for catalog cache revalidation", [
+        "CREATE INDEX IF NOT EXISTS idx_products_updated_at ON products(updated_at)",
+    ]),
+    (5, "Full-text product search kept in sync by triggers", [
+        _create_product_search,
+    ]),
+    (6, "Range and ordering indexes for inventory filters", [
+        "CREATE INDEX IF NOT EXISTS idx_products_price ON products(price)",
+        "CREATE INDEX IF NOT EXISTS idx_products_stock ON products(stock_quantity)",
+        "CREATE INDEX IF NOT EXISTS idx_products_name ON products(name)",
+        # Used whenever a query repeats this exact condition (Low/Critical views)
+        """
+        CREATE INDEX IF NOT EXISTS idx_products_low_stock ON products(stock_quantity)
+        WHERE stock_quantity < min_stock_level
+        """,
+    ]),
+    (7, "Daily sales rollup kept current by triggers on sales", [
+        _create_sales_rollup,
+    ]),
+    (8, "Backup schedule settings and backup history", [
+        _add_missing_columns('settings', [
+            ('backup_frequency', "TEXT DEFAULT 'Daily'"),
+            ('backup_retention', 'INTEGER DEFAULT 7'),
+            ('backup_dir', "TEXT DEFAULT 'backups'"),
+        ]),
+        """
+        CREATE TABLE IF NOT EXISTS backups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT,
+            trigger TEXT,
+            status TEXT CHECK(status IN ('running', 'success', 'failed', 'rotated')),
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            duration_ms REAL,
+            size_bytes INTEGER,
+            pages INTEGER,
+            error TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_backups_status_finished ON backups(status, finished_at)",
+    ]),
+    (9, "Business profile details printed on receipts", [
+        # Defaults are the details receipts printed before they were configurable
+        _add_missing_columns('settings', [
+            ('tax_id', 'TEXT'),
+            ('address', "TEXT DEFAULT 'P.O. Box 19938 - 00202 KNH Nairobi'"),
+            ('phone1', "TEXT DEFAULT '+254 727 680 468'"),
+            ('phone2', "TEXT DEFAULT '+254 736 880 488'"),
+            ('email', "TEXT DEFAULT 'info@lukenyagetaway.com'"),
+            ('website', "TEXT DEFAULT 'www.salphinechemos.com'"),
+            ('receipt_footer', "TEXT DEFAULT 'Thank you for your business!'"),
+        ]),
+    ]),
+    (10, "Background jobs with progress and output files", [
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            params TEXT,
+            status TEXT NOT NULL DEFAULT 'queued'
+                CHECK(status IN ('queued', 'running', 'success', 'failed', 'cancelled')),
+            progress REAL DEFAULT 0,
+            rows_done INTEGER,
+            rows_total INTEGER,
+            output_path TEXT,
+            size_bytes INTEGER,
+            error TEXT,
+            user_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_user_created ON jobs(user_id, created_at)",
+        # Only unfinished jobs are counted against the queue cap
+        """
+        CREATE INDEX IF NOT EXISTS idx_jobs_active ON jobs(status)
+        WHERE status IN ('queued', 'running')
+        """,
+    ]),
+    (11, "Low and critical stock alerts kept current by triggers on products", [
+        _create_stock_alerts,
+    ]),
+    (12, "Inventory snapshot checkpoints for point-in-time stock", [
+        """
+        CREATE TABLE IF NOT EXISTS inventory_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            taken_at TIMESTAMP NOT NULL,
+            trigger TEXT,
+            products INTEGER,
+            total_units INTEGER,
+            total_value REAL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_inventory_snapshots_taken ON inventory_snapshots(taken_at)",
+        """
+        CREATE TABLE IF NOT EXISTS inventory_snapshot_items (
+            snapshot_id INTEGER NOT NULL REFERENCES inventory_snapshots(id),
+            product_id INTEGER NOT NULL,
+            stock_quantity INTEGER,
+            PRIMARY KEY (snapshot_id, product_id)
+        ) WITHOUT ROWID
+        """,
+        # Log tails after a checkpoint are read by time across all products
+        "CREATE INDEX IF NOT EXISTS idx_inventory_log_created ON inventory_log(created_at)",
+    ]),
+    (13, "Audit log of logins, sales, inventory and settings changes", [
+        """
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TIMESTAMP NOT NULL,
+            event TEXT NOT NULL,
+            category TEXT NOT NULL DEFAULT 'activity' CHECK(category IN ('activity', 'security')),
+            status TEXT NOT NULL DEFAULT 'SUCCESS' CHECK(status IN ('SUCCESS', 'FAILED', 'WARNING')),
+            user_id INTEGER,
+            username TEXT,
+            details TEXT,
+            ip_address TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        # The log views filter on one of these and list newest first
+        "CREATE INDEX IF NOT EXISTS idx_audit_log_created ON audit_log(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_log_username_created ON audit_log(username, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_log_event_created ON audit_log(event, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_log_category_created ON audit_log(category, created_at)",
+    ]),
+    (14, "Distinct transactions per day kept current by triggers on sales", [
+        _create_sales_transactions,
+    ]),
+    (15, "Stamp stock alerts with local time", [
+        _localize_stock_alerts,
+    ]),
+    (16, "Product change counter for catalog cache revalidation", [
+        _create_product_changes,
+    ]),
+]
+
+# Report dimensions mapped to sales_daily_rollup columns
+ROLLUP_DIMENSIONS = {
+    'date': 'r.sale_day',
+    'product': 'r.product_id',
+    'category': 'r.category',
+    'payment_method': 'r.payment_method',
+}
+
+# Timestamps the app writes are local wall-clock text in this format, the
+# clock report periods are resolved in. Column defaults (CURRENT_TIMESTAMP)
+# are UTC, so sale_date and inventory_log.created_at are always written
+# explicitly.
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def local_timestamp(value=None):
+    """value, or now, as local 'YYYY-MM-DD HH:MM:SS' text"""
+    return (value or datetime.now()).strftime(TIMESTAMP_FORMAT)
+
+def _new_transaction_id(now):
+    """TXN, the second, then 64 random bits so concurrent tills do not collide"""
+    return f"TXN{now.strftime('%Y%m%d%H%M%S')}{secrets.token_hex(8).upper()}"
+
+# Time Period choices on the Reports page
+REPORT_PERIODS = ["Today", "Yesterday", "Last 7 Days", "This Month", "Last Month", "Custom Range"]
+
+def resolve_report_period(period, today=None, start_date=None, end_date=None):
+    """Half-open [start, end) datetimes for a REPORT_PERIODS choice
+    
+    Custom Range takes start_date and end_date as dates, both inclusive.
+    Ranges fall on local midnight so they match the daily rollup exactly
+    and compare correctly against sale_date text (see TIMESTAMP_FORMAT).
+    Raises ValueError for an unknown period or an inverted custom range.
+    """
+    today = today or datetime.now().date()
+    first_of_month = today.replace(day=1)
+    if period == "Today":
+        start, end = today, today + timedelta(days=1)
+    elif period == "Yesterday":
+        start, end = today - timedelta(days=1), today
+    elif period == "Last 7 Days":
+        start, end = today - timedelta(days=6), today + timedelta(days=1)
+    elif period == "This Month":
+        start, end = first_of_month, (first_of_month + timedelta(days=32)).replace(day=1)
+    elif period == "Last Month":
+        start, end = (first_of_month - timedelta(days=1)).replace(day=1), first_of_month
+    elif period == "Custom Range":
+        if start_date is None or end_date is None:
+            raise ValueError("Custom Range needs a start and an end date")
+        if end_date < start_date:
+            raise ValueError("End date is before start date")
+        start, end = start_date, end_date + timedelta(days=1)
+    else:
+        raise ValueError(f"unknown report period: {period}")
+    return (datetime.combine(start, datetime.min.time()),
+            datetime.combine(end, datetime.min.time()))
+
+# Column export_to_csv filters on for a date range, per table
+EXPORT_DATE_COLUMNS = {
+    'sales': 'sale_date',
+    'inventory_log': 'created_at',
+    'products': 'created_at',
+    'users': 'created_at',
+}
+
+# Online backups copy this many pages per step and pause between steps,
+# so writers only wait for one short step at a time
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_SLEEP = 0.005
+BACKUP_MAX_RESTARTS = 3
+
+class _BackupRestarted(Exception):
+    """Raised from the backup progress callback to stop restarting"""
+
+# Rows per worksheet Excel accepts, header included; longer exports
+# continue on further sheets
+EXCEL_MAX_ROWS = 1_048_576
+
+# Rows per Parquet row group (and per batch read back on import)
+PARQUET_ROW_GROUP_SIZE = 100_000
+
+def _arrow_type(declared):
+    """Arrow type for a declared SQLite column type (type affinity rules)"""
+    declared = (declared or "").upper()
+    if "INT" in declared:
+        return pa.int64()
+    if any(name in declared for name in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    if "BOOL" in declared:
+        return pa.bool_()
+    if "TIMESTAMP" in declared or "DATE" in declared:
+        return pa.timestamp('us')
+    return pa.string()
+
+def _to_arrow(values, arrow_type):
+    """Arrow array from one column of SQLite values"""
+    if pa.types.is_timestamp(arrow_type):
+        # SQLite keeps timestamps as 'YYYY-MM-DD HH:MM:SS' text
+        return pa.array(values, pa.string()).cast(arrow_type)
+    if pa.types.is_boolean(arrow_type):
+        # and booleans as 0/1 integers
+        return pa.array([None if value is None else bool(value) for value in values], arrow_type)
+    return pa.array(values, arrow_type)
+
+def _from_arrow(column):
+    """Python values for one Arrow column, timestamps back in SQLite's text form"""
+    if pa.types.is_timestamp(column.type):
+        # Whole-second timestamps cast to 'YYYY-MM-DD HH:MM:SS'
+        column = column.cast(pa.timestamp('s'), safe=False).cast(pa.string())
+    if column.null_count:
+        return column.to_pylist()
+    # Far faster than to_pylist when there are no nulls to preserve
+    return column.to_numpy(zero_copy_only=False).tolist()
+
+# Seconds a dashboard snapshot is served before it is recomputed
+DASHBOARD_SNAPSHOT_TTL = 10.0
+# Products in the dashboard's top stock value chart
+DASHBOARD_TOP_PRODUCTS = 8
+
+# Inventory sort options mapped to whitelisted ORDER BY columns
+PRODUCT_SORT_COLUMNS = {
+    'name': ['name'],
+    'category': ['category', 'name'],
+    'stock_quantity': ['stock_quantity', 'name'],
+    'price': ['price', 'name'],
+}
+
+def build_product_query(search=None, categories=None, price_range=None, stock_range=None,
+                        view_mode="All Products", sort_by='name', descending=False, limit=500,
+                        full_text=True):
+    """Turn inventory filter widget values into one parameterized query
+    
+    Returns (sql, params). Every condition is index-backed: FTS5 for text,
+    category/price/stock indexes for ranges and the partial low-stock index
+    for the Low Stock and Critical Stock views.
+    """
+    conditions = []
+    params = []
+    
+    if search:
+        tokens = re.findall(r"\w+", search)
+        if tokens and full_text:
+            conditions.append("id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)")
+            params.append(" ".join(f'"{token}"*' for token in tokens))
+        elif tokens:
+            conditions.append("name LIKE ?")
+            params.append(f"%{search.strip()}%")
+    
+    if categories:
+        conditions.append(f"category IN ({', '.join('?' for _ in categories)})")
+        params.extend(categories)
+    
+    if price_range is not None:
+        conditions.append("price BETWEEN ? AND ?")
+        params.extend(price_range)
+    
+    if stock_range is not None:
+        conditions.append("stock_quantity BETWEEN ? AND ?")
+        params.extend(stock_range)
+    
+    if view_mode in ("Low Stock", "Critical Stock"):
+        conditions.append("stock_quantity < min_stock_level")
+    if view_mode == "Critical Stock":
+        conditions.append("stock_quantity < min_stock_level * ?")
+        params.append(CRITICAL_STOCK_RATIO)
+    
+    direction = "DESC" if descending else "ASC"
+    columns = PRODUCT_SORT_COLUMNS.get(sort_by, PRODUCT_SORT_COLUMNS['name'])
+    order_by = ", ".join([f"{columns[0]} {direction}"] + columns[1:])
+    
+    sql = "SELECT * FROM products"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {order_by} LIMIT ?"
+    params.append(int(limit))
+    return sql, params
+
+# Product columns the inventory forms may set
+PRODUCT_EDIT_COLUMNS = ('name', 'category', 'price', 'stock_quantity', 'min_stock_level', 'description')
+
+# bm25 column weights for products_fts: name, category, description
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+# Ranking costs about a microsecond per match; a one- or two-letter prefix
+# can match much of the catalog, so broader searches come back in index
+# order until the cashier types enough to narrow them down
+SEARCH_RANK_LIMIT = 2000
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections checked out per thread"""
+    
+    def __init__(self, db_path, max_size=5, busy_timeout=5000, checkout_timeout=30.0):
+        self.db_path = db_path
+        # Every ":memory:" connection is a separate database, so share one
+        self.max_size = 1 if db_path == ":memory:" else max_size
+        self.busy_timeout = busy_timeout
+        self.checkout_timeout = checkout_timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._created = 0
+        self._closed = False
+        self.connections_opened = 0
+    
+    def _create_connection(self):
+        """Open a new connection configured for concurrent use"""
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout / 1000,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # This enables dictionary-like access
+        self.connections_opened += 1
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        if self.db_path != ":memory:":
+            # WAL lets readers run alongside a single writer
+            conn.execute("PRAGMA journal_mode = WAL")
+        return conn
+    
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            can_create = self._created < self.max_size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._create_connection()
+            except sqlite3.Error:
+                with self._lock:
+                    self._created -= 1
+                raise
+        
+        try:
+            return self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Connection pool exhausted ({self.max_size} connections in use)")
+    
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+        else:
+            self._idle.put(conn)
+    
+    @contextmanager
+    def connection(self):
+        """Check out a connection; nested checkouts on one thread share it"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+        
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn)
+    
+    def stats(self):
+        """Return pool occupancy counters"""
+        idle = self._idle.qsize()
+        return {'max_size': self.max_size, 'open': self._created,
+                'idle': idle, 'in_use': self._created - idle,
+                'connections_opened': self.connections_opened}
+    
+    def close(self):
+        """Close idle connections; checked-out ones close on release"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+class InsufficientStockError(Exception):
+    """Raised inside checkout when a line would oversell a product"""
+
+class _ColumnBuilder:
+    """Accumulates one result column as typed NumPy chunks"""
+    
+    def __init__(self, dtype=None):
+        self.dtype = dtype
+        self.chunks = []
+        # Categorical columns are dictionary-encoded as they stream in
+        self.categories = {} if dtype == 'category' else None
+    
+    def append(self, values):
+        if self.categories is not None:
+            lookup = self.categories
+            self.chunks.append(np.fromiter(
+                (-1 if v is None else lookup.setdefault(v, len(lookup)) for v in values),
+                dtype=np.int32, count=len(values)))
+        elif self.dtype is None:
+            self.chunks.append(np.array(values, dtype=object))
+        elif str(self.dtype).startswith('datetime64'):
+            self.chunks.append(pd.to_datetime(np.array(values, dtype=object)).to_numpy(self.dtype))
+        else:
+            self.chunks.append(np.array(values, dtype=self.dtype))
+    
+    def build(self):
+        if self.categories is not None:
+            codes = np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=np.int32)
+            return pd.Categorical.from_codes(codes, categories=list(self.categories))
+        if not self.chunks:
+            return np.empty(0, dtype=self.dtype or object)
+        values = np.concatenate(self.chunks)
+        if self.dtype is None:
+            return pd.Series(values).infer_objects().to_numpy()
+        return values
+
+class CatalogCache:
+    """In-process copy of the products table, revalidated cheaply on read
+    
+    A dedicated connection polls PRAGMA data_version, which only changes when
+    another connection commits. After a change, products whose revision in
+    product_changes passed the last one seen are reloaded, or dropped if
+    they were deleted. The returned list and its dicts are shared and must
+    not be mutated.
+    """
+    
+    def __init__(self, db):
+        self.db = db
+        self.products = None
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._by_id = {}
+        self._data_version = None
+        self._revision = None
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def _connection(self):
+        if self.db.db_path == ":memory:":
+            # A second connection would see a different in-memory database
+            with self.db.connection() as conn:
+                yield conn
+            return
+        if self._conn is None:
+            self._conn = self.db.pool._create_connection()
+        yield self._conn
+    
+    def _publish(self):
+        self.products = sorted(self._by_id.values(), key=lambda p: (p['name'] or '', p['id']))
+        self.version += 1
+    
+    def _full_load(self, conn):
+        # Revision first: a write committed before the products read is
+        # then just read again on the next revalidation
+        self._revision = conn.execute("SELECT COALESCE(MAX(revision), 0) FROM product_changes").fetchone()[0]
+        rows = conn.execute("SELECT * FROM products").fetchall()
+        self._by_id = {row['id']: dict(row) for row in rows}
+        self.misses += 1
+        self._publish()
+    
+    def get_products(self):
+        """Return all products ordered by name, reloading only what changed"""
+        with self._lock, self._connection() as conn:
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if (self.products is not None and data_version == self._data_version
+                    and self.db.db_path != ":memory:"):
+                self.hits += 1
+                return self.products
+            self._data_version = data_version
+            
+            if self.products is None:
+                self._full_load(conn)
+                return self.products
+            
+            changes = conn.execute("SELECT product_id, revision FROM product_changes WHERE revision > ?",
+                                   (self._revision,)).fetchall()
+            if not changes:
+                self.hits += 1
+                return self.products
+            if len(changes) > len(self._by_id) // 2:
+                self._full_load(conn)
+                return self.products
+            
+            rows = conn.execute("""
+                SELECT * FROM products
+                WHERE id IN (SELECT product_id FROM product_changes WHERE revision > ?)
+            """, (self._revision,)).fetchall()
+            current = {row['id']: dict(row) for row in rows}
+            modified = False
+            for change in changes:
+                product_id = change['product_id']
+                product = current.get(product_id)
+                if product is None:
+                    modified |= self._by_id.pop(product_id, None) is not None
+                elif self._by_id.get(product_id) != product:
+                    self._by_id[product_id] = product
+                    modified = True
+            self._revision = max(change['revision'] for change in changes)
+            
+            if modified:
+                self.refreshes += 1
+                self._publish()
+            else:
+                self.hits += 1
+            return self.products
+    
+    def get_product(self, product_id):
+        """Return one cached product or None"""
+        self.get_products()
+        return self._by_id.get(product_id)
+    
+    def get_many(self, product_ids):
+        """Return cached products for product_ids, keeping their order"""
+        self.get_products()
+        return [self._by_id[i] for i in product_ids if i in self._by_id]
+    
+    def invalidate(self):
+        """Drop the cached catalog so the next read reloads it"""
+        with self._lock:
+            self.products = None
+    
+    def stats(self):
+        return {'catalog_hits': self.hits, 'catalog_misses': self.misses,
+                'catalog_refreshes': self.refreshes, 'catalog_version': self.version,
+                'catalog_size': len(self._by_id)}
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class SnapshotCache:
+    """A value recomputed at most once per ttl seconds, shared by all callers
+    
+    The first caller after expiry runs loader while the others wait on the
+    lock and then reuse its result, so any number of sessions costs one load
+    per ttl. A None result is not cached. The value must not be mutated.
+    """
+    
+    def __init__(self, loader, ttl):
+        self.loader = loader
+        self.ttl = ttl
+        self.value = None
+        self.loaded_at = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def get(self):
+        with self._lock:
+            if self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl:
+                self.hits += 1
+                return self.value
+            self.misses += 1
+            self.value = self.loader()
+            self.loaded_at = time.monotonic() if self.value is not None else None
+            return self.value
+    
+    def invalidate(self):
+        """Recompute on the next read"""
+        with self._lock:
+            self.loaded_at = None
+
+# Statements that set last_insert_rowid()
+_INSERT_STATEMENT = re.compile(r"\s*(INSERT|REPLACE)\b", re.IGNORECASE)
+
+class Transaction:
+    """Statements run on one connection and committed together"""
+    
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+        self.lastrowid = None
+    
+    def _track(self, cursor):
+        if cursor.rowcount > 0:
+            self.rowcount += cursor.rowcount
+        if cursor.lastrowid:
+            self.lastrowid = cursor.lastrowid
+    
+    def execute(self, query, params=()):
+        """Execute one statement and return its cursor"""
+        cursor = self.conn.execute(query, params)
+        self._track(cursor)
+        return cursor
+    
+    def execute_many(self, query, seq_of_params):
+        """Execute one statement for every parameter set and return the cursor"""
+        cursor = self.conn.executemany(query, seq_of_params)
+        if cursor.rowcount > 0:
+            self.rowcount += cursor.rowcount
+        # executemany leaves cursor.lastrowid unset. last_insert_rowid()
+        # keeps an earlier INSERT's id through other statements, so it is
+        # only read after an INSERT that added rows.
+        if cursor.rowcount > 0 and _INSERT_STATEMENT.match(query):
+            lastrowid = self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            if lastrowid:
+                self.lastrowid = lastrowid
+        return cursor
 
 class Database:
-    def __init__(self, db_path="sales_system.db"):
+    def __init__(self, db_path="sales_system.db", pool_size=5, busy_timeout=5000):
         self.db_path = db_path
-        self.connection = None
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self.pool = None
+        self.handle_reuses = 0
+        self._transactions = threading.local()
+        self.catalog = CatalogCache(self)
+        self.dashboard = SnapshotCache(self._load_dashboard, DASHBOARD_SNAPSHOT_TTL)
+        self._has_fts = None
         self.connect()
+        self.migrate()
         
     def connect(self):
-        """Establish database connection"""
+        """Create the connection pool and verify the database opens"""
         try:
-            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.connection.row_factory = sqlite3.Row  # This enables dictionary-like access
+            self.pool = ConnectionPool(self.db_path, max_size=self.pool_size,
+                                       busy_timeout=self.busy_timeout)
+            with self.pool.connection():
+                pass
             print(f"Database connected successfully: {self.db_path}")
         except sqlite3.Error as err:
             print(f"Error: {err}")
-            # Create in-memory data for demo
-            self.connection = None
-            
-    def get_connection(self):
-        if not self.connection:
+            self.pool = None
+    
+    @contextmanager
+    def connection(self):
+        """Check out a pooled connection for the current thread"""
+        if self.pool is None:
             self.connect()
-        return self.connection
+        if self.pool is None:
+            raise sqlite3.OperationalError(f"Unable to open database: {self.db_path}")
+        with self.pool.connection() as conn:
+            yield conn
+    
+    def _transaction_depth(self):
+        return getattr(self._transactions, 'depth', 0)
+    
+    @contextmanager
+    def transaction(self, immediate=False):
+        """Group statements into a single commit, rolling back on error
+        
+        Nested calls on the same thread become savepoints. Use immediate=True
+        for read-then-write work so the write lock is taken up front.
+        """
+        with self.connection() as conn:
+            depth = self._transaction_depth()
+            savepoint = f"sp_{depth}"
+            if depth:
+                conn.execute(f"SAVEPOINT {savepoint}")
+            else:
+                conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            self._transactions.depth = depth + 1
+            tx = Transaction(conn)
+            try:
+                yield tx
+            except BaseException:
+                if depth:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                else:
+                    conn.rollback()
+                raise
+            else:
+                if depth:
+                    conn.execute(f"RELEASE {savepoint}")
+                else:
+                    conn.commit()
+            finally:
+                self._transactions.depth = depth
     
     def execute_query(self, query, params=None):
-        conn = self.get_connection()
-        if conn is None:
+        if self.pool is None:
+            self.connect()
+        if self.pool is None:
             return None
-            
-        cursor = conn.cursor()
+        
+        with self.connection() as conn:
+            in_transaction = self._transaction_depth() > 0
+            cursor = conn.cursor()
+            try:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                    
+                if query.strip().upper().startswith('SELECT'):
+                    results = cursor.fetchall()
+                    # Convert sqlite3.Row objects to dictionaries
+                    return [dict(row) for row in results]
+                # Inside transaction() the commit happens once at the end
+                if not in_transaction:
+                    conn.commit()
+                return True
+            except Exception as e:
+                print(f"Query error: {e}")
+                print(f"Query: {query}")
+                print(f"Params: {params}")
+                if in_transaction:
+                    # Let the enclosing transaction roll back as a whole
+                    raise
+                return None
+            finally:
+                cursor.close()
+    
+    def iter_query(self, query, params=None, batch_size=1000, batches=False, as_dict=True):
+        """Stream SELECT results through fetchmany with bounded memory
+        
+        Yields one row at a time, or lists of up to batch_size rows when
+        batches is set. Rows are dicts unless as_dict is False, in which case
+        the sqlite3.Row objects are passed through unchanged.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.arraysize = batch_size
+                cursor.execute(query, params or ())
+                while True:
+                    rows = cursor.fetchmany()
+                    if not rows:
+                        break
+                    if as_dict:
+                        rows = [dict(row) for row in rows]
+                    if batches:
+                        yield rows
+                    else:
+                        yield from rows
+            finally:
+                cursor.close()
+    
+    def query_df(self, query, params=None, dtypes=None, batch_size=10000):
+        """Build a DataFrame column by column straight from cursor batches
+        
+        dtypes maps column names to NumPy dtypes, 'datetime64[ns]' or
+        'category'; other columns are inferred once at the end.
+        """
+        dtypes = dtypes or {}
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            # Plain tuples are cheaper to transpose than sqlite3.Row objects
+            cursor.row_factory = None
+            try:
+                cursor.execute(query, params or ())
+                names = [d[0] for d in cursor.description]
+                builders = [_ColumnBuilder(dtypes.get(name)) for name in names]
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for builder, values in zip(builders, zip(*rows)):
+                        builder.append(values)
+            finally:
+                cursor.close()
+        
+        return pd.DataFrame({name: builder.build() for name, builder in zip(names, builders)})
+    
+    def execute_many(self, query, seq_of_params, return_ids=False):
+        """Run one statement for many parameter sets in a single commit
+        
+        Returns {'rowcount', 'lastrowid'} plus 'row_ids' when return_ids is
+        set, or None on error.
+        """
         try:
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-                
-            if query.strip().upper().startswith('SELECT'):
-                results = cursor.fetchall()
-                # Convert sqlite3.Row objects to dictionaries
-                return [dict(row) for row in results]
-            conn.commit()
-            return True
-        except Exception as e:
+            with self.transaction() as tx:
+                if return_ids:
+                    row_ids = [tx.execute(query, params).lastrowid for params in seq_of_params]
+                else:
+                    tx.execute_many(query, seq_of_params)
+        except sqlite3.Error as e:
             print(f"Query error: {e}")
             print(f"Query: {query}")
-            print(f"Params: {params}")
             return None
-        finally:
-            cursor.close()
+        
+        result = {'rowcount': tx.rowcount, 'lastrowid': tx.lastrowid}
+        if return_ids:
+            result['row_ids'] = row_ids
+        return result
     
     def create_tables(self):
         """Create necessary tables"""
@@ -157,6 +1393,423 @@ class Database:
             INSERT OR IGNORE INTO settings (business_name) 
             VALUES ('Salphine Chemos Getaway Resort')
         """)
+        
+        # Seed the demo catalog so a fresh database has products to sell
+        if not self.execute_query("SELECT 1 FROM products LIMIT 1"):
+            products, _ = self.get_sample_data()
+            self.execute_many("""
+                INSERT INTO products (name, category, price, stock_quantity, min_stock_level)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(p['name'], p['category'], p['price'], p['stock_quantity'], p['min_stock_level'])
+                  for p in products])
+    
+    def get_schema_version(self):
+        """Return the schema version recorded in PRAGMA user_version"""
+        if self.pool is None:
+            return None
+        with self.connection() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    def migrate(self):
+        """Apply pending schema migrations in order"""
+        current = self.get_schema_version()
+        if current is None:
+            return None
+        
+        pending = [m for m in SCHEMA_MIGRATIONS if m[0] > current]
+        if not pending:
+            return current
+        
+        # Base tables must exist before any migration can index them
+        self.create_tables()
+        
+        with self.connection() as conn:
+            for version, description, statements in pending:
+                try:
+                    # IMMEDIATE takes the write lock up front so two processes
+                    # starting together cannot apply the same step twice
+                    conn.execute("BEGIN IMMEDIATE")
+                    if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                        conn.rollback()
+                        continue
+                    for statement in statements:
+                        if callable(statement):
+                            statement(conn)
+                        else:
+                            conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version = {int(version)}")
+                    conn.commit()
+                    print(f"Applied migration {version}: {description}")
+                except sqlite3.Error as err:
+                    conn.rollback()
+                    print(f"Migration {version} failed: {err}")
+                    break
+        
+        return self.get_schema_version()
+    
+    def get_products(self):
+        """Return every product ordered by name from the catalog cache"""
+        try:
+            return self.catalog.get_products()
+        except sqlite3.Error as e:
+            print(f"Catalog error: {e}")
+            return []
+    
+    def search_products(self, term, limit=100):
+        """Ranked prefix search over product name, category and description"""
+        tokens = re.findall(r"\w+", term or "")
+        if not tokens:
+            return []
+        
+        try:
+            with self.connection() as conn:
+                if self.has_full_text_search():
+                    # Every token must match as a prefix: "cof* bean*"
+                    match = " ".join(f'"{token}"*' for token in tokens)
+                    matches = conn.execute(
+                        "SELECT COUNT(*) FROM products_fts WHERE products_fts MATCH ?", (match,)
+                    ).fetchone()[0]
+                    if matches <= SEARCH_RANK_LIMIT:
+                        order_by = f"bm25(products_fts, {', '.join(map(str, SEARCH_WEIGHTS))})"
+                    else:
+                        order_by = "rowid"
+                    rows = conn.execute(f"""
+                        SELECT rowid FROM products_fts
+                        WHERE products_fts MATCH ?
+                        ORDER BY {order_by}
+                        LIMIT ?
+                    """, (match, limit)).fetchall()
+                else:
+                    like = f"%{term.strip()}%"
+                    rows = conn.execute("""
+                        SELECT id FROM products WHERE name LIKE ? OR category LIKE ?
+                        ORDER BY name LIMIT ?
+                    """, (like, like, limit)).fetchall()
+        except sqlite3.Error as e:
+            print(f"Search error: {e}")
+            return []
+        
+        return self.catalog.get_many([row[0] for row in rows])
+    
+    def has_full_text_search(self):
+        """Whether the products_fts index exists in this database"""
+        if self._has_fts is None:
+            result = self.execute_query("SELECT 1 FROM sqlite_master WHERE name = 'products_fts'")
+            self._has_fts = bool(result)
+        return self._has_fts
+    
+    def filter_products(self, **filters):
+        """Return products matching inventory filters (see build_product_query)"""
+        sql, params = build_product_query(full_text=self.has_full_text_search(), **filters)
+        return self.execute_query(sql, params) or []
+    
+    def get_product_bounds(self):
+        """Return the largest price and stock level, for slider ranges"""
+        result = self.execute_query(
+            "SELECT MAX(price) AS max_price, MAX(stock_quantity) AS max_stock FROM products")
+        if not result:
+            return {'max_price': 0.0, 'max_stock': 0}
+        return {'max_price': result[0]['max_price'] or 0.0, 'max_stock': result[0]['max_stock'] or 0}
+    
+    def dashboard_snapshot(self):
+        """Dashboard KPIs at most DASHBOARD_SNAPSHOT_TTL seconds old, or None on error
+        
+        A dict with total_products, low_stock, critical_stock, stock_value,
+        top_products (name, value), low_stock_items (see get_stock_alerts)
+        and taken_at. It is
+        shared by every session and must not be mutated.
+        """
+        return self.dashboard.get()
+    
+    def _load_dashboard(self, top_n=DASHBOARD_TOP_PRODUCTS):
+        try:
+            with self.connection() as conn:
+                # Every KPI in one pass over products; alert counts come
+                # from the trigger-maintained stock_alerts table
+                kpis = conn.execute("""
+                    SELECT COUNT(*) AS total_products,
+                           (SELECT COUNT(*) FROM stock_alerts) AS low_stock,
+                           (SELECT COUNT(*) FROM stock_alerts
+                            WHERE critical_since IS NOT NULL) AS critical_stock,
+                           COALESCE(SUM(price * stock_quantity), 0.0) AS stock_value
+                    FROM products
+                """).fetchone()
+                top_products = conn.execute("""
+                    SELECT name, price * stock_quantity AS value FROM products
+                    ORDER BY value DESC LIMIT ?
+                """, (top_n,)).fetchall()
+        except sqlite3.Error as e:
+            print(f"Dashboard error: {e}")
+            return None
+        snapshot = dict(kpis)
+        snapshot['top_products'] = [dict(row) for row in top_products]
+        snapshot['low_stock_items'] = self.get_stock_alerts()
+        snapshot['taken_at'] = datetime.now()
+        return snapshot
+    
+    def get_stock_alerts(self, critical_only=False):
+        """Products below their minimum stock, with when each crossed it
+        
+        Reads stock_alerts, so the cost grows with the number of alerts
+        rather than the catalog. Rows carry the product's id, name,
+        category, stock_quantity and min_stock_level plus low_since and
+        critical_since (None unless below the critical level).
+        """
+        sql = """
+            SELECT p.id, p.name, p.category, p.stock_quantity, p.min_stock_level,
+                   a.low_since, a.critical_since
+            FROM stock_alerts a JOIN products p ON p.id = a.product_id
+        """
+        if critical_only:
+            sql += " WHERE a.critical_since IS NOT NULL"
+        return self.execute_query(sql + " ORDER BY p.name") or []
+    
+    def stock_status_by_category(self):
+        """Product count and low (not critical) and critical alerts per category"""
+        return self.execute_query("""
+            SELECT c.category, c.total,
+                   COALESCE(a.low, 0) AS low, COALESCE(a.critical, 0) AS critical
+            FROM (SELECT category, COUNT(*) AS total FROM products GROUP BY category) c
+            LEFT JOIN (
+                SELECT p.category, COUNT(*) - COUNT(a.critical_since) AS low,
+                       COUNT(a.critical_since) AS critical
+                FROM stock_alerts a JOIN products p ON p.id = a.product_id
+                GROUP BY p.category
+            ) a ON a.category IS c.category
+            ORDER BY c.category
+        """) or []
+    
+    def sales_rollup(self, group_by=None, start_date=None, end_date=None):
+        """Aggregate sales_daily_rollup by one dimension over [start_date, end_date)
+        
+        group_by is a ROLLUP_DIMENSIONS key, or None for a single totals row.
+        Returns a DataFrame with the dimension column plus quantity, total,
+        tax_amount and lines; cost grows with days in range, not sale lines.
+        """
+        columns = []
+        joins = ""
+        group_clause = ""
+        if group_by is not None:
+            group_column = ROLLUP_DIMENSIONS[group_by]
+            if group_by == 'product':
+                columns.append("COALESCE(p.name, 'Product ' || r.product_id) AS product")
+                joins = "LEFT JOIN products p ON p.id = r.product_id"
+            else:
+                columns.append(f"{group_column} AS {group_by}")
+            group_clause = f"GROUP BY {group_column} ORDER BY {group_column}"
+        
+        conditions = []
+        params = []
+        if start_date is not None:
+            conditions.append("r.sale_day >= ?")
+            params.append(str(start_date)[:10])
+        if end_date is not None:
+            conditions.append("r.sale_day < ?")
+            params.append(str(end_date)[:10])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        columns += [
+            "COALESCE(SUM(r.quantity), 0) AS quantity",
+            "COALESCE(SUM(r.total_sales), 0.0) AS total",
+            "COALESCE(SUM(r.tax_amount), 0.0) AS tax_amount",
+            "COALESCE(SUM(r.line_count), 0) AS lines",
+        ]
+        sql = f"SELECT {', '.join(columns)} FROM sales_daily_rollup r {joins} {where} {group_clause}"
+        dtypes = {'date': 'datetime64[ns]'} if group_by == 'date' else None
+        try:
+            return self.query_df(sql, params, dtypes=dtypes)
+        except sqlite3.Error as e:
+            print(f"Rollup error: {e}")
+            return pd.DataFrame()
+    
+    def count_transactions(self, start_date=None, end_date=None):
+        """Distinct transactions sold in [start_date, end_date), one row read per day"""
+        conditions = []
+        params = []
+        if start_date is not None:
+            conditions.append("sale_day >= ?")
+            params.append(str(start_date)[:10])
+        if end_date is not None:
+            conditions.append("sale_day < ?")
+            params.append(str(end_date)[:10])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        result = self.execute_query(
+            f"SELECT COALESCE(SUM(transactions), 0) AS n FROM sales_daily_transactions {where}", params)
+        return result[0]['n'] if result else 0
+    
+    def checkout(self, items, user_id=None, payment_method=None, customer_info=None,
+                 tax_rate=0.0, transaction_id=None):
+        """Record a cart as one sale in a single transaction
+        
+        Each line decrements stock only if enough is left, writes a sales row
+        and an inventory_log entry. Any shortfall rolls the whole sale back.
+        """
+        sold_at = datetime.now()
+        generated = transaction_id is None
+        if generated:
+            transaction_id = _new_transaction_id(sold_at)
+        sold_at = local_timestamp(sold_at)
+        
+        # Merge repeated products so each stock row is checked once
+        lines = {}
+        for item in items:
+            line = lines.setdefault(item['id'], {'quantity': 0, 'price': item['price'],
+                                                  'name': item.get('name', item['id'])})
+            line['quantity'] += item['quantity']
+        
+        subtotal = tax_total = 0.0
+        try:
+            # IMMEDIATE takes the write lock before the stock checks, so
+            # concurrent tills queue up instead of failing mid-transaction
+            with self.transaction(immediate=True) as tx:
+                # sales.transaction_id is not UNIQUE since migration 3; holding
+                # the write lock makes this check race-free across tills
+                while generated and tx.execute("SELECT 1 FROM sales WHERE transaction_id = ? LIMIT 1",
+                                               (transaction_id,)).fetchone():
+                    transaction_id = _new_transaction_id(datetime.now())
+                for product_id, line in lines.items():
+                    quantity = line['quantity']
+                    updated = tx.execute("""
+                        UPDATE products SET stock_quantity = stock_quantity - ?
+                        WHERE id = ? AND stock_quantity >= ?
+                    """, (quantity, product_id, quantity))
+                    if updated.rowcount == 0:
+                        raise InsufficientStockError(f"Insufficient stock for {line['name']}")
+                    
+                    new_quantity = tx.execute("SELECT stock_quantity FROM products WHERE id = ?",
+                                              (product_id,)).fetchone()[0]
+                    total_price = line['price'] * quantity
+                    tax_amount = total_price * (tax_rate / 100)
+                    tx.execute("""
+                        INSERT INTO sales (transaction_id, product_id, quantity, unit_price, total_price,
+                                           tax_amount, payment_method, customer_info, user_id, sale_date)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (transaction_id, product_id, quantity, line['price'], total_price,
+                          tax_amount, payment_method, customer_info, user_id, sold_at))
+                    tx.execute("""
+                        INSERT INTO inventory_log (product_id, action, quantity_change, new_quantity, user_id,
+                                                   notes, created_at)
+                        VALUES (?, 'sale', ?, ?, ?, ?, ?)
+                    """, (product_id, -quantity, new_quantity, user_id, transaction_id, sold_at))
+                    subtotal += total_price
+                    tax_total += tax_amount
+        except InsufficientStockError as e:
+            return {'success': False, 'error': str(e)}
+        except sqlite3.Error as e:
+            print(f"Checkout error: {e}")
+            return {'success': False, 'error': 'Sale could not be saved, please retry'}
+        
+        return {
+            'success': True,
+            'transaction_id': transaction_id,
+            'lines': len(lines),
+            'subtotal': subtotal,
+            'tax_amount': tax_total,
+            'total': subtotal + tax_total
+        }
+    
+    def add_product(self, values, user_id=None):
+        """Insert a product from PRODUCT_EDIT_COLUMNS values; returns its id or None
+        
+        Opening stock is logged to inventory_log as a restock.
+        """
+        values = {key: value for key, value in values.items() if key in PRODUCT_EDIT_COLUMNS}
+        values['created_at'] = added_at = local_timestamp()
+        try:
+            with self.transaction() as tx:
+                product_id = tx.execute(f"""
+                    INSERT INTO products ({', '.join(values)}) VALUES ({', '.join('?' for _ in values)})
+                """, tuple(values.values())).lastrowid
+                stock = values.get('stock_quantity') or 0
+                if stock:
+                    tx.execute("""
+                        INSERT INTO inventory_log (product_id, action, quantity_change, new_quantity, user_id,
+                                                   notes, created_at)
+                        VALUES (?, 'restock', ?, ?, ?, 'Opening stock', ?)
+                    """, (product_id, stock, stock, user_id, added_at))
+        except sqlite3.Error as e:
+            print(f"Add product error: {e}")
+            return None
+        return product_id
+    
+    def update_product(self, product_id, values, user_id=None):
+        """Update PRODUCT_EDIT_COLUMNS of one product
+        
+        A stock change is logged to inventory_log as an adjustment. Returns
+        the columns that changed as {name: (old, new)}, or None on error.
+        """
+        values = {key: value for key, value in values.items() if key in PRODUCT_EDIT_COLUMNS}
+        try:
+            with self.transaction(immediate=True) as tx:
+                current = tx.execute("SELECT * FROM products WHERE id = ?", (product_id,)).fetchone()
+                if current is None:
+                    return {}
+                changes = {key: (current[key], value) for key, value in values.items()
+                           if current[key] != value}
+                if changes:
+                    assignments = ", ".join(f"{key} = ?" for key in changes)
+                    tx.execute(f"UPDATE products SET {assignments} WHERE id = ?",
+                               (*(new for _, new in changes.values()), product_id))
+                if 'stock_quantity' in changes:
+                    old, new = changes['stock_quantity']
+                    tx.execute("""
+                        INSERT INTO inventory_log (product_id, action, quantity_change, new_quantity, user_id,
+                                                   notes, created_at)
+                        VALUES (?, 'adjustment', ?, ?, ?, 'Inventory edit', ?)
+                    """, (product_id, new - (old or 0), new, user_id, local_timestamp()))
+        except sqlite3.Error as e:
+            print(f"Update product error: {e}")
+            return None
+        return changes
+    
+    def get_receipts(self, start_date=None, end_date=None):
+        """Receipt data for the transactions sold in [start_date, end_date)
+        
+        Each receipt has the shape the Sales page builds at checkout, ordered
+        by sale time, so past sales can be reprinted.
+        """
+        conditions = []
+        params = []
+        if start_date is not None:
+            conditions.append("s.sale_date >= ?")
+            params.append(str(start_date))
+        if end_date is not None:
+            conditions.append("s.sale_date < ?")
+            params.append(str(end_date))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.execute_query(f"""
+            SELECT s.transaction_id, s.sale_date, s.customer_info, s.payment_method,
+                   s.quantity, s.unit_price, s.total_price, s.tax_amount,
+                   COALESCE(p.name, 'Product ' || s.product_id) AS name,
+                   COALESCE(u.username, '') AS username
+            FROM sales s
+            LEFT JOIN products p ON p.id = s.product_id
+            LEFT JOIN users u ON u.id = s.user_id
+            {where}
+            ORDER BY s.transaction_id, s.id
+        """, tuple(params)) or []
+        
+        receipts = []
+        for transaction_id, lines in itertools.groupby(rows, key=lambda row: row['transaction_id']):
+            lines = list(lines)
+            first = lines[0]
+            subtotal = sum(line['total_price'] or 0 for line in lines)
+            tax_amount = sum(line['tax_amount'] or 0 for line in lines)
+            receipts.append({
+                'transaction_id': transaction_id,
+                'customer_name': first['customer_info'] or '',
+                'items': [{'name': line['name'], 'quantity': line['quantity'],
+                           'price': line['unit_price'], 'total': line['total_price']} for line in lines],
+                'subtotal': subtotal,
+                'tax_rate': round(tax_amount / subtotal * 100, 2) if subtotal else 0.0,
+                'tax_amount': tax_amount,
+                'total': subtotal + tax_amount,
+                'payment_method': first['payment_method'],
+                'date': first['sale_date'],
+                'user': first['username'],
+            })
+        receipts.sort(key=lambda receipt: receipt['date'] or '')
+        return receipts
     
     def get_sample_data(self):
         """Return sample data for demo purposes"""
@@ -181,49 +1834,412 @@ class Database:
         
         return products, users
     
-    def backup_database(self, backup_path=None):
-        """Create a backup of the SQLite database"""
+    def backup_database(self, backup_path=None, pages=BACKUP_PAGES_PER_STEP,
+                        sleep=BACKUP_STEP_SLEEP, progress=None):
+        """Copy the database with the online backup API, a few pages per step
+        
+        Runs on its own connection, so pooled connections stay free. The copy
+        is written next to backup_path and renamed into place once complete.
+        progress(remaining, total_pages) is called after every step.
+        Returns backup_path, or None on error.
+        
+        In WAL mode the copy reads one pinned snapshot, which writers do not
+        wait on. Otherwise a commit from another connection restarts a
+        stepped backup; after BACKUP_MAX_RESTARTS the rest is copied at once.
+        """
         if backup_path is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = f"sales_system_backup_{timestamp}.db"
+        partial_path = backup_path + ".partial"
+        restarts = 0
+        last_remaining = None
+        
+        def report(status, remaining, total):
+            nonlocal restarts, last_remaining
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts > BACKUP_MAX_RESTARTS:
+                    raise _BackupRestarted()
+            last_remaining = remaining
+            if progress is not None:
+                progress(remaining, total)
         
         try:
-            source = self.get_connection()
-            if source:
-                # Create a new connection for the backup
-                backup_conn = sqlite3.connect(backup_path)
-                source.backup(backup_conn)
-                backup_conn.close()
-                print(f"Database backup created: {backup_path}")
-                return backup_path
+            if self.db_path == ":memory:":
+                # A separate connection would see an empty database
+                source_context = self.connection()
+            else:
+                source_context = closing(self.pool._create_connection())
+            with source_context as source:
+                snapshot = (not source.in_transaction and
+                            source.execute("PRAGMA journal_mode").fetchone()[0] == 'wal')
+                if snapshot:
+                    # An open read transaction keeps every step on one snapshot
+                    source.execute("BEGIN")
+                    source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                backup_conn = sqlite3.connect(partial_path)
+                try:
+                    try:
+                        source.backup(backup_conn, pages=pages, progress=report, sleep=sleep)
+                    except _BackupRestarted:
+                        source.backup(backup_conn, pages=-1)
+                finally:
+                    backup_conn.close()
+                    if snapshot:
+                        source.rollback()
+            os.replace(partial_path, backup_path)
+            print(f"Database backup created: {backup_path}")
+            return backup_path
         except Exception as e:
             print(f"Backup error: {e}")
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
             return None
     
-    def export_to_csv(self, table_name, export_path=None):
-        """Export table data to CSV"""
+    def get_settings(self):
+        """Return the settings row as a dict (empty if there is none)"""
+        result = self.execute_query("SELECT * FROM settings ORDER BY id LIMIT 1")
+        return result[0] if result else {}
+    
+    def update_settings(self, values):
+        """Update settings columns from a dict; unknown keys are ignored"""
+        columns = {name for name, _ in self._table_columns('settings')} - {'id', 'updated_at'}
+        values = {key: value for key, value in values.items() if key in columns}
+        if not values:
+            return False
+        assignments = ", ".join(f"{key} = ?" for key in values)
+        result = self.execute_query(
+            f"UPDATE settings SET {assignments} WHERE id = (SELECT MIN(id) FROM settings)",
+            tuple(values.values()))
+        return result is not None
+    
+    def _table_columns(self, table_name):
+        """Return [(name, declared type)] for a table, empty if it does not exist"""
+        return [(row['name'], row['type']) for row in self.execute_query(
+            "SELECT name, type FROM pragma_table_info(?)", (table_name,)) or []]
+    
+    def _export_query(self, table_name, columns=None, start_date=None, end_date=None):
+        """Validate an export and return (select list, WHERE clause, params, column types)
+        
+        Identifiers cannot be bound, so they are checked against the schema;
+        raises ValueError for unknown tables or columns.
+        """
+        table_columns = dict(self._table_columns(table_name))
+        if not table_columns:
+            raise ValueError(f"no such table: {table_name}")
+        unknown = [c for c in columns or [] if c not in table_columns]
+        if unknown:
+            raise ValueError(f"no such column(s) in {table_name}: {', '.join(unknown)}")
+        
+        conditions = []
+        params = []
+        if start_date is not None or end_date is not None:
+            date_column = EXPORT_DATE_COLUMNS.get(table_name)
+            if date_column is None:
+                raise ValueError(f"{table_name} has no date column to filter on")
+            if start_date is not None:
+                conditions.append(f"{date_column} >= ?")
+                params.append(str(start_date))
+            if end_date is not None:
+                conditions.append(f"{date_column} < ?")
+                params.append(str(end_date))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        selected = list(columns) if columns else list(table_columns)
+        return ", ".join(selected), where, params, [(c, table_columns[c]) for c in selected]
+    
+    def export_to_csv(self, table_name, export_path=None, columns=None, start_date=None,
+                      end_date=None, compress=None, progress=None, batch_size=5000):
+        """Stream a table to CSV in batches with bounded memory
+        
+        columns limits the export to those columns. start_date/end_date keep
+        rows in [start_date, end_date) on the table's EXPORT_DATE_COLUMNS
+        column. compress writes gzip (default: when export_path ends in .gz).
+        progress(rows_written, total_rows) is called after every batch.
+        """
+        if compress is None:
+            compress = bool(export_path and export_path.endswith('.gz'))
         if export_path is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            export_path = f"{table_name}_{timestamp}.csv"
+            export_path = f"{table_name}_{timestamp}.csv" + (".gz" if compress else "")
+        
+        try:
+            select, where, params, _ = self._export_query(table_name, columns, start_date, end_date)
+        except ValueError as e:
+            print(f"Export error: {e}")
+            return None
         
         try:
-            data = self.execute_query(f"SELECT * FROM {table_name}")
-            if data:
-                df = pd.DataFrame(data)
-                df.to_csv(export_path, index=False)
-                print(f"Exported {table_name} to {export_path}")
+            total = None
+            if progress is not None:
+                total = self.execute_query(f"SELECT COUNT(*) AS n FROM {table_name}{where}", params)[0]['n']
+            
+            # Stream batches straight to disk so memory stays flat
+            batches = self.iter_query(f"SELECT {select} FROM {table_name}{where}", params,
+                                      batch_size=batch_size, batches=True, as_dict=False)
+            first_batch = next(batches, None)
+            if first_batch:
+                if compress:
+                    f = gzip.open(export_path, 'wt', newline='', encoding='utf-8', compresslevel=6)
+                else:
+                    f = open(export_path, 'w', newline='', encoding='utf-8')
+                try:
+                    with f:
+                        writer = csv.writer(f)
+                        writer.writerow(first_batch[0].keys())
+                        written = 0
+                        for batch in itertools.chain([first_batch], batches):
+                            writer.writerows(batch)
+                            written += len(batch)
+                            if progress is not None:
+                                progress(written, total)
+                except BaseException:
+                    # Never leave a truncated export behind
+                    os.remove(export_path)
+                    raise
+                print(f"Exported {written:,} rows of {table_name} to {export_path}")
                 return export_path
         except Exception as e:
             print(f"Export error: {e}")
             return None
     
+    def export_to_parquet(self, table_name, export_path=None, columns=None, start_date=None,
+                          end_date=None, row_group_size=PARQUET_ROW_GROUP_SIZE, compression='zstd',
+                          progress=None):
+        """Stream a table to a Parquet file, one row group per batch
+        
+        Takes the same columns/start_date/end_date/progress options as
+        export_to_csv. Column types follow the declared SQLite types, with
+        TIMESTAMP columns stored as Arrow timestamps. Needs pyarrow.
+        """
+        if pa is None:
+            print("Parquet export unavailable: pyarrow is not installed")
+            return None
+        if export_path is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            export_path = f"{table_name}_{timestamp}.parquet"
+        
+        try:
+            select, where, params, column_types = self._export_query(
+                table_name, columns, start_date, end_date)
+        except ValueError as e:
+            print(f"Export error: {e}")
+            return None
+        schema = pa.schema([(name, _arrow_type(declared)) for name, declared in column_types])
+        
+        try:
+            total = None
+            if progress is not None:
+                total = self.execute_query(f"SELECT COUNT(*) AS n FROM {table_name}{where}", params)[0]['n']
+            
+            written = 0
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                # Plain tuples are cheaper to transpose than sqlite3.Row objects
+                cursor.row_factory = None
+                try:
+                    cursor.execute(f"SELECT {select} FROM {table_name}{where}", params)
+                    with pq.ParquetWriter(export_path, schema, compression=compression) as writer:
+                        while True:
+                            batch = cursor.fetchmany(row_group_size)
+                            if not batch:
+                                break
+                            arrays = [_to_arrow(values, field.type)
+                                      for values, field in zip(zip(*batch), schema)]
+                            writer.write_batch(pa.record_batch(arrays, schema=schema),
+                                               row_group_size=row_group_size)
+                            written += len(batch)
+                            if progress is not None:
+                                progress(written, total)
+                except BaseException:
+                    if os.path.exists(export_path):
+                        os.remove(export_path)
+                    raise
+                finally:
+                    cursor.close()
+            print(f"Exported {written:,} rows of {table_name} to {export_path}")
+            return export_path
+        except Exception as e:
+            print(f"Export error: {e}")
+            return None
+    
+    def export_to_excel(self, table_name, export_path=None, columns=None, start_date=None,
+                        end_date=None, summary_sheets=None, progress=None, batch_size=5000):
+        """Stream a table into an .xlsx workbook with bounded memory
+        
+        Rows go from the cursor straight into openpyxl write-only sheets,
+        which spill to temporary files instead of keeping cells in memory;
+        past EXCEL_MAX_ROWS the rows continue on a new sheet. summary_sheets
+        maps sheet names to small DataFrames (a summary, a category
+        breakdown) written after the data. Takes the same columns/start_date/
+        end_date/progress options as export_to_csv. Needs openpyxl.
+        """
+        if Workbook is None:
+            print("Excel export unavailable: openpyxl is not installed")
+            return None
+        if export_path is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            export_path = f"{table_name}_{timestamp}.xlsx"
+        
+        try:
+            select, where, params, column_types = self._export_query(
+                table_name, columns, start_date, end_date)
+        except ValueError as e:
+            print(f"Export error: {e}")
+            return None
+        header = [name for name, _ in column_types]
+        title = table_name.replace('_', ' ').title()
+        
+        try:
+            total = None
+            if progress is not None:
+                total = self.execute_query(f"SELECT COUNT(*) AS n FROM {table_name}{where}", params)[0]['n']
+            
+            workbook = Workbook(write_only=True)
+            written = 0
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = None
+                try:
+                    cursor.execute(f"SELECT {select} FROM {table_name}{where}", params)
+                    sheets = 0
+                    sheet_rows = EXCEL_MAX_ROWS
+                    while True:
+                        batch = cursor.fetchmany(batch_size)
+                        if not batch:
+                            break
+                        for row in batch:
+                            if sheet_rows == EXCEL_MAX_ROWS:
+                                sheets += 1
+                                sheet = workbook.create_sheet(title if sheets == 1 else f"{title} ({sheets})")
+                                sheet.append(header)
+                                sheet_rows = 1
+                            sheet.append(row)
+                            sheet_rows += 1
+                        written += len(batch)
+                        if progress is not None:
+                            progress(written, total)
+                    if sheets == 0:
+                        workbook.create_sheet(title).append(header)
+                    
+                    for name, df in (summary_sheets or {}).items():
+                        sheet = workbook.create_sheet(name[:31])
+                        sheet.append([str(column) for column in df.columns])
+                        for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+                            sheet.append(row)
+                    workbook.save(export_path)
+                except BaseException:
+                    if os.path.exists(export_path):
+                        os.remove(export_path)
+                    raise
+                finally:
+                    cursor.close()
+            print(f"Exported {written:,} rows of {table_name} to {export_path}")
+            return export_path
+        except Exception as e:
+            print(f"Export error: {e}")
+            return None
+    
+    def import_from_parquet(self, table_name, import_path, replace=False,
+                            batch_size=PARQUET_ROW_GROUP_SIZE, progress=None):
+        """Bulk insert a Parquet file into a table in one transaction
+        
+        File columns must exist in the table; columns missing from the file
+        take their defaults. replace deletes the table's rows first. Returns
+        the number of rows imported, or None on error (nothing is kept).
+        """
+        if pa is None:
+            print("Parquet import unavailable: pyarrow is not installed")
+            return None
+        
+        table_columns = dict(self._table_columns(table_name))
+        try:
+            parquet_file = pq.ParquetFile(import_path)
+            names = parquet_file.schema_arrow.names
+            unknown = [name for name in names if name not in table_columns]
+            if not table_columns or unknown:
+                raise ValueError(f"no such table or column(s) in {table_name}: {', '.join(unknown)}")
+            
+            insert = (f"INSERT INTO {table_name} ({', '.join(names)}) "
+                      f"VALUES ({', '.join('?' for _ in names)})")
+            total = parquet_file.metadata.num_rows
+            imported = 0
+            with self.transaction(immediate=True) as tx:
+                # Reloading a whole table: build its indexes once at the end
+                # and, where triggers only maintain derived data, rebuild
+                # that once instead of per row
+                rebuild = REBUILDABLE_TRIGGERS.get(table_name) if replace else None
+                suspended = []
+                if replace:
+                    kinds = ('index', 'trigger') if rebuild is not None else ('index',)
+                    suspended = tx.execute(f"""
+                        SELECT type, name, sql FROM sqlite_master
+                        WHERE tbl_name = ? AND sql IS NOT NULL AND type IN ({', '.join('?' for _ in kinds)})
+                    """, (table_name, *kinds)).fetchall()
+                    for item in suspended:
+                        tx.execute(f"DROP {item['type'].upper()} {item['name']}")
+                    tx.execute(f"DELETE FROM {table_name}")
+                for batch in parquet_file.iter_batches(batch_size=batch_size):
+                    columns = [_from_arrow(column) for column in batch.columns]
+                    tx.execute_many(insert, zip(*columns))
+                    imported += batch.num_rows
+                    if progress is not None:
+                        progress(imported, total)
+                for item in suspended:
+                    tx.execute(item['sql'])
+                if rebuild is not None:
+                    rebuild(tx.conn)
+                if replace and table_name in DEPENDENT_REBUILDS:
+                    DEPENDENT_REBUILDS[table_name](tx.conn)
+        except Exception as e:
+            print(f"Import error: {e}")
+            return None
+        
+        if table_name == 'products':
+            self.catalog.invalidate()
+        print(f"Imported {imported:,} rows into {table_name} from {import_path}")
+        return imported
+    
+    def get_stats(self):
+        """Return connection reuse counters for diagnostics"""
+        stats = {'db_path': self.db_path, 'handle_reuses': self.handle_reuses}
+        if self.pool:
+            stats.update(self.pool.stats())
+        stats.update(self.catalog.stats())
+        stats.update({'dashboard_hits': self.dashboard.hits, 'dashboard_misses': self.dashboard.misses})
+        return stats
+    
     def close(self):
-        """Close the database connection"""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
+        """Close all pooled database connections"""
+        self.catalog.close()
+        if self.pool:
+            self.pool.close()
+            self.pool = None
             print("Database connection closed")
 
+# Process-wide Database handles, shared by every Streamlit session and rerun
+_shared_databases = {}
+_shared_databases_lock = threading.Lock()
+
+def get_database(db_path="sales_system.db"):
+    """Return the shared Database for db_path, opening it on first use"""
+    with _shared_databases_lock:
+        db = _shared_databases.get(db_path)
+        if db is None or db.pool is None:
+            db = Database(db_path)
+            _shared_databases[db_path] = db
+        else:
+            db.handle_reuses += 1
+        return db
+
+def close_databases():
+    """Close every shared Database handle"""
+    with _shared_databases_lock:
+        for db in _shared_databases.values():
+            db.close()
+        _shared_databases.clear()
+
+atexit.register(close_databases)
+
 # Helper functions for compatibility with existing code
 if __name__ == "__main__":
     # Test the database connection
@@ -0,0 +1,218 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from audit import export_audit_csv
+from database import local_timestamp
+from receipts import BusinessProfile, render_receipts_batch, render_receipts_pdf
+
+# Jobs that may run at once; further submissions wait in the queue
+JOB_MAX_CONCURRENT = 2
+# Unfinished (queued or running) jobs allowed before submit refuses more
+JOB_MAX_QUEUED = 20
+JOB_OUTPUT_DIR = "exports"
+# Seconds between progress writes to the jobs table
+JOB_PROGRESS_INTERVAL = 1.0
+
+def _export_csv(db, params, output_path, progress):
+    return db.export_to_csv(
+        params['table'], output_path, columns=params.get('columns'),
+        start_date=params.get('start_date'), end_date=params.get('end_date'),
+        compress=output_path.endswith(".gz"), progress=progress)
+
+def _export_parquet(db, params, output_path, progress):
+    return db.export_to_parquet(
+        params['table'], output_path, columns=params.get('columns'),
+        start_date=params.get('start_date'), end_date=params.get('end_date'), progress=progress)
+
+def _export_excel(db, params, output_path, progress):
+    summary_sheets = None
+    if params['table'] == 'sales':
+        # Totals and the category breakdown over the same date range
+        start_date, end_date = params.get('start_date'), params.get('end_date')
+        summary_sheets = {
+            'Summary': db.sales_rollup(None, start_date, end_date),
+            'Categories': db.sales_rollup('category', start_date, end_date),
+        }
+    return db.export_to_excel(
+        params['table'], output_path, columns=params.get('columns'),
+        start_date=params.get('start_date'), end_date=params.get('end_date'),
+        summary_sheets=summary_sheets, progress=progress)
+
+def _reprint_receipts(db, params, output_path, progress):
+    receipts = db.get_receipts(params.get('start_date'), params.get('end_date'))
+    if not receipts:
+        raise ValueError("No sales in that period")
+    profile = BusinessProfile.from_settings(db.get_settings())
+    if output_path.endswith(".zip"):
+        with zipfile.ZipFile(output_path, 'w') as archive:
+            for receipt_data, pdf in zip(receipts, render_receipts_batch(receipts, profile)):
+                archive.writestr(f"receipt_{receipt_data['transaction_id']}.pdf", pdf)
+    else:
+        with open(output_path, 'wb') as f:
+            f.write(render_receipts_pdf(receipts, profile))
+    progress(len(receipts), len(receipts))
+    return output_path
+
+def _export_audit_log(db, params, output_path, progress):
+    return export_audit_csv(db, output_path, progress=progress, **params.get('filters', {}))
+
+# Job kinds mapped to (handler, default output extension). A handler takes
+# (db, params, output_path, progress) and returns the path it wrote, or None
+# on failure; progress(done, total) may be called as work advances.
+JOB_KINDS = {
+    'export_csv': (_export_csv, "csv"),
+    'export_parquet': (_export_parquet, "parquet"),
+    'export_excel': (_export_excel, "xlsx"),
+    'reprint_receipts': (_reprint_receipts, "pdf"),
+    'export_audit_log': (_export_audit_log, "csv"),
+}
+
+class JobRunner:
+    """Runs exports and other slow work on a bounded thread pool
+
+    Every job is a row in the jobs table, so the UI can poll its status and
+    progress and download the output file on a later rerun or from another
+    session. At most max_concurrent jobs run at once. Its timestamps are
+    local time, like every other the app writes (see local_timestamp).
+    """
+
+    def __init__(self, db, max_concurrent=JOB_MAX_CONCURRENT, max_queued=JOB_MAX_QUEUED,
+                 output_dir=JOB_OUTPUT_DIR):
+        self.db = db
+        self.max_queued = max_queued
+        self.output_dir = output_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="job")
+        self._futures = {}
+        self._lock = threading.Lock()
+        # Status and progress go through their own connection: a handler's
+        # progress callback runs while its pooled connection is mid-read,
+        # and a write there fails once other commits make its snapshot stale
+        self._status_conn = None
+        if db.db_path != ":memory:":
+            # (a second connection would see a different in-memory database)
+            self._status_conn = db.pool._create_connection()
+        self._status_lock = threading.Lock()
+        # Jobs left unfinished by a previous process will never complete
+        self.db.execute_query("""
+            UPDATE jobs SET status = 'failed', error = 'Interrupted by a restart', finished_at = ?
+            WHERE status IN ('queued', 'running')
+        """, (local_timestamp(),))
+
+    def _record(self, job_id, **values):
+        assignments = ", ".join(f"{key} = ?" for key in values)
+        if self._status_conn is None:
+            self.db.execute_query(f"UPDATE jobs SET {assignments} WHERE id = ?",
+                                  (*values.values(), job_id))
+            return
+        with self._status_lock:
+            try:
+                self._status_conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?",
+                                          (*values.values(), job_id))
+                self._status_conn.commit()
+            except sqlite3.Error as e:
+                self._status_conn.rollback()
+                print(f"Job {job_id} status update failed: {e}")
+
+    def submit(self, kind, params, user_id=None, extension=None):
+        """Queue a job; returns its id, or None when the queue is full
+
+        params is JSON-serialisable and passed to the kind's handler;
+        extension overrides its output file type, e.g. "csv.gz" or "zip".
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"unknown job kind: {kind}")
+        with self._lock:
+            active = self.db.execute_query(
+                "SELECT COUNT(*) AS n FROM jobs WHERE status IN ('queued', 'running')")
+            if active and active[0]['n'] >= self.max_queued:
+                return None
+            result = self.db.execute_many("""
+                INSERT INTO jobs (kind, params, status, user_id, created_at) VALUES (?, ?, 'queued', ?, ?)
+            """, [(kind, json.dumps(params, default=str), user_id, local_timestamp())])
+            if not result:
+                return None
+            job_id = result['lastrowid']
+            self._futures[job_id] = self._executor.submit(
+                self._run, job_id, kind, params, extension or JOB_KINDS[kind][1])
+            return job_id
+
+    def _run(self, job_id, kind, params, extension):
+        started = datetime.now()
+        self._record(job_id, status='running', started_at=local_timestamp(started))
+        os.makedirs(self.output_dir, exist_ok=True)
+        output_path = os.path.join(self.output_dir, f"{kind}_{job_id}_{started.strftime('%Y%m%d_%H%M%S')}.{extension}")
+        last_write = 0.0
+
+        def on_progress(done, total):
+            nonlocal last_write
+            now = time.monotonic()
+            if now - last_write >= JOB_PROGRESS_INTERVAL or (total and done >= total):
+                last_write = now
+                self._record(job_id, rows_done=done, rows_total=total,
+                             progress=done / total if total else None)
+
+        try:
+            handler, _ = JOB_KINDS[kind]
+            path = handler(self.db, params, output_path, on_progress)
+            if path is None:
+                raise RuntimeError("Export failed or there were no rows to export")
+            self._record(job_id, status='success', progress=1.0, output_path=path,
+                         size_bytes=os.path.getsize(path),
+                         finished_at=local_timestamp())
+        except Exception as e:
+            print(f"Job {job_id} ({kind}) failed: {e}")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            self._record(job_id, status='failed', error=str(e),
+                         finished_at=local_timestamp())
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+
+    def cancel(self, job_id):
+        """Cancel a job that has not started yet"""
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is None or not future.cancel():
+                return False
+            self._futures.pop(job_id, None)
+        self._record(job_id, status='cancelled',
+                     finished_at=local_timestamp())
+        return True
+
+    def get(self, job_id):
+        result = self.db.execute_query("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return result[0] if result else None
+
+    def jobs(self, user_id, limit=20):
+        """Most recent jobs one user submitted; none for an unknown (None) user"""
+        if user_id is None:
+            return []
+        return self.db.execute_query("""
+            SELECT * FROM jobs WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ?
+        """, (user_id, limit)) or []
+
+    def purge(self, older_than=timedelta(days=7)):
+        """Delete output files of finished jobs older than older_than"""
+        cutoff = local_timestamp(datetime.now() - older_than)
+        expired = self.db.execute_query("""
+            SELECT id, output_path FROM jobs
+            WHERE status = 'success' AND output_path IS NOT NULL AND finished_at < ?
+        """, (cutoff,)) or []
+        for job in expired:
+            if os.path.exists(job['output_path']):
+                os.remove(job['output_path'])
+            self._record(job['id'], output_path=None)
+        return len(expired)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        if self._status_conn is not None:
+            with self._status_lock:
+                self._status_conn.close()
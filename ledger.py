@@ -0,0 +1,267 @@
+import threading
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+# Time between scheduled inventory checkpoints
+SNAPSHOT_INTERVAL = timedelta(days=1)
+# How often the scheduler checks whether a checkpoint is due
+SNAPSHOT_POLL_SECONDS = 300
+
+def _timestamp(value):
+    """A datetime, date or string in inventory_log's created_at format"""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return f"{value.isoformat()} 00:00:00"
+    return str(value)
+
+def _only(column, product_ids):
+    """SQL and params restricting column to product_ids (None means all)"""
+    if product_ids is None:
+        return "", []
+    product_ids = list(product_ids)
+    return f" AND {column} IN ({', '.join('?' for _ in product_ids)})", product_ids
+
+class InventoryLedger:
+    """Point-in-time stock from periodic checkpoints plus the inventory_log tail
+
+    A checkpoint copies every product's stock_quantity. Each logged movement
+    carries the product's new_quantity, so stock at any time is that of its
+    latest movement since the nearest earlier checkpoint, or the checkpoint
+    itself if it has not moved. Before the first checkpoint, stock is walked
+    back from the next one (or the current catalog) instead. Checkpoints
+    are stamped in local time, the clock inventory_log is written in.
+    """
+
+    def __init__(self, db, interval=SNAPSHOT_INTERVAL):
+        self.db = db
+        self.interval = interval
+        self._scheduler = None
+        self._stop = threading.Event()
+
+    def take_snapshot(self, trigger='manual'):
+        """Checkpoint every product's current stock; returns the snapshot id"""
+        try:
+            with self.db.transaction(immediate=True) as tx:
+                tx.execute("""
+                    INSERT INTO inventory_snapshots (taken_at, trigger, products, total_units, total_value)
+                    SELECT ?, ?, COUNT(*), COALESCE(SUM(stock_quantity), 0),
+                           COALESCE(SUM(price * stock_quantity), 0.0)
+                    FROM products
+                """, (_timestamp(datetime.now()), trigger))
+                snapshot_id = tx.lastrowid
+                tx.execute("""
+                    INSERT INTO inventory_snapshot_items (snapshot_id, product_id, stock_quantity)
+                    SELECT ?, id, stock_quantity FROM products
+                """, (snapshot_id,))
+        except Exception as e:
+            print(f"Inventory snapshot error: {e}")
+            return None
+        return snapshot_id
+
+    def backfill(self):
+        """Replay inventory_log into checkpoints for the time before the first one
+
+        Checkpoints fall on every interval from the day after the first
+        movement. Totals use today's prices, as past prices are not kept.
+        Returns the number of checkpoints written.
+        """
+        span = self.db.execute_query(
+            "SELECT MIN(created_at) AS first, MAX(created_at) AS last FROM inventory_log")
+        if not span or span[0]['first'] is None:
+            return 0
+        first, last = span[0]['first'], span[0]['last']
+        # Up to the first existing checkpoint; past the last movement they
+        # would all be copies of one another
+        earliest = self.db.execute_query("SELECT MIN(taken_at) AS taken_at FROM inventory_snapshots")
+        until = earliest[0]['taken_at'] if earliest and earliest[0]['taken_at'] else None
+
+        products = self.db.execute_query("SELECT id, price, stock_quantity FROM products") or []
+        prices = {p['id']: p['price'] or 0.0 for p in products}
+        # Stock before each product's first movement; unmoved products keep today's
+        stock = {p['id']: p['stock_quantity'] for p in products}
+        for row in self.db.execute_query("""
+            SELECT l.product_id, l.new_quantity - l.quantity_change AS opening
+            FROM inventory_log l
+            JOIN (SELECT MIN(id) AS id FROM inventory_log GROUP BY product_id) f ON f.id = l.id
+        """) or []:
+            stock[row['product_id']] = row['opening']
+
+        boundary = datetime.strptime(first[:10], "%Y-%m-%d") + timedelta(days=1)
+        previous = first
+        written = 0
+        while previous <= last and (until is None or _timestamp(boundary) < until):
+            taken_at = _timestamp(boundary)
+            # One window at a time, so no read is open while checkpoints are written
+            for row in self.db.execute_query("""
+                SELECT product_id, new_quantity FROM inventory_log
+                WHERE created_at >= ? AND created_at < ? ORDER BY created_at, id
+            """, (previous, taken_at)) or []:
+                stock[row['product_id']] = row['new_quantity']
+            try:
+                with self.db.transaction(immediate=True) as tx:
+                    tx.execute("""
+                        INSERT INTO inventory_snapshots (taken_at, trigger, products, total_units, total_value)
+                        VALUES (?, 'backfill', ?, ?, ?)
+                    """, (taken_at, len(stock), sum(q or 0 for q in stock.values()),
+                          sum(prices.get(i, 0.0) * (q or 0) for i, q in stock.items())))
+                    snapshot_id = tx.lastrowid
+                    tx.execute_many("""
+                        INSERT INTO inventory_snapshot_items (snapshot_id, product_id, stock_quantity)
+                        VALUES (?, ?, ?)
+                    """, ((snapshot_id, i, q) for i, q in stock.items()))
+            except Exception as e:
+                print(f"Inventory backfill error: {e}")
+                break
+            written += 1
+            previous = taken_at
+            boundary += self.interval
+        return written
+
+    def _checkpoint_stock(self, snapshot_id, product_ids):
+        only, params = _only("product_id", product_ids)
+        rows = self.db.execute_query(f"""
+            SELECT product_id, stock_quantity FROM inventory_snapshot_items
+            WHERE snapshot_id = ?{only}
+        """, (snapshot_id, *params)) or []
+        return {row['product_id']: row['stock_quantity'] for row in rows}
+
+    def stock_at(self, at, product_ids=None):
+        """Stock per product at time at, as {product_id: stock_quantity}
+
+        Reads one checkpoint and the log between it and at, so the cost does
+        not grow with the length of the history. product_ids limits the
+        result to those products.
+        """
+        at = _timestamp(at)
+        only, params = _only("product_id", product_ids)
+        base = self.db.execute_query("""
+            SELECT id, taken_at FROM inventory_snapshots WHERE taken_at <= ?
+            ORDER BY taken_at DESC, id DESC LIMIT 1
+        """, (at,))
+        if base:
+            stock = self._checkpoint_stock(base[0]['id'], product_ids)
+            # Each product's latest movement up to at; the checkpoint's own
+            # second is re-read since movements in it may follow the copy
+            for row in self.db.execute_query(f"""
+                SELECT product_id, new_quantity FROM inventory_log WHERE id IN (
+                    SELECT MAX(id) FROM inventory_log
+                    WHERE created_at >= ? AND created_at <= ?{only}
+                    GROUP BY product_id)
+            """, (base[0]['taken_at'], at, *params)) or []:
+                stock[row['product_id']] = row['new_quantity']
+            return stock
+
+        after = self.db.execute_query("""
+            SELECT id, taken_at FROM inventory_snapshots ORDER BY taken_at, id LIMIT 1
+        """)
+        if after:
+            stock = self._checkpoint_stock(after[0]['id'], product_ids)
+            window, window_params = " AND created_at <= ?", [after[0]['taken_at']]
+        else:
+            products_only, products_params = _only("id", product_ids)
+            rows = self.db.execute_query(
+                f"SELECT id, stock_quantity FROM products WHERE 1 = 1{products_only}",
+                products_params) or []
+            stock = {row['id']: row['stock_quantity'] for row in rows}
+            window, window_params = "", []
+        # Stock just before each product's first movement after at
+        for row in self.db.execute_query(f"""
+            SELECT product_id, new_quantity - quantity_change AS stock_quantity
+            FROM inventory_log WHERE id IN (
+                SELECT MIN(id) FROM inventory_log
+                WHERE created_at > ?{window}{only}
+                GROUP BY product_id)
+        """, (at, *window_params, *params)) or []:
+            stock[row['product_id']] = row['stock_quantity']
+        return stock
+
+    def _series(self, start, end, opening, points, closing):
+        edges = pd.DataFrame({'date': pd.to_datetime([start, end]), 'stock': [opening, closing]})
+        return pd.concat([edges.iloc[:1], points, edges.iloc[1:]], ignore_index=True)
+
+    def stock_history(self, product_id, start, end=None):
+        """One product's stock from start to end as a step series
+
+        Returns a DataFrame of date and stock with a row at start, one per
+        movement and one at end; the stock holds until the next row.
+        """
+        start, end = _timestamp(start), _timestamp(end or datetime.now())
+        opening = self.stock_at(start, [product_id]).get(product_id)
+        moves = self.db.query_df("""
+            SELECT created_at AS date, new_quantity AS stock FROM inventory_log
+            WHERE product_id = ? AND created_at > ? AND created_at <= ?
+            ORDER BY created_at, id
+        """, (product_id, start, end), dtypes={'date': 'datetime64[ns]'})
+        closing = moves['stock'].iloc[-1] if len(moves) else opening
+        return self._series(start, end, opening, moves, closing)
+
+    def stock_trend(self, product_id, start, end=None):
+        """One product's stock at each checkpoint from start to end
+
+        Like stock_history but one row per checkpoint instead of per
+        movement, each a primary key lookup, for charts spanning years.
+        """
+        start, end = _timestamp(start), _timestamp(end or datetime.now())
+        points = self.db.query_df("""
+            SELECT s.taken_at AS date, i.stock_quantity AS stock
+            FROM inventory_snapshots s
+            JOIN inventory_snapshot_items i ON i.snapshot_id = s.id AND i.product_id = ?
+            WHERE s.taken_at > ? AND s.taken_at < ?
+            ORDER BY s.taken_at
+        """, (product_id, start, end), dtypes={'date': 'datetime64[ns]'})
+        return self._series(start, end, self.stock_at(start, [product_id]).get(product_id),
+                            points, self.stock_at(end, [product_id]).get(product_id))
+
+    def totals(self, start=None, end=None):
+        """Catalog-wide units and value at each checkpoint in [start, end)"""
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("taken_at >= ?")
+            params.append(_timestamp(start))
+        if end is not None:
+            conditions.append("taken_at < ?")
+            params.append(_timestamp(end))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.db.query_df(f"""
+            SELECT taken_at AS date, products, total_units, total_value
+            FROM inventory_snapshots {where} ORDER BY taken_at
+        """, params, dtypes={'date': 'datetime64[ns]'})
+
+    def is_due(self):
+        """Whether the latest checkpoint is older than the interval"""
+        result = self.db.execute_query("SELECT MAX(taken_at) AS taken_at FROM inventory_snapshots")
+        taken_at = result[0]['taken_at'] if result else None
+        return taken_at is None or taken_at <= _timestamp(datetime.now() - self.interval)
+
+    def _schedule_loop(self, poll_seconds):
+        try:
+            # History logged before the first checkpoint gets its own first
+            if not self.db.execute_query("SELECT 1 FROM inventory_snapshots LIMIT 1"):
+                self.backfill()
+        except Exception as e:
+            print(f"Inventory backfill error: {e}")
+        while True:
+            try:
+                if self.is_due():
+                    self.take_snapshot(trigger='scheduled')
+            except Exception as e:
+                print(f"Inventory snapshot scheduler error: {e}")
+            if self._stop.wait(poll_seconds):
+                return
+
+    def start_scheduler(self, poll_seconds=SNAPSHOT_POLL_SECONDS):
+        """Take a checkpoint now if one is due, then whenever the interval passes"""
+        if self._scheduler is not None and self._scheduler.is_alive():
+            return
+        self._stop.clear()
+        self._scheduler = threading.Thread(target=self._schedule_loop, args=(poll_seconds,),
+                                           name="inventory-snapshots", daemon=True)
+        self._scheduler.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._scheduler is not None:
+            self._scheduler.join(timeout)
@@ -0,0 +1,277 @@
+"""Receipt rendering for the app, batch reprints and the benchmark suite
+
+Kept apart from app.py, which imports Streamlit at module level, so the
+benchmarks and the batch-rendering worker processes can import it alone.
+"""
+import io
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from openpyxl import Workbook
+from reportlab import rl_config
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+# Business details printed in every receipt header and footer. A tuple so
+# it can key the template cache and be sent to worker processes.
+class BusinessProfile(namedtuple('BusinessProfile', [
+        'name', 'address', 'phone1', 'phone2', 'email', 'website', 'footer_message'])):
+    __slots__ = ()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Profile from a settings row, falling back to the defaults per field"""
+        settings = settings or {}
+        return cls(
+            name=settings.get('business_name') or DEFAULT_PROFILE.name,
+            address=settings.get('address') or DEFAULT_PROFILE.address,
+            phone1=settings.get('phone1') or DEFAULT_PROFILE.phone1,
+            phone2=settings.get('phone2') or DEFAULT_PROFILE.phone2,
+            email=settings.get('email') or DEFAULT_PROFILE.email,
+            website=settings.get('website') or DEFAULT_PROFILE.website,
+            footer_message=settings.get('receipt_footer') or DEFAULT_PROFILE.footer_message,
+        )
+
+DEFAULT_PROFILE = BusinessProfile(
+    name="Salphine Chemos Getaway Resort",
+    address="P.O. Box 19938 - 00202 KNH Nairobi",
+    phone1="+254 727 680 468",
+    phone2="+254 736 880 488",
+    email="info@lukenyagetaway.com",
+    website="www.salphinechemos.com",
+    footer_message="Thank you for your business!",
+)
+
+# Receipts are binary downloads, so skip reportlab's ASCII85 wrapper around
+# the compressed page streams (about a fifth of the render time)
+rl_config.useA85 = 0
+
+# Receipts per task sent to a batch worker process
+RECEIPT_BATCH_CHUNK = 50
+# A spawned worker takes about half a second to import, so by default each one
+# must have at least this many receipts to render
+RECEIPT_BATCH_MIN_PER_WORKER = 500
+
+class ReceiptTemplate:
+    """Receipt layout for one business profile
+    
+    The header and footer never change for a profile, so their text is laid
+    out once here. Documents of more than one page draw them once as PDF
+    forms that every page reuses; a single page draws them inline, which is
+    cheaper than a form. Item lines are split across as many pages as
+    needed, with the totals kept on the last page.
+    """
+    
+    LEFT, RIGHT = 50, 550
+    LINE_HEIGHT = 20
+    # Columns of the items table: Item, Qty, Price, Total
+    COLUMNS = (50, 350, 400, 500)
+    # Item rows stop above the footer
+    ITEMS_BOTTOM = 110
+    # Lines the totals block needs under the last item row
+    TOTALS_LINES = 6
+    
+    def __init__(self, profile=DEFAULT_PROFILE, pagesize=letter):
+        self.profile = profile
+        self.pagesize = pagesize
+        width, height = pagesize
+        center = width / 2
+        top = height - 42
+        
+        # (font, size, x, y, text) with centred lines measured once
+        def centred(font, size, y, text):
+            return (font, size, center - stringWidth(text, font, size) / 2, y, text)
+        self.header = [
+            centred("Helvetica-Bold", 16, top, profile.name.upper()),
+            centred("Helvetica", 10, top - 20, profile.address),
+            centred("Helvetica", 10, top - 35, f"Tel: {profile.phone1} | {profile.phone2}"),
+            centred("Helvetica", 10, top - 50, f"Email: {profile.email}"),
+        ]
+        self.header_rule = top - 60
+        self.footer = [
+            centred("Helvetica", 10, 70, profile.footer_message),
+            centred("Helvetica", 10, 55, f"Visit us: {profile.website}"),
+        ]
+        self.body_top = self.header_rule - self.LINE_HEIGHT
+        
+        # Page one carries the transaction details, later pages one line
+        first_rows = (self.body_top - 100 - self.LINE_HEIGHT - self.ITEMS_BOTTOM) // self.LINE_HEIGHT
+        later_rows = (self.body_top - 40 - self.LINE_HEIGHT - self.ITEMS_BOTTOM) // self.LINE_HEIGHT
+        self.rows_per_page = (int(first_rows), int(later_rows))
+    
+    def paginate(self, items):
+        """Split item lines into pages, leaving room for the totals on the last"""
+        pages = []
+        start = 0
+        while True:
+            capacity = self.rows_per_page[0 if not pages else 1]
+            remaining = len(items) - start
+            if remaining <= capacity - self.TOTALS_LINES:
+                pages.append(items[start:])
+                return pages
+            # Keep at least one line back so the totals never sit alone
+            take = min(capacity, remaining - 1)
+            pages.append(items[start:start + take])
+            start += take
+    
+    def _draw_static(self, c):
+        text = c.beginText()
+        for font, size, x, y, line in self.header + self.footer:
+            text.setFont(font, size)
+            text.setTextOrigin(x, y)
+            text.textLine(line)
+        c.drawText(text)
+        c.line(self.LEFT, self.header_rule, self.RIGHT, self.header_rule)
+    
+    def define_forms(self, c):
+        """Add the static header and footer to a canvas as a reusable form"""
+        c.beginForm("receipt_static")
+        self._draw_static(c)
+        c.endForm()
+    
+    def draw(self, c, receipt_data, pages=None, forms=False):
+        """Draw one receipt onto a canvas, page by page
+        
+        With forms, define_forms must have been called on the canvas.
+        """
+        pages = pages or self.paginate(receipt_data['items'])
+        left, line_height = self.LEFT, self.LINE_HEIGHT
+        x_item, x_qty, x_price, x_total = self.COLUMNS
+        
+        for number, page_items in enumerate(pages, 1):
+            if forms:
+                c.doForm("receipt_static")
+            else:
+                self._draw_static(c)
+            
+            text = c.beginText()
+            text.setFont("Helvetica", 10)
+            y = self.body_top
+            if number == 1:
+                details = [
+                    f"Transaction ID: {receipt_data['transaction_id']}",
+                    f"Date: {receipt_data['date']}",
+                    f"Customer: {receipt_data['customer_name']}",
+                    f"Cashier: {receipt_data['user']}",
+                ]
+                for detail in details:
+                    text.setTextOrigin(left, y)
+                    text.textLine(detail)
+                    y -= line_height
+            else:
+                text.setTextOrigin(left, y)
+                text.textLine(f"Transaction ID: {receipt_data['transaction_id']} (continued)")
+                y -= line_height
+            rule = y
+            y -= line_height
+            
+            for x, heading in zip(self.COLUMNS, ("Item", "Qty", "Price", "Total")):
+                text.setTextOrigin(x, y)
+                text.textLine(heading)
+            y -= line_height
+            for item in page_items:
+                for x, value in ((x_item, item['name'][:40]), (x_qty, str(item['quantity'])),
+                                 (x_price, f"KES {item['price']:,.2f}"),
+                                 (x_total, f"KES {item['total']:,.2f}")):
+                    text.setTextOrigin(x, y)
+                    text.textLine(value)
+                y -= line_height
+            
+            if len(pages) > 1:
+                text.setTextOrigin(left, 40)
+                text.textLine(f"Page {number} of {len(pages)}")
+            c.line(left, rule, self.RIGHT, rule)
+            
+            if number == len(pages):
+                c.line(left, y, self.RIGHT, y)
+                y -= line_height
+                text.setTextOrigin(x_price, y)
+                text.textLine(f"Subtotal: KES {receipt_data['subtotal']:,.2f}")
+                y -= line_height
+                text.setTextOrigin(x_price, y)
+                text.textLine(f"Tax ({receipt_data['tax_rate']}%): KES {receipt_data['tax_amount']:,.2f}")
+                y -= line_height
+                text.setFont("Helvetica-Bold", 14)
+                text.setTextOrigin(x_price, y)
+                text.textLine(f"TOTAL: KES {receipt_data['total']:,.2f}")
+                y -= 2 * line_height
+                text.setFont("Helvetica", 10)
+                text.setTextOrigin(left, y)
+                text.textLine(f"Payment Method: {receipt_data['payment_method']}")
+            c.drawText(text)
+            c.showPage()
+    
+    def render(self, receipts):
+        """Render receipts into one PDF document; returns its bytes"""
+        paginated = [(receipt_data, self.paginate(receipt_data['items'])) for receipt_data in receipts]
+        forms = sum(len(pages) for _, pages in paginated) > 1
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=self.pagesize)
+        if forms:
+            self.define_forms(c)
+        for receipt_data, pages in paginated:
+            self.draw(c, receipt_data, pages, forms)
+        c.save()
+        return buffer.getvalue()
+
+@lru_cache(maxsize=16)
+def get_receipt_template(profile=DEFAULT_PROFILE):
+    """The layout for a profile, built on first use (per process)"""
+    return ReceiptTemplate(profile)
+
+def render_pdf_receipt(receipt_data, profile=DEFAULT_PROFILE):
+    """Render a receipt as PDF bytes"""
+    return get_receipt_template(profile).render([receipt_data])
+
+def render_receipts_pdf(receipts, profile=DEFAULT_PROFILE):
+    """Render many receipts into a single PDF, e.g. for an end-of-day reprint"""
+    return get_receipt_template(profile).render(receipts)
+
+def _render_chunk(profile, receipts):
+    template = get_receipt_template(profile)
+    return [template.render([receipt_data]) for receipt_data in receipts]
+
+def render_receipts_batch(receipts, profile=DEFAULT_PROFILE, workers=None, chunk_size=RECEIPT_BATCH_CHUNK):
+    """Render receipts to one PDF each across a process pool
+    
+    Returns the PDF bytes in the order of receipts. workers defaults to
+    one per CPU, limited by RECEIPT_BATCH_MIN_PER_WORKER; with a single
+    worker the receipts render in the calling process. Workers are spawned rather
+    than forked because the app process runs threads and holds open
+    database connections; each builds its template once.
+    """
+    receipts = list(receipts)
+    chunks = [receipts[i:i + chunk_size] for i in range(0, len(receipts), chunk_size)]
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(receipts) // RECEIPT_BATCH_MIN_PER_WORKER)
+    workers = min(workers, len(chunks))
+    if workers <= 1:
+        return [pdf for chunk in chunks for pdf in _render_chunk(profile, chunk)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        rendered = pool.map(_render_chunk, [profile] * len(chunks), chunks)
+        return [pdf for chunk in rendered for pdf in chunk]
+
+def render_excel_receipt(receipt_data):
+    """Render a receipt as an Excel workbook (Items and Summary sheets)"""
+    # Write-only sheets stream rows instead of building a cell grid
+    workbook = Workbook(write_only=True)
+    
+    items = workbook.create_sheet('Items')
+    items.append(['Item Name', 'Quantity', 'Unit Price (KES)', 'Total (KES)'])
+    for item in receipt_data['items']:
+        items.append([item['name'], item['quantity'], item['price'], item['total']])
+    
+    summary = workbook.create_sheet('Summary')
+    summary.append(['Transaction ID', 'Date', 'Customer', 'Cashier', 'Subtotal (KES)', 'Tax Rate (%)',
+                    'Tax Amount (KES)', 'Total (KES)', 'Payment Method'])
+    summary.append([receipt_data['transaction_id'], receipt_data['date'], receipt_data['customer_name'],
+                    receipt_data['user'], receipt_data['subtotal'], receipt_data['tax_rate'],
+                    receipt_data['tax_amount'], receipt_data['total'], receipt_data['payment_method']])
+    
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
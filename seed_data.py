@@ -0,0 +1,384 @@
+"""Synthetic data generator for scale testing
+
+Builds products, users, sales and inventory_log histories with NumPy and
+bulk-loads them into a sales database. Sales follow a yearly and weekly
+season, an intraday rush pattern and Zipf-skewed product popularity, and
+are grouped into multi-line transactions like real checkouts.
+
+Usage: python seed_data.py [--sales 1000000] [--products 2000] [--days 365] [--db sales_system.db]
+"""
+import argparse
+import hashlib
+import time
+
+import numpy as np
+
+from database import Database, rebuild_sales_aggregates
+
+CATEGORIES = ['Beverages', 'Food', 'Dessert', 'Snacks', 'Other']
+CATEGORY_WEIGHTS = [0.3, 0.3, 0.15, 0.15, 0.1]
+# Median price per category; actual prices are log-normal around it
+CATEGORY_PRICES = {'Beverages': 120, 'Food': 450, 'Dessert': 220, 'Snacks': 90, 'Other': 300}
+
+PAYMENT_METHODS = ['Cash', 'M-Pesa', 'Credit Card', 'Debit Card', 'Bank Transfer']
+PAYMENT_WEIGHTS = [0.3, 0.4, 0.15, 0.12, 0.03]
+
+ADJECTIVES = ['Classic', 'Fresh', 'Spicy', 'Sweet', 'Large', 'Small', 'Iced', 'Hot', 'Organic',
+              'Premium', 'House', 'Double', 'Mini', 'Grilled', 'Crispy', 'Creamy', 'Local', 'Golden']
+NOUNS = {
+    'Beverages': ['Coffee', 'Tea', 'Juice', 'Soda', 'Water', 'Smoothie', 'Latte', 'Lemonade'],
+    'Food': ['Burger', 'Sandwich', 'Pizza', 'Wrap', 'Salad', 'Chicken', 'Pasta', 'Stew'],
+    'Dessert': ['Cake', 'Ice Cream', 'Brownie', 'Pie', 'Muffin', 'Cookie', 'Pudding'],
+    'Snacks': ['Crisps', 'Nuts', 'Samosa', 'Popcorn', 'Chips', 'Mandazi', 'Bites'],
+    'Other': ['Souvenir', 'Towel', 'Sunscreen', 'Postcard', 'Umbrella', 'Candle'],
+}
+
+# Relative sales per weekday, Monday first
+WEEKDAY_FACTORS = [0.85, 0.9, 0.95, 1.0, 1.15, 1.3, 1.1]
+# Relative sales per hour of day: breakfast, lunch and dinner rushes
+HOUR_FACTORS = [0.1, 0.05, 0.02, 0.02, 0.05, 0.2, 0.6, 1.2, 1.4, 1.0, 0.9, 1.3,
+                2.0, 2.1, 1.3, 0.9, 0.9, 1.2, 1.8, 2.0, 1.6, 1.0, 0.6, 0.3]
+
+# Restocks arrive on Monday mornings at this hour
+RESTOCK_HOUR = 6
+
+DEFAULT_PASSWORD = 'password123'
+TAX_RATE = 0.16
+
+
+def popularity(rng, n_products, skew=1.1):
+    """Zipf-like sale probability per product, in random product order"""
+    ranks = rng.permutation(n_products) + 1
+    weights = 1.0 / ranks ** skew
+    return weights / weights.sum()
+
+
+def day_weights(rng, start, days, growth=0.2):
+    """Relative sales volume per day: yearly season, weekday, trend and noise"""
+    dates = np.datetime64(start, 'D') + np.arange(days)
+    day_of_year = (dates - dates.astype('datetime64[Y]')).astype(int)
+    # 1970-01-01 was a Thursday, so shift to make Monday weekday 0
+    weekdays = (dates.astype(int) + 3) % 7
+    yearly = 1 + 0.25 * np.cos(2 * np.pi * (day_of_year - 355) / 365.25)
+    trend = 1 + growth * np.arange(days) / max(days, 1)
+    noise = rng.gamma(20.0, 1 / 20.0, days)
+    weights = yearly * np.asarray(WEEKDAY_FACTORS)[weekdays] * trend * noise
+    return dates, weights / weights.sum()
+
+
+def generate_products(rng, n_products):
+    """Return product name, category and price columns"""
+    categories = rng.choice(len(CATEGORIES), n_products, p=CATEGORY_WEIGHTS)
+    medians = np.array([CATEGORY_PRICES[c] for c in CATEGORIES], dtype=float)[categories]
+    prices = np.round(medians * rng.lognormal(0.0, 0.35, n_products) / 5) * 5
+    adjectives = rng.integers(0, len(ADJECTIVES), n_products)
+    nouns = rng.integers(0, 1 << 16, n_products)
+    names = []
+    for i in range(n_products):
+        category = CATEGORIES[categories[i]]
+        nouns_for_category = NOUNS[category]
+        names.append(f"{ADJECTIVES[adjectives[i]]} {nouns_for_category[nouns[i] % len(nouns_for_category)]} {i + 1}")
+    return {
+        'name': names,
+        'category': [CATEGORIES[c] for c in categories],
+        'price': np.maximum(prices, 5.0),
+    }
+
+
+def generate_users(rng, n_users):
+    """Return (username, password hash, role, email) rows for cashiers and managers"""
+    password = hashlib.sha256(DEFAULT_PASSWORD.encode()).hexdigest()
+    n_managers = max(1, n_users // 10)
+    rows = []
+    for i in range(n_users):
+        role = 'manager' if i < n_managers else 'clerk'
+        username = f"seed_{role}{i + 1}"
+        rows.append((username, password, role, f"{username}@example.com"))
+    return rows
+
+
+def generate_sales(rng, n_lines, dates, weights, product_weights, prices, user_ids, chunk_size):
+    """Yield time-ordered chunks of sale lines as dicts of NumPy arrays
+
+    Lines are grouped into transactions that share a timestamp, cashier and
+    payment method. Each chunk covers whole days.
+    """
+    per_day = rng.multinomial(n_lines, weights)
+    hour_p = np.asarray(HOUR_FACTORS) / sum(HOUR_FACTORS)
+    cdf = np.cumsum(product_weights)
+    txn_offset = 0
+
+    day = 0
+    while day < len(dates):
+        # Take whole days until the chunk is full
+        end = day + 1
+        total = per_day[day]
+        while end < len(dates) and total + per_day[end] <= chunk_size:
+            total += per_day[end]
+            end += 1
+        counts = per_day[day:end]
+        line_days = np.repeat(np.arange(day, end), counts)
+        day = end
+        if total == 0:
+            continue
+
+        # A line starts a new transaction with p=0.55 (mean 1.8 lines), and
+        # every day starts a fresh one
+        starts = rng.random(total) < 0.55
+        starts[0] = True
+        starts[1:] |= line_days[1:] != line_days[:-1]
+        txn_of_line = np.cumsum(starts) - 1
+        n_txn = int(txn_of_line[-1]) + 1
+        txn_days = line_days[starts]
+
+        # Transaction times in order within each day
+        seconds = rng.choice(24, n_txn, p=hour_p) * 3600 + rng.integers(0, 3600, n_txn)
+        order = np.lexsort((seconds, txn_days))
+        seconds = seconds[order]
+        txn_times = dates[txn_days].astype('datetime64[s]') + seconds.astype('timedelta64[s]')
+
+        products = np.minimum(np.searchsorted(cdf, rng.random(total)), len(cdf) - 1)
+        quantities = np.minimum(1 + rng.poisson(0.6, total), 10)
+        unit_prices = prices[products]
+        totals = unit_prices * quantities
+
+        yield {
+            'transaction': txn_of_line + txn_offset,
+            'sale_time': txn_times[txn_of_line],
+            'product': products,
+            'quantity': quantities,
+            'unit_price': unit_prices,
+            'total_price': totals,
+            'tax_amount': np.round(totals * TAX_RATE, 2),
+            'payment_method': rng.choice(len(PAYMENT_METHODS), n_txn, p=PAYMENT_WEIGHTS)[txn_of_line],
+            'user_id': np.asarray(user_ids)[rng.integers(0, len(user_ids), n_txn)][txn_of_line],
+        }
+        txn_offset += n_txn
+
+
+def stock_levels(changes, products, carry):
+    """Running stock after each event, continuing from carry (updated in place)
+
+    Stock never goes below zero: an event taking more than is left takes
+    only what is left. changes and products are in time order; returns the
+    levels and the changes actually applied, both in the same order.
+    """
+    order = np.argsort(products, kind='stable')
+    sorted_products = products[order]
+    sorted_changes = changes[order]
+    running = np.cumsum(sorted_changes)
+    first = np.r_[True, sorted_products[1:] != sorted_products[:-1]]
+    group = np.cumsum(first) - 1
+    group_start = np.flatnonzero(first)
+    # Cumulative sum within each product group, plus its carried stock
+    unclamped = running - (running - sorted_changes)[group_start][group] + carry[sorted_products]
+    # Flooring a running sum at zero lifts it by how far its running minimum
+    # has dipped below zero. Shifting each later group down by more than the
+    # whole range keeps one minimum.accumulate from crossing groups.
+    span = int(unclamped.max() - unclamped.min()) + 1 if len(unclamped) else 1
+    shift = group * span
+    lowest = np.minimum.accumulate(unclamped - shift) + shift
+    levels_sorted = unclamped + np.maximum(0, -lowest)
+    previous = np.r_[0, levels_sorted[:-1]]
+    previous[first] = carry[sorted_products[first]]
+    applied_sorted = levels_sorted - previous
+
+    last = np.r_[first[1:], True]
+    carry[sorted_products[last]] = levels_sorted[last]
+    levels = np.empty_like(levels_sorted)
+    levels[order] = levels_sorted
+    applied = np.empty_like(applied_sorted)
+    applied[order] = applied_sorted
+    return levels, applied
+
+
+def weekly_restocks(sale_times, sale_products, quantities, n_products, unsold):
+    """Monday-morning restocks replacing what sold since the previous one
+
+    unsold carries per-product sales not yet restocked across chunks and is
+    updated in place. Returns (times, products, quantities) of the restocks.
+    """
+    first_day = sale_times[0].astype('datetime64[D]')
+    last_day = sale_times[-1].astype('datetime64[D]')
+    mondays = np.arange(first_day, last_day + 1)
+    mondays = mondays[(mondays.astype(int) + 3) % 7 == 0]
+    restock_at = mondays.astype('datetime64[s]') + np.timedelta64(RESTOCK_HOUR * 3600, 's')
+
+    # Bucket k holds sales between restock k-1 and restock k
+    buckets = np.searchsorted(restock_at, sale_times, side='right')
+    sold = np.bincount(buckets * n_products + sale_products, weights=quantities,
+                       minlength=(len(mondays) + 1) * n_products)
+    sold = sold.reshape(len(mondays) + 1, n_products).astype(np.int64)
+    sold[0] += unsold
+    unsold[:] = sold[-1]
+
+    amounts = sold[:-1].ravel()
+    restocked = amounts > 0
+    times = np.repeat(restock_at, n_products)[restocked]
+    products = np.tile(np.arange(n_products), len(mondays))[restocked]
+    return times, products, amounts[restocked]
+
+
+def _format_times(times):
+    return np.char.replace(np.datetime_as_string(times, unit='s'), 'T', ' ').tolist()
+
+
+def _suspend(conn, tables):
+    """Drop indexes and triggers on tables, returning the SQL to restore them"""
+    rows = conn.execute(f"""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+          AND tbl_name IN ({', '.join('?' for _ in tables)})
+    """, tables).fetchall()
+    for kind, name, _ in rows:
+        conn.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+    return [sql for _, _, sql in rows]
+
+
+def seed(db, n_products=2000, n_users=25, n_sales=1_000_000, days=365, start='2024-01-01',
+         seed=42, chunk_size=200_000, skew=1.1, reset=False):
+    """Generate and bulk-load a synthetic dataset into db; returns row counts"""
+    rng = np.random.default_rng(seed)
+    counts = {'products': 0, 'users': 0, 'sales': 0, 'inventory_log': 0}
+
+    with db.connection() as conn:
+        if reset:
+            # Without triggers on sales, DELETE truncates instead of going row by row
+            with db.transaction():
+                restore = _suspend(conn, ['sales', 'inventory_log'])
+                # Inventory checkpoints would point at the deleted products
+                for table in ('sales', 'inventory_log', 'inventory_snapshot_items', 'inventory_snapshots',
+                              'products'):
+                    conn.execute(f"DELETE FROM {table}")
+                conn.execute("DELETE FROM users WHERE username LIKE 'seed\\_%' ESCAPE '\\'")
+                for sql in restore:
+                    conn.execute(sql)
+                rebuild_sales_aggregates(conn)
+
+        # Products: expected weekly demand sets opening stock and thresholds
+        product_weights = popularity(rng, n_products, skew)
+        weekly_demand = n_sales / max(days, 1) * 7 * product_weights * 1.6
+        opening = np.ceil(weekly_demand * 2.5).astype(np.int64) + 10
+        min_levels = np.maximum(5, np.ceil(weekly_demand * 0.5)).astype(np.int64)
+        columns = generate_products(rng, n_products)
+        result = db.execute_many("""
+            INSERT INTO products (name, category, price, stock_quantity, min_stock_level,
+                                  max_stock_level, description)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, zip(columns['name'], columns['category'], columns['price'].tolist(),
+                 opening.tolist(), min_levels.tolist(), (opening * 2).tolist(),
+                 (f"Synthetic {c.lower()} item" for c in columns['category'])),
+            return_ids=True)
+        product_ids = np.asarray(result['row_ids'], dtype=np.int64)
+        counts['products'] = n_products
+
+        db.execute_many("""
+            INSERT OR IGNORE INTO users (username, password, role, email) VALUES (?, ?, ?, ?)
+        """, generate_users(rng, n_users))
+        user_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM users WHERE username LIKE 'seed\\_%' ESCAPE '\\' ORDER BY id")] or [1]
+        counts['users'] = len(user_ids)
+
+        # Bulk load without per-row index and rollup trigger maintenance. One
+        # transaction covers dropping, loading and restoring them, so a run
+        # killed midway rolls back to the database it started from.
+        with db.transaction():
+            restore = _suspend(conn, ['sales', 'inventory_log'])
+            dates, weights = day_weights(rng, start, days)
+            stock = opening.copy()
+            unsold = np.zeros(n_products, dtype=np.int64)
+            for chunk in generate_sales(rng, n_sales, dates, weights, product_weights,
+                                        columns['price'], user_ids, chunk_size):
+                started = time.perf_counter()
+                n = len(chunk['product'])
+                times = _format_times(chunk['sale_time'])
+                stamps = [t.replace('-', '').replace(':', '').replace(' ', '') for t in times]
+                txn_ids = [f"TXN{stamp}{txn:08x}" for stamp, txn in zip(stamps, chunk['transaction'].tolist())]
+                line_products = product_ids[chunk['product']]
+                methods = np.asarray(PAYMENT_METHODS, dtype=object)[chunk['payment_method']]
+
+                restock_times, restock_products, restock_amounts = weekly_restocks(
+                    chunk['sale_time'], chunk['product'], chunk['quantity'], n_products, unsold)
+
+                # Merge sale and restock events in time order for stock levels
+                event_times = np.concatenate([chunk['sale_time'], restock_times])
+                event_products = np.concatenate([chunk['product'], restock_products])
+                event_changes = np.concatenate([-chunk['quantity'], restock_amounts])
+                order = np.argsort(event_times, kind='stable')
+                levels = np.empty(len(order), dtype=np.int64)
+                applied = np.empty(len(order), dtype=np.int64)
+                levels[order], applied[order] = stock_levels(
+                    event_changes[order], event_products[order], stock)
+
+                # A line short of stock sells what was left; one finding none is dropped
+                quantities = -applied[:n]
+                sold = np.flatnonzero(quantities > 0)
+                quantities = quantities[sold]
+                totals = chunk['unit_price'][sold] * quantities
+                moved = order[applied[order] != 0]
+
+                with db.transaction():
+                    conn.executemany("""
+                        INSERT INTO sales (transaction_id, product_id, quantity, unit_price, total_price,
+                                           tax_amount, payment_method, user_id, sale_date)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, zip((txn_ids[i] for i in sold.tolist()), line_products[sold].tolist(),
+                             quantities.tolist(), chunk['unit_price'][sold].tolist(), totals.tolist(),
+                             np.round(totals * TAX_RATE, 2).tolist(), methods[sold].tolist(),
+                             chunk['user_id'][sold].tolist(), (times[i] for i in sold.tolist())))
+                    event_ids = product_ids[event_products[moved]].tolist()
+                    actions = np.where(moved < n, 'sale', 'restock').tolist()
+                    notes = txn_ids + [None] * len(restock_times)
+                    users = chunk['user_id'].tolist() + [None] * len(restock_times)
+                    conn.executemany("""
+                        INSERT INTO inventory_log (product_id, action, quantity_change, new_quantity,
+                                                   user_id, notes, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, zip(event_ids, actions, applied[moved].tolist(), levels[moved].tolist(),
+                             (users[i] for i in moved.tolist()), (notes[i] for i in moved.tolist()),
+                             _format_times(event_times[moved])))
+                counts['sales'] += len(sold)
+                counts['inventory_log'] += len(moved)
+                print(f"Loaded {counts['sales']:,} sales ({n / (time.perf_counter() - started):,.0f} rows/s)")
+
+            started = time.perf_counter()
+            for sql in restore:
+                conn.execute(sql)
+            rebuild_sales_aggregates(conn)
+            print(f"Rebuilt indexes, triggers and the daily rollups in {time.perf_counter() - started:.1f}s")
+
+            # Current stock is wherever the simulated history ended
+            conn.executemany("UPDATE products SET stock_quantity = ? WHERE id = ?",
+                             zip(stock.tolist(), product_ids.tolist()))
+        conn.execute("ANALYZE")
+    db.catalog.invalidate()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="sales_system.db")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=25)
+    parser.add_argument("--sales", type=int, default=1_000_000, help="sale lines to generate")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--start", default="2024-01-01", help="first sale date (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=200_000, help="sale lines per load batch")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of product popularity")
+    parser.add_argument("--reset", action="store_true",
+                        help="delete existing products, sales, inventory_log and seeded users first")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    started = time.perf_counter()
+    counts = seed(db, n_products=args.products, n_users=args.users, n_sales=args.sales,
+                  days=args.days, start=args.start, seed=args.seed, chunk_size=args.chunk_size,
+                  skew=args.skew, reset=args.reset)
+    elapsed = time.perf_counter() - started
+    print(", ".join(f"{count:,} {table}" for table, count in counts.items()) + f" in {elapsed:.1f}s")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
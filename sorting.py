@@ -0,0 +1,104 @@
+import threading
+
+import numpy as np
+
+def _sort_value(value):
+    """Sort key that places missing values after everything else"""
+    return (value is None, value)
+
+def _normalize_keys(keys):
+    """Accept 'name', ('price', True) or a list of either"""
+    if isinstance(keys, (str, tuple)):
+        keys = [keys]
+    return [(key, False) if isinstance(key, str) else (key[0], bool(key[1])) for key in keys]
+
+def _sort_list(items, keys):
+    """Stable multi-key sort of items without cached rankings"""
+    result = list(items)
+    # Python's sort is stable, reverse=True included, so sort least
+    # significant key first
+    for key, descending in reversed(_normalize_keys(keys)):
+        result.sort(key=lambda p: _sort_value(p.get(key)), reverse=descending)
+    return result
+
+class CatalogSorter:
+    """Stable multi-key product sorting backed by cached per-key rankings
+
+    The first sort on a key ranks the whole catalog once; later sorts of the
+    catalog or any subset of it reuse that ranking until the catalog changes.
+    """
+
+    def __init__(self):
+        self.catalog = None
+        self.version = None
+        self._positions = {}
+        self._ranks = {}
+        self.rebuilds = 0
+        self.fallbacks = 0
+        # Shared between Streamlit sessions, so guard the cached state
+        self._lock = threading.Lock()
+
+    def load(self, catalog, version=None):
+        """Use a new catalog and drop the cached rankings"""
+        self.catalog = catalog
+        self.version = version
+        self._positions = {p['id']: i for i, p in enumerate(catalog)}
+        self._ranks = {}
+
+    def _ensure_catalog(self, catalog, version):
+        # Same version token, or the very same list object, means unchanged
+        if version is not None:
+            changed = version != self.version
+        else:
+            changed = catalog is not self.catalog
+        if changed:
+            self.load(catalog, version)
+
+    def _rank(self, key):
+        """Dense rank of every catalog entry for one key (ties share a rank)"""
+        ranks = self._ranks.get(key)
+        if ranks is None:
+            values = [_sort_value(p.get(key)) for p in self.catalog]
+            order = sorted(range(len(values)), key=values.__getitem__)
+            ranks = np.empty(len(values), dtype=np.int64)
+            rank, previous = -1, None
+            for position in order:
+                if rank < 0 or values[position] != previous:
+                    rank += 1
+                    previous = values[position]
+                ranks[position] = rank
+            self._ranks[key] = ranks
+            self.rebuilds += 1
+        return ranks
+
+    def sort(self, catalog, keys='name', items=None, version=None):
+        """Return items (default: the whole catalog) ordered by keys
+
+        keys is a key name, a (key, descending) pair or a list of them, most
+        significant first. Equal entries keep their catalog order. Items
+        missing from catalog (added since it was read) are sorted directly.
+        """
+        with self._lock:
+            self._ensure_catalog(catalog, version)
+            if items is None:
+                positions = np.arange(len(catalog))
+            elif any(p['id'] not in self._positions for p in items):
+                self.fallbacks += 1
+                return _sort_list(items, keys)
+            else:
+                positions = np.fromiter((self._positions[p['id']] for p in items),
+                                        dtype=np.int64, count=len(items))
+            if len(positions) == 0:
+                return []
+
+            columns = []
+            for key, descending in _normalize_keys(keys):
+                ranks = self._rank(key)[positions]
+                columns.append(-ranks if descending else ranks)
+        # lexsort treats its last column as the primary key and is stable
+        order = np.lexsort(columns[::-1])
+        return [catalog[positions[i]] for i in order]
+
+def sort_products(products, keys='name'):
+    """One-off stable multi-key sort of a product list"""
+    return CatalogSorter().sort(products, keys)
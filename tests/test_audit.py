@@ -0,0 +1,56 @@
+import csv
+from datetime import datetime, timedelta
+
+from audit import AuditLog, export_audit_csv
+from database import local_timestamp
+
+
+def _count(db):
+    return db.execute_query("SELECT COUNT(*) AS n FROM audit_log")[0]['n']
+
+
+def test_queued_entries_are_written_on_flush(db):
+    audit_log = AuditLog(db)
+    try:
+        before = local_timestamp()
+        for n in range(20):
+            assert audit_log.record('Sale', user_id=1, username='till', details=f"sale {n}")
+        assert audit_log.flush(timeout=5)
+        assert _count(db) == 20
+        assert audit_log.stats()['audit_written'] == 20
+
+        entry = audit_log.search(events=['Sale'], limit=1)[0]
+        assert entry['category'] == 'activity'
+        assert before <= entry['created_at'] <= local_timestamp()
+    finally:
+        audit_log.close()
+
+
+def test_close_drains_the_queue(db):
+    audit_log = AuditLog(db, batch_size=7)
+    for n in range(100):
+        audit_log.record('Login', username=f"user{n}")
+    audit_log.close(timeout=5)
+
+    assert _count(db) == 100
+    assert audit_log.batches >= 100 // 7
+    assert db.execute_query("SELECT DISTINCT category FROM audit_log")[0]['category'] == 'security'
+    assert not audit_log.record('Logout')
+
+
+def test_purge_and_csv_export(db, tmp_path):
+    audit_log = AuditLog(db)
+    try:
+        audit_log.record('Sale', details='recent')
+        audit_log.flush(timeout=5)
+        db.execute_many("""
+            INSERT INTO audit_log (created_at, event, category, status) VALUES (?, 'Sale', 'activity', 'SUCCESS')
+        """, [(local_timestamp(datetime.now() - timedelta(days=120)),)])
+
+        assert audit_log.purge() == 1
+        path = export_audit_csv(db, str(tmp_path / "audit.csv"))
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        assert [row['details'] for row in rows] == ['recent']
+    finally:
+        audit_log.close()
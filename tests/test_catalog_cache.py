@@ -0,0 +1,34 @@
+def _names(db):
+    return {p['id']: p['name'] for p in db.get_products()}
+
+
+def test_edits_after_a_future_dated_row_are_picked_up(db):
+    product_id = db.get_products()[0]['id']
+    # e.g. a Parquet import carrying another clock's timestamps
+    db.execute_query("""
+        INSERT INTO products (name, price, stock_quantity, updated_at)
+        VALUES ('Imported', 10.0, 5, '2999-01-01 00:00:00')
+    """)
+    assert 'Imported' in _names(db).values()
+
+    db.execute_query("UPDATE products SET name = 'Renamed' WHERE id = ?", (product_id,))
+    assert _names(db)[product_id] == 'Renamed'
+    assert db.catalog.get_product(product_id)['name'] == 'Renamed'
+
+
+def test_inserts_and_deletes_are_picked_up(db):
+    before = _names(db)
+    product_id = db.add_product({'name': 'Chai', 'price': 50.0, 'stock_quantity': 10})
+    assert _names(db)[product_id] == 'Chai'
+
+    db.execute_query("DELETE FROM products WHERE id = ?", (product_id,))
+    assert _names(db) == before
+    assert db.catalog.get_product(product_id) is None
+
+
+def test_unchanged_catalog_is_served_from_cache(db):
+    db.get_products()
+    misses = db.catalog.misses
+    db.execute_query("UPDATE settings SET business_name = 'Shop'")
+    db.get_products()
+    assert db.catalog.misses == misses
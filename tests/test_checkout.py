@@ -0,0 +1,46 @@
+import itertools
+import threading
+
+import database
+
+
+def stock_products(db, count=5):
+    db.execute_query("DELETE FROM products")
+    db.execute_many("INSERT INTO products (id, name, price, stock_quantity) VALUES (?, ?, 10.0, 100000)",
+                    [(i, f"Item {i}") for i in range(1, count + 1)])
+
+
+def test_concurrent_checkouts_get_distinct_transaction_ids(db):
+    stock_products(db)
+    tills, sales = 8, 200
+    ids = [[] for _ in range(tills)]
+
+    def till(slot):
+        for n in range(sales):
+            sale = db.checkout([{'id': n % 5 + 1, 'price': 10.0, 'quantity': 1}], user_id=1)
+            assert sale['success']
+            ids[slot].append(sale['transaction_id'])
+
+    threads = [threading.Thread(target=till, args=(i,)) for i in range(tills)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    issued = [txn for per_till in ids for txn in per_till]
+    assert len(set(issued)) == tills * sales
+    assert db.execute_query("SELECT COUNT(DISTINCT transaction_id) AS n FROM sales")[0]['n'] == tills * sales
+    assert db.count_transactions() == tills * sales
+
+
+def test_checkout_regenerates_a_colliding_transaction_id(db, monkeypatch):
+    stock_products(db)
+    tokens = itertools.chain(['00000000000000AA'] * 3, ['00000000000000BB'])
+    monkeypatch.setattr(database.secrets, 'token_hex', lambda nbytes: next(tokens))
+
+    first = db.checkout([{'id': 1, 'price': 10.0, 'quantity': 1}])
+    second = db.checkout([{'id': 2, 'price': 10.0, 'quantity': 1}])
+
+    assert first['transaction_id'].endswith('AA')
+    assert second['transaction_id'].endswith('BB')
+    assert db.execute_query("SELECT COUNT(DISTINCT transaction_id) AS n FROM sales")[0]['n'] == 2
@@ -0,0 +1,43 @@
+import time
+from datetime import datetime, timedelta
+
+from jobs import JobRunner
+
+
+def _wait(runner, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = runner.get(job_id)
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_timestamps_share_the_local_clock(db, tmp_path, nairobi_tz):
+    runner = JobRunner(db, output_dir=str(tmp_path / "exports"))
+    try:
+        before = datetime.now().replace(microsecond=0)
+        job = _wait(runner, runner.submit('export_csv', {'table': 'products'}))
+        after = datetime.now()
+        assert job['status'] == 'success'
+        stamps = [datetime.strptime(job[column], "%Y-%m-%d %H:%M:%S")
+                  for column in ('created_at', 'started_at', 'finished_at')]
+        assert before <= stamps[0] <= stamps[1] <= stamps[2] <= after
+
+        # Only outputs older than the cutoff are purged
+        assert runner.purge(timedelta(hours=1)) == 0
+    finally:
+        runner.shutdown()
+
+
+def test_jobs_are_listed_per_user(db, tmp_path):
+    runner = JobRunner(db, output_dir=str(tmp_path / "exports"))
+    try:
+        own = _wait(runner, runner.submit('export_csv', {'table': 'products'}, user_id=1))
+        _wait(runner, runner.submit('export_csv', {'table': 'products'}, user_id=2))
+        assert [job['id'] for job in runner.jobs(1)] == [own['id']]
+        # A session without a user id sees nobody's jobs
+        assert runner.jobs(None) == []
+    finally:
+        runner.shutdown()
@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+
+from ledger import InventoryLedger
+
+
+def test_checkpoints_and_movements_share_the_local_clock(db, nairobi_tz):
+    ledger = InventoryLedger(db)
+    before = datetime.now().replace(microsecond=0)
+    snapshot_id = ledger.take_snapshot()
+    taken_at = db.execute_query("SELECT taken_at FROM inventory_snapshots WHERE id = ?",
+                                (snapshot_id,))[0]['taken_at']
+    assert before <= datetime.strptime(taken_at, "%Y-%m-%d %H:%M:%S") <= datetime.now()
+    assert not ledger.is_due()
+
+    product = db.execute_query("SELECT id, stock_quantity FROM products ORDER BY id LIMIT 1")[0]
+    db.update_product(product['id'], {'stock_quantity': product['stock_quantity'] + 5})
+    logged = db.execute_query("SELECT created_at FROM inventory_log WHERE product_id = ?",
+                              (product['id'],))[0]['created_at']
+    assert before <= datetime.strptime(logged, "%Y-%m-%d %H:%M:%S") <= datetime.now()
+
+    # A local date range around today sees the edit
+    today = datetime.now().date()
+    history = ledger.stock_history(product['id'], today, today + timedelta(days=1))
+    assert history['stock'].tolist()[-1] == product['stock_quantity'] + 5
+    assert ledger.stock_at(datetime.now())[product['id']] == product['stock_quantity'] + 5
@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+
+def test_boolean_columns_round_trip(db, tmp_path):
+    db.execute_many("INSERT INTO users (username, password, role, is_active) VALUES (?, ?, 'clerk', ?)",
+                    [('inactive', 'x', 0), ('unknown', 'x', None)])
+    expected = db.execute_query("SELECT * FROM users ORDER BY id")
+    for table in ('users', 'settings'):
+        assert db.export_to_parquet(table, str(tmp_path / f"{table}.parquet")) is not None
+
+    assert db.import_from_parquet('users', str(tmp_path / "users.parquet"), replace=True) == len(expected)
+    assert db.execute_query("SELECT * FROM users ORDER BY id") == expected
+
+
+def test_replacing_products_recategorizes_rollup(db, tmp_path):
+    product = db.execute_query("SELECT id, price, category FROM products ORDER BY id LIMIT 1")[0]
+    assert db.checkout([{'id': product['id'], 'price': product['price'], 'quantity': 2}])['success']
+
+    db.execute_query("UPDATE products SET category = 'Moved' WHERE id = ?", (product['id'],))
+    path = str(tmp_path / "products.parquet")
+    assert db.export_to_parquet('products', path) is not None
+    db.execute_query("UPDATE products SET category = ? WHERE id = ?", (product['category'], product['id']))
+
+    assert db.import_from_parquet('products', path, replace=True) is not None
+    categories = db.execute_query("SELECT DISTINCT category FROM sales_daily_rollup WHERE product_id = ?",
+                                  (product['id'],))
+    assert [row['category'] for row in categories] == ['Moved']
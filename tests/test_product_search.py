@@ -0,0 +1,34 @@
+import pytest
+
+
+@pytest.fixture
+def fts_db(db):
+    if not db.has_full_text_search():
+        pytest.skip("SQLite built without FTS5")
+    return db
+
+
+def _found(db, term):
+    return [p['id'] for p in db.search_products(term)]
+
+
+def test_index_follows_product_inserts_updates_and_deletes(fts_db):
+    db = fts_db
+    product_id = db.add_product({'name': 'Masala Chai', 'category': 'Beverages', 'price': 80.0,
+                                 'stock_quantity': 10})
+    assert _found(db, 'masala') == [product_id]
+
+    db.update_product(product_id, {'name': 'Dawa Tea', 'category': 'Herbal'})
+    assert _found(db, 'dawa') == [product_id]
+    assert _found(db, 'herb') == [product_id]
+    assert _found(db, 'masala') == []
+
+    # Stock-only changes leave the entry alone
+    db.update_product(product_id, {'stock_quantity': 3})
+    assert _found(db, 'dawa tea') == [product_id]
+
+    db.execute_query("DELETE FROM products WHERE id = ?", (product_id,))
+    assert _found(db, 'dawa') == []
+
+    indexed = db.execute_query("SELECT COUNT(*) AS n FROM products_fts")[0]['n']
+    assert indexed == db.execute_query("SELECT COUNT(*) AS n FROM products")[0]['n']
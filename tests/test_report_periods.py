@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+from database import resolve_report_period
+
+
+def _sell(db):
+    product = db.execute_query("SELECT id, price FROM products ORDER BY id LIMIT 1")[0]
+    sale = db.checkout([{'id': product['id'], 'price': product['price'], 'quantity': 1}],
+                       user_id=1, payment_method='Cash')
+    assert sale['success']
+    return sale
+
+
+def test_sale_date_is_local_time(db, nairobi_tz):
+    before = datetime.now().replace(microsecond=0)
+    sale = _sell(db)
+    after = datetime.now()
+    stored = db.execute_query("SELECT sale_date FROM sales WHERE transaction_id = ?",
+                              (sale['transaction_id'],))[0]['sale_date']
+    assert before <= datetime.strptime(stored, "%Y-%m-%d %H:%M:%S") <= after
+    logged = db.execute_query("SELECT created_at FROM inventory_log WHERE notes = ?",
+                              (sale['transaction_id'],))[0]['created_at']
+    assert logged == stored
+
+
+def test_todays_sale_reports_under_today(db, nairobi_tz):
+    sale = _sell(db)
+    today = resolve_report_period("Today")
+    yesterday = resolve_report_period("Yesterday")
+
+    assert int(db.sales_rollup(None, *today)['lines'].iloc[0]) == 1
+    assert int(db.sales_rollup(None, *yesterday)['lines'].iloc[0]) == 0
+    assert [r['transaction_id'] for r in db.get_receipts(*today)] == [sale['transaction_id']]
+    assert db.get_receipts(*yesterday) == []
+
+
+def test_periods_are_half_open_local_days():
+    today = datetime(2026, 10, 18).date()
+    assert resolve_report_period("Today", today=today) == (datetime(2026, 10, 18), datetime(2026, 10, 19))
+    assert resolve_report_period("Last Month", today=today) == (datetime(2026, 9, 1), datetime(2026, 10, 1))
+    assert resolve_report_period("Custom Range", start_date=today - timedelta(days=2),
+                                 end_date=today) == (datetime(2026, 10, 16), datetime(2026, 10, 19))
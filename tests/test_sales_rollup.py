@@ -0,0 +1,98 @@
+import random
+
+from database import rebuild_sales_aggregates
+
+
+def _distinct_transactions(db, start, end):
+    return db.execute_query("""
+        SELECT COUNT(DISTINCT transaction_id) AS n FROM sales
+        WHERE sale_date >= ? AND sale_date < ?
+    """, (start, end))[0]['n']
+
+
+def test_transactions_count_carts_not_lines(db):
+    products = db.execute_query("SELECT id, price FROM products")
+    rng = random.Random(7)
+    for _ in range(30):
+        cart = [{'id': p['id'], 'price': p['price'], 'quantity': 1} for p in rng.sample(products, rng.randint(1, 4))]
+        assert db.checkout(cart, user_id=1, payment_method='Cash')['success']
+
+    lines = int(db.sales_rollup()['lines'].iloc[0])
+    assert db.count_transactions() == 30 < lines
+
+    # Move some lines to another day and delete others
+    rows = db.execute_query("SELECT id FROM sales")
+    for row in rng.sample(rows, 10):
+        db.execute_query("UPDATE sales SET sale_date = '2024-03-05 10:00:00' WHERE id = ?", (row['id'],))
+    for row in rng.sample(rows, 10):
+        db.execute_query("DELETE FROM sales WHERE id = ?", (row['id'],))
+
+    for start, end in [('2024-03-05', '2024-03-06'), ('2024-03-06', '2100-01-01'), ('2000-01-01', '2100-01-01')]:
+        expected = db.execute_query("""
+            SELECT COUNT(*) AS n FROM (SELECT DISTINCT date(sale_date), transaction_id FROM sales
+                                       WHERE sale_date >= ? AND sale_date < ?)
+        """, (start, end))[0]['n']
+        assert db.count_transactions(start, end) == expected
+    assert db.count_transactions('2024-03-06', '2100-01-01') == _distinct_transactions(db, '2024-03-06', '2100-01-01')
+
+    counted = db.execute_query("SELECT * FROM sales_daily_transactions ORDER BY sale_day")
+    with db.transaction() as tx:
+        rebuild_sales_aggregates(tx.conn)
+    assert db.execute_query("SELECT * FROM sales_daily_transactions ORDER BY sale_day") == counted
+
+
+def _rollup(db):
+    rows = db.execute_query("""
+        SELECT sale_day, product_id, category, payment_method, quantity, total_sales, tax_amount, line_count
+        FROM sales_daily_rollup ORDER BY 1, 2, 3, 4
+    """)
+    return [(*list(row.values())[:5], round(row['total_sales'], 6), round(row['tax_amount'], 6),
+             row['line_count']) for row in rows]
+
+
+def _aggregate(db):
+    rows = db.execute_query("""
+        SELECT date(s.sale_date) AS sale_day, s.product_id, COALESCE(p.category, 'Uncategorized') AS category,
+               s.payment_method, SUM(s.quantity) AS quantity, SUM(s.total_price) AS total_sales,
+               SUM(s.tax_amount) AS tax_amount, COUNT(*) AS line_count
+        FROM sales s LEFT JOIN products p ON p.id = s.product_id
+        GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+    """)
+    return [(*list(row.values())[:5], round(row['total_sales'], 6), round(row['tax_amount'], 6),
+             row['line_count']) for row in rows]
+
+
+def test_rollup_follows_sale_inserts_updates_and_deletes(db):
+    products = db.execute_query("SELECT id, price FROM products ORDER BY id")
+    rng = random.Random(3)
+    for _ in range(20):
+        cart = [{'id': p['id'], 'price': p['price'], 'quantity': rng.randint(1, 3)}
+                for p in rng.sample(products, rng.randint(1, 3))]
+        assert db.checkout(cart, user_id=1, payment_method=rng.choice(['Cash', 'M-Pesa']), tax_rate=16.0)['success']
+    assert _rollup(db) == _aggregate(db)
+
+    # One more sale, then take it back
+    before, transactions = _rollup(db), db.count_transactions()
+    db.execute_query("""
+        INSERT INTO sales (transaction_id, product_id, quantity, unit_price, total_price, tax_amount,
+                           payment_method, sale_date)
+        VALUES ('TXN-REFUND', ?, 2, 10.0, 20.0, 3.2, 'Cash', '2024-02-29 09:00:00')
+    """, (products[0]['id'],))
+    assert _rollup(db) == _aggregate(db) != before
+    assert db.count_transactions() == transactions + 1
+    db.execute_query("DELETE FROM sales WHERE transaction_id = 'TXN-REFUND'")
+    assert _rollup(db) == _aggregate(db) == before
+    assert db.count_transactions() == transactions
+
+    # Edits move lines between buckets; a category change follows the product
+    rows = db.execute_query("SELECT id FROM sales")
+    for row in rng.sample(rows, 8):
+        db.execute_query("""
+            UPDATE sales SET quantity = quantity + 1, total_price = total_price + 5,
+                             payment_method = 'Card', sale_date = '2024-03-01 12:00:00'
+            WHERE id = ?
+        """, (row['id'],))
+    db.execute_query("UPDATE products SET category = 'Moved' WHERE id = ?", (products[1]['id'],))
+    for row in rng.sample(rows, 5):
+        db.execute_query("DELETE FROM sales WHERE id = ?", (row['id'],))
+    assert _rollup(db) == _aggregate(db)
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import numpy as np
+
+from ledger import InventoryLedger
+from seed_data import seed, stock_levels
+
+
+def test_stock_levels_floor_at_zero():
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        n, n_products = int(rng.integers(1, 300)), int(rng.integers(1, 8))
+        products = rng.integers(0, n_products, n)
+        changes = rng.integers(-6, 4, n)
+        carry = rng.integers(0, 5, n_products)
+        expected_carry = carry.copy()
+        levels, applied = stock_levels(changes, products, carry)
+
+        expected_levels, expected_applied = [], []
+        for product, change in zip(products, changes):
+            level = max(expected_carry[product] + change, 0)
+            expected_applied.append(level - expected_carry[product])
+            expected_carry[product] = level
+            expected_levels.append(level)
+        assert levels.tolist() == expected_levels
+        assert applied.tolist() == expected_applied
+        assert carry.tolist() == expected_carry.tolist()
+
+
+def test_seeded_ledger_matches_products(db):
+    seed(db, n_products=50, n_users=3, n_sales=20_000, days=30, skew=2.0, reset=True)
+    assert db.execute_query("SELECT COUNT(*) AS n FROM inventory_log WHERE new_quantity < 0")[0]['n'] == 0
+    mismatched = db.execute_query("""
+        SELECT COUNT(*) AS n FROM products p JOIN inventory_log l ON l.id = (
+            SELECT MAX(id) FROM inventory_log WHERE product_id = p.id)
+        WHERE l.new_quantity <> p.stock_quantity
+    """)[0]['n']
+    assert mismatched == 0
+    sold = db.execute_query("SELECT SUM(quantity) AS q FROM sales")[0]['q']
+    logged = db.execute_query("SELECT -SUM(quantity_change) AS q FROM inventory_log WHERE action = 'sale'")[0]['q']
+    assert sold == logged
+
+
+def test_reset_clears_inventory_checkpoints(db):
+    ledger = InventoryLedger(db)
+    assert ledger.take_snapshot() is not None
+    seed(db, n_products=20, n_users=2, n_sales=2_000, days=10, reset=True)
+
+    assert db.execute_query("SELECT COUNT(*) AS n FROM inventory_snapshots")[0]['n'] == 0
+    assert db.execute_query("SELECT COUNT(*) AS n FROM inventory_snapshot_items")[0]['n'] == 0
+    products = db.execute_query("SELECT id, stock_quantity FROM products")
+    assert ledger.stock_at(datetime.now()) == {p['id']: p['stock_quantity'] for p in products}
@@ -0,0 +1,27 @@
+from sorting import CatalogSorter
+
+
+def _product(id, name, price):
+    return {'id': id, 'name': name, 'price': price}
+
+
+def test_items_missing_from_the_catalog_are_still_sorted():
+    catalog = [_product(1, 'Tea', 20.0), _product(2, 'Chai', 50.0), _product(3, 'Soda', 20.0)]
+    sorter = CatalogSorter()
+    assert [p['id'] for p in sorter.sort(catalog, 'name')] == [2, 3, 1]
+
+    # Another session added product 4 after this catalog was read
+    items = catalog + [_product(4, 'Bread', None)]
+    keys = [('price', True), ('name', False)]
+    assert [p['id'] for p in sorter.sort(catalog, keys, items=items)] == [4, 2, 3, 1]
+    assert [p['id'] for p in sorter.sort(catalog, 'price', items=items)] == [1, 3, 2, 4]
+    assert sorter.fallbacks == 2
+
+
+def test_fallback_matches_the_ranked_sort():
+    catalog = [_product(i, f"Item {i % 7}", float(i % 3) if i % 5 else None) for i in range(1, 40)]
+    sorter = CatalogSorter()
+    for keys in ('name', ('price', True), [('price', False), ('name', True)]):
+        ranked = sorter.sort(catalog, keys, items=catalog[::2])
+        direct = sorter.sort(catalog[:-1], keys, items=catalog[::2])
+        assert [p['id'] for p in direct] == [p['id'] for p in ranked]
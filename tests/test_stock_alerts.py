@@ -0,0 +1,46 @@
+from database import SCHEMA_MIGRATIONS, local_timestamp
+
+
+def _alert(db, product_id):
+    return db.execute_query("SELECT low_since, critical_since FROM stock_alerts WHERE product_id = ?",
+                            (product_id,))[0]
+
+
+def test_alerts_are_stamped_in_local_time(db, nairobi_tz):
+    before = local_timestamp()
+    product_id = db.add_product({'name': 'Tea', 'price': 10.0, 'stock_quantity': 50, 'min_stock_level': 20})
+    db.update_product(product_id, {'stock_quantity': 5})
+    after = local_timestamp()
+
+    alert = _alert(db, product_id)
+    assert before <= alert['low_since'] <= after
+    assert before <= alert['critical_since'] <= after
+
+
+def test_migration_moves_utc_alerts_to_local_time(db, nairobi_tz):
+    product_id = db.add_product({'name': 'Tea', 'price': 10.0, 'stock_quantity': 5, 'min_stock_level': 20})
+    with db.connection() as conn:
+        # The trigger and stamp a database from before migration 15 carries
+        conn.execute("DROP TRIGGER stock_alerts_insert")
+        conn.execute("""
+            CREATE TRIGGER stock_alerts_insert AFTER INSERT ON products
+            BEGIN SELECT CURRENT_TIMESTAMP; END
+        """)
+        conn.execute("UPDATE stock_alerts SET low_since = '2026-01-01 21:30:00', critical_since = NULL")
+        conn.execute("PRAGMA user_version = 14")
+        conn.commit()
+
+    assert db.migrate() == SCHEMA_MIGRATIONS[-1][0]
+    assert _alert(db, product_id) == {'low_since': '2026-01-02 00:30:00', 'critical_since': None}
+    triggers = db.execute_query("""
+        SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'stock_alerts_%'
+    """)
+    assert len(triggers) == 3
+    assert not any('CURRENT_TIMESTAMP' in t['sql'] for t in triggers)
+
+    # Already-local rows are left alone on a second run
+    with db.connection() as conn:
+        conn.execute("PRAGMA user_version = 14")
+        conn.commit()
+    db.migrate()
+    assert _alert(db, product_id)['low_since'] == '2026-01-02 00:30:00'
@@ -0,0 +1,17 @@
+def test_execute_many_lastrowid_only_after_insert(db):
+    inserted = db.execute_many("INSERT INTO products (name, price, stock_quantity) VALUES (?, ?, ?)",
+                               [('A', 1.0, 5), ('B', 2.0, 5)])
+    assert inserted['rowcount'] == 2
+    assert inserted['lastrowid'] == db.execute_query("SELECT MAX(id) AS id FROM products")[0]['id']
+
+    with db.transaction() as tx:
+        tx.execute("INSERT INTO products (name, price, stock_quantity) VALUES ('C', 3.0, 5)")
+        tx.lastrowid = None
+        tx.execute_many("UPDATE products SET price = price + 1 WHERE id = ?", [(1,), (2,)])
+        tx.execute_many("DELETE FROM products WHERE name = ?", [('A',)])
+        tx.execute_many("INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)", [('admin', 'x')])
+        assert tx.rowcount == 4
+        assert tx.lastrowid is None
+
+    updated = db.execute_many("UPDATE products SET price = price + 1 WHERE name = ?", [('B',)])
+    assert updated == {'rowcount': 1, 'lastrowid': None}